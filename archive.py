@@ -0,0 +1,501 @@
+"""
+Read-only columnar archives of travel history.
+
+Years of past trips never change, so they can be written once to a
+binary archive and queried straight from disk. The file holds a small
+header followed by columns, each aligned to 8 bytes:
+
+    header          magic, version, counts and the offset of each part
+    country names   UTF-8, one per line; a country ID is a line number
+    country starts  uint64 per country: its first row, plus the end
+    country IDs     uint16 per row
+    date ordinals   int32 per row
+    category bitmap one bit per row, set for wishlist trips
+    date index      int64 keys, date_index.pack_key(ordinal, country ID),
+                    sorted by date, visited trips first
+
+Rows are sorted by country and then date, so the trips to a country are
+one slice of the columns and name-ordered views are a scan. The date
+index answers date-ordered views and date ranges with binary searches.
+
+TravelArchive opens the file with mmap and reads the columns through
+memoryviews, so nothing is copied or loaded up front: opening a
+multi-gigabyte archive takes milliseconds and only the pages a query
+touches are read into memory. Once an archive is closed, every query,
+and every query iterator not yet run to the end, raises ValueError.
+
+Usage:
+    python3 archive.py write history.tta          # from the saved records
+    python3 archive.py info history.tta
+    python3 archive.py search history.tta fra
+    python3 archive.py sort history.tta visited date
+    python3 archive.py display history.tta
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+from date_index import COUNTRY_BITS, pack_key, unpack_key
+from date_parser import date_to_ordinal, ordinal_to_date
+
+MAGIC = b"TTRACKAR"
+VERSION = 1
+CATEGORIES = ("visited", "wishlist")  # Bit 0 and bit 1 in the bitmap
+
+# magic, version, byte order (0 = little endian), country count, record
+# count, wishlist count, then the offset of each part of the file
+HEADER = struct.Struct("<8sHHIQQ6Q")
+ALIGNMENT = 8
+
+# Rows are sorted on (country ID, ordinal, wishlist bit) packed into one
+# integer; no day ordinal reaches 2 ** 22
+_ORDINAL_BITS = 23
+_ORDINAL_MASK = (1 << _ORDINAL_BITS) - 1
+
+# Above every date index key, to sort the wishlist after the visits
+_CATEGORY_SHIFT = _ORDINAL_BITS + COUNTRY_BITS + 1
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def write_archive(path, travel_data, countries):
+    """
+    Writes travel records to an archive, replacing the file atomically.
+
+    Parameters:
+        path (str): Where the archive is written.
+        travel_data (dict): 'visited' and 'wishlist' mapped to their
+            RecordArray.
+        countries (list): The valid country names, indexed by country ID.
+
+    Returns:
+        int: How many records were written.
+    """
+    keys = array("q")
+    for bit, category in enumerate(CATEGORIES):
+        records = travel_data.get(category)
+        if records is None:
+            continue
+        keys.extend((country_id << _ORDINAL_BITS | ordinal) << 1 | bit
+                    for country_id, ordinal in zip(records.country_ids,
+                                                   records.ordinals))
+    keys = array("q", sorted(keys))
+    count = len(keys)
+
+    country_ids = array("H", (key >> (_ORDINAL_BITS + 1) for key in keys))
+    ordinals = array("i", (key >> 1 & _ORDINAL_MASK for key in keys))
+    bitmap = bytearray((count + 7) // 8)
+    starts = array("Q", [0] * (len(countries) + 1))
+    for row, key in enumerate(keys):
+        if key & 1:
+            bitmap[row >> 3] |= 1 << (row & 7)
+        starts[(key >> (_ORDINAL_BITS + 1)) + 1] += 1
+    for country_id in range(len(countries)):
+        starts[country_id + 1] += starts[country_id]
+
+    # Visited keys sort before wishlist keys, each part by date
+    date_keys = sorted(
+        (key & 1) << _CATEGORY_SHIFT |
+        pack_key(key >> 1 & _ORDINAL_MASK, key >> (_ORDINAL_BITS + 1))
+        for key in keys)
+    date_index = array("q", (key & ((1 << _CATEGORY_SHIFT) - 1)
+                             for key in date_keys))
+    del date_keys
+    wishlist_count = sum(key & 1 for key in keys)
+    del keys
+
+    if sys.byteorder != "little":
+        for column in (starts, country_ids, ordinals, date_index):
+            column.byteswap()
+    parts = ["\n".join(countries).encode("utf-8"), starts, country_ids,
+             ordinals, bytes(bitmap), date_index]
+
+    offsets = []
+    offset = HEADER.size + _padding(HEADER.size)
+    for part in parts:
+        offsets.append(offset)
+        size = len(memoryview(part).cast("B"))
+        offset += size + _padding(size)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(countries), count,
+                               wishlist_count, *offsets))
+        for offset, part in zip(offsets, parts):
+            file.write(bytes(offset - file.tell()))
+            file.write(part)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    return count
+
+
+class TravelArchive:
+    """
+    A read-only archive opened with mmap.
+
+    Queries return the same shapes as TravelStore's, read straight from
+    the mapped columns.
+
+    Parameters:
+        path (str): The archive file.
+
+    Raises:
+        ValueError: If the file is not a travel archive this version
+            can read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._closed = False
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except ValueError:
+            self._map.close()
+            raise
+
+    def _open(self):
+        """
+        Reads the header and maps the columns.
+        """
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{self.path} is not a travel archive")
+        (magic, version, byte_order, country_count, count,
+         wishlist_count, names_at, starts_at, ids_at, ordinals_at,
+         bitmap_at, index_at) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a travel archive")
+        if version != VERSION:
+            raise ValueError(f"{self.path} is archive version {version}; "
+                             f"only version {VERSION} can be read")
+        if byte_order != 0 or sys.byteorder != "little":
+            raise ValueError("archives can only be read on little endian "
+                             "machines")
+
+        self.countries = self._map[names_at:starts_at].rstrip(
+            b"\0").decode("utf-8").split("\n")
+        if len(self.countries) != country_count or len(self._map) < (
+                index_at + 8 * count):
+            raise ValueError(f"{self.path} is damaged")
+        view = memoryview(self._map)
+        self._names = [name.lower() for name in self.countries]
+        self._starts = view[starts_at:starts_at + 8 * (country_count + 1)
+                            ].cast("Q")
+        self._country_ids = view[ids_at:ids_at + 2 * count].cast("H")
+        self._ordinals = view[ordinals_at:ordinals_at + 4 * count].cast("i")
+        self._bitmap = view[bitmap_at:bitmap_at + (count + 7) // 8]
+        self._date_index = view[index_at:index_at + 8 * count].cast("q")
+        self._views = (view, self._starts, self._country_ids,
+                       self._ordinals, self._bitmap, self._date_index)
+        self._counts = {"visited": count - wishlist_count,
+                        "wishlist": wishlist_count}
+
+    def __len__(self):
+        self._check_open()
+        return len(self._ordinals)
+
+    def __iter__(self):
+        """
+        Yields every record as (category, country, date), in row order.
+        """
+        self._check_open()
+        return self._while_open(self._all_rows())
+
+    def _all_rows(self):
+        countries, bitmap = self.countries, self._bitmap
+        for row, (country_id, ordinal) in enumerate(zip(self._country_ids,
+                                                        self._ordinals)):
+            yield (CATEGORIES[bitmap[row >> 3] >> (row & 7) & 1],
+                   countries[country_id], ordinal_to_date(ordinal))
+
+    def _check_open(self):
+        if self._closed:
+            raise ValueError(f"{self.path} is closed")
+
+    def _while_open(self, items):
+        """
+        Yields from a query until the archive is closed, then raises
+        ValueError, so every kind of query iterator stops the same way.
+        """
+        items = iter(items)
+        while True:
+            self._check_open()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            yield item
+
+    def close(self):
+        """
+        Unmaps the file. Lists already returned stay usable; queries and
+        unfinished query iterators raise ValueError from now on.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for view in reversed(self._views):
+            view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # An unfinished iterator holds a slice; unmapped once
+            # it is dropped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _check_category(self, category):
+        self._check_open()
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown category '{category}'. "
+                             f"Use one of: {', '.join(CATEGORIES)}.")
+
+    def count(self, category):
+        """
+        Returns how many records a category holds.
+        """
+        self._check_category(category)
+        return self._counts[category]
+
+    def _rows(self, country_id, bit):
+        """
+        Yields the rows of one country and category, in date order.
+        """
+        bitmap = self._bitmap
+        for row in range(self._starts[country_id],
+                         self._starts[country_id + 1]):
+            if (bitmap[row >> 3] >> (row & 7) & 1) == bit:
+                yield row
+
+    def _by_name(self, country_ids, reverse=False):
+        return sorted(country_ids, key=self._names.__getitem__,
+                      reverse=reverse)
+
+    # Searching and sorting
+
+    def search(self, query):
+        """
+        Finds the records whose country name contains the query.
+
+        Returns:
+            iterator: (category, country, date) for every match.
+        """
+        self._check_open()
+        return self._while_open(self._search(query.lower()))
+
+    def _search(self, query):
+        ordinals = self._ordinals
+        for country_id in self._by_name(
+                country_id for country_id, name in enumerate(self._names)
+                if query in name):
+            country = self.countries[country_id]
+            for bit, category in enumerate(CATEGORIES):
+                for row in self._rows(country_id, bit):
+                    yield category, country, ordinal_to_date(ordinals[row])
+
+    def sorted_records(self, category, order="az"):
+        """
+        Yields the (country, date) records of a category in order.
+
+        Parameters:
+            category (str): 'visited' or 'wishlist'.
+            order (str): 'az', 'za', 'date' (oldest first) or
+                'date-desc' (newest first).
+        """
+        self._check_category(category)
+        if order in ("az", "za"):
+            return self._while_open(self._by_country(category, order == "za"))
+        if order == "date":
+            return self._while_open(self._keys(self._index_slice(category)))
+        if order == "date-desc":
+            return self._while_open(
+                self._keys(reversed(self._index_slice(category))))
+        raise ValueError(f"Unknown sort order '{order}'. "
+                         "Use one of: az, za, date, date-desc.")
+
+    def _by_country(self, category, reverse):
+        bit = CATEGORIES.index(category)
+        ordinals = self._ordinals
+        for country_id in self._by_name(range(len(self.countries)), reverse):
+            country = self.countries[country_id]
+            for row in self._rows(country_id, bit):
+                yield country, ordinal_to_date(ordinals[row])
+
+    def _index_slice(self, category):
+        """
+        Returns the part of the date index holding a category.
+        """
+        visited = self._counts["visited"]
+        if category == "visited":
+            return self._date_index[:visited]
+        return self._date_index[visited:]
+
+    def _keys(self, keys):
+        """
+        Yields packed date index keys as (country, date) pairs.
+        """
+        countries = self.countries
+        for key in keys:
+            ordinal, country_id = unpack_key(key)
+            yield countries[country_id], ordinal_to_date(ordinal)
+
+    def _ordinal_range(self, category, first, last):
+        """
+        Returns the records whose ordinal lies in [first, last].
+        """
+        self._check_category(category)
+        keys = self._index_slice(category)
+        low = bisect_left(keys, pack_key(first))
+        high = bisect_left(keys, pack_key(last + 1))
+        return list(self._keys(keys[low:high]))
+
+    def between(self, category, start, end):
+        """
+        Returns the (country, date) records dated from start to end,
+        both included, oldest first.
+        """
+        return self._ordinal_range(category, date_to_ordinal(start),
+                                   date_to_ordinal(end))
+
+    def in_year(self, category, year):
+        """
+        Returns the (country, date) records dated in a year.
+        """
+        return self._ordinal_range(category, date(year, 1, 1).toordinal(),
+                                   date(year, 12, 31).toordinal())
+
+    def first(self, category, count):
+        """
+        Returns the earliest `count` (country, date) records.
+        """
+        self._check_category(category)
+        return list(self._keys(self._index_slice(category)[:count]))
+
+    def last(self, category, count):
+        """
+        Returns the latest `count` (country, date) records, newest first.
+        """
+        self._check_category(category)
+        keys = self._index_slice(category)
+        return list(self._keys(reversed(keys[max(len(keys) - count, 0):])))
+
+    def count_before(self, category, text):
+        """
+        Returns how many records of a category are dated before a date.
+        """
+        self._check_category(category)
+        return bisect_left(self._index_slice(category),
+                           pack_key(date_to_ordinal(text)))
+
+    # Display
+
+    def display_lines(self, headings=None):
+        """
+        Yields the lines listing every record, formatted lazily.
+
+        Parameters:
+            headings (dict): Optional category -> heading text, to
+                replace the plain headings (e.g. with colours).
+        """
+        self._check_open()
+        return self._while_open(self._display_lines(headings or {}))
+
+    def _display_lines(self, headings):
+        from travel_store import DISPLAY_SECTIONS
+        for category, heading, label in DISPLAY_SECTIONS:
+            heading = headings.get(category, heading)
+            if not self._counts[category]:
+                yield heading + " No records yet!"
+                continue
+            yield heading
+            for country, day in self._by_country(category, False):
+                yield f"- {country} ({label}: {day})"
+
+    def info(self):
+        """
+        Returns the record counts and the date range of each category.
+        """
+        self._check_open()
+        summary = {"path": self.path, "records": len(self),
+                   "bytes": len(self._map)}
+        for category in CATEGORIES:
+            keys = self._index_slice(category)
+            summary[category] = {
+                "records": len(keys),
+                "first": (ordinal_to_date(unpack_key(keys[0])[0])
+                          if keys else None),
+                "last": (ordinal_to_date(unpack_key(keys[-1])[0])
+                         if keys else None),
+            }
+        return summary
+
+
+def main(argv=None):
+    """
+    Writes or queries an archive from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Write or query a read-only travel archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    write = commands.add_parser("write", help="archive the saved records")
+    write.add_argument("archive")
+    write.add_argument("--data-dir", help="the tracker's data folder")
+    info = commands.add_parser("info", help="show what an archive holds")
+    info.add_argument("archive")
+    search = commands.add_parser("search", help="find countries by name")
+    search.add_argument("archive")
+    search.add_argument("query")
+    sort = commands.add_parser("sort", help="list a category in order")
+    sort.add_argument("archive")
+    sort.add_argument("category", choices=CATEGORIES)
+    sort.add_argument("order", nargs="?", default="az",
+                      choices=("az", "za", "date", "date-desc"))
+    display = commands.add_parser("display", help="list every record")
+    display.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    if args.command == "write":
+        from travel_store import TravelStore
+        store = TravelStore.open(args.data_dir)
+        try:
+            written = write_archive(args.archive, store.data, store.countries)
+        finally:
+            store.close()
+        print(f"Archived {written} records to {args.archive}.")
+        return 0
+
+    out = sys.stdout
+    with TravelArchive(args.archive) as travel_archive:
+        if args.command == "info":
+            import json
+            print(json.dumps(travel_archive.info(), indent=2))
+        elif args.command == "search":
+            out.writelines(f"{category}\t{country}\t{day}\n" for
+                           category, country, day in
+                           travel_archive.search(args.query))
+        elif args.command == "sort":
+            out.writelines(f"{country}\t{day}\n" for country, day in
+                           travel_archive.sorted_records(args.category,
+                                                         args.order))
+        else:
+            out.writelines(line + "\n"
+                           for line in travel_archive.display_lines())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
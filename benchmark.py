@@ -0,0 +1,503 @@
+"""
+Benchmarks for the Travel Tracker operations.
+
+A seeded generator builds synthetic travel histories from the valid
+country list: popular countries come up far more often than others,
+visited trips lean towards recent years and wishlist trips lie in the
+next few years, so the data looks like what people actually enter.
+Popular countries are drawn so often that some trips repeat a country
+and date already generated. The store merges those, so every result
+also reports how many records were actually stored.
+
+For each size the suite times add, delete, search, sort and display
+on an in-memory TravelStore, records the latency percentiles of the
+single-record operations and the memory the records take, and saves
+everything as JSON. Passing an earlier results file as the baseline
+flags every operation that got slower than the allowed threshold.
+
+Usage:
+    python3 benchmark.py                          # 1e3, 1e4 and 1e5
+    python3 benchmark.py --sizes 1e3,1e5,1e7 --output results.json
+    python3 benchmark.py --baseline results.json  # exit code 1 on regression
+"""
+
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from countries import VALID_COUNTRIES
+from date_parser import DATE_FORMAT
+from renderer import show_pages
+from query_cache import QueryCache
+from travel_store import SORT_ORDERS, TravelStore
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_SEED = 2024
+DEFAULT_TODAY = date(2025, 1, 1)  # Histories end here, whatever the date
+
+# Operations timed one call at a time, for latency percentiles
+SAMPLED_CALLS = 1000
+SEARCH_QUERIES = 200
+
+# Read-only operations are run this many times and the fastest kept
+REPEATS = 3
+
+# Slowdowns smaller than this are timer noise, never a regression
+MIN_REGRESSION_SECONDS = 0.005
+
+# Share of trips on the wishlist
+WISHLIST_SHARE = 0.3
+
+
+def generate_records(count, seed=DEFAULT_SEED, countries=None, today=None):
+    """
+    Yields `count` synthetic (category, country, date) trips.
+
+    The same seed always gives the same trips. Some of them repeat a
+    trip already generated, and the store merges those; the share grows
+    with the count, as popular countries run out of distinct dates.
+
+    Parameters:
+        count (int): How many trips to generate.
+        seed (int): Seed for the random generator.
+        countries (list): Country names to draw from. Defaults to
+            VALID_COUNTRIES.
+        today (date): The day the history ends. Defaults to
+            DEFAULT_TODAY, so runs on different days use the same data.
+    """
+    rng = random.Random(seed)
+    countries = countries or VALID_COUNTRIES
+    today = today or DEFAULT_TODAY
+
+    # Zipf-like popularity: a few countries get most of the trips
+    popularity = list(countries)
+    rng.shuffle(popularity)
+    weights = [1 / rank for rank in range(1, len(popularity) + 1)]
+    country_draws = rng.choices(popularity, weights=weights, k=count)
+
+    first_trip = date(1950, 1, 1).toordinal()
+    last_trip = today.toordinal()
+    for country in country_draws:
+        if rng.random() < WISHLIST_SHARE:
+            day = today + timedelta(days=rng.randint(1, 10 * 365))
+            yield "wishlist", country, day.strftime(DATE_FORMAT)
+        else:
+            # Most trips are recent, so lean towards the last years
+            ordinal = int(rng.triangular(first_trip, last_trip, last_trip))
+            day = date.fromordinal(ordinal)
+            yield "visited", country, day.strftime(DATE_FORMAT)
+
+
+def search_queries(count, seed=DEFAULT_SEED, countries=None):
+    """
+    Returns `count` search strings: 2-5 letter pieces of country names,
+    the way people type part of a name.
+    """
+    rng = random.Random(seed)
+    countries = countries or VALID_COUNTRIES
+    queries = []
+    for _ in range(count):
+        name = rng.choice(countries).lower()
+        length = min(rng.randint(2, 5), len(name))
+        start = rng.randint(0, len(name) - length)
+        queries.append(name[start:start + length])
+    return queries
+
+
+def percentile(samples, fraction):
+    """
+    Returns the value below which the given fraction of sorted samples
+    lie.
+    """
+    if not samples:
+        return 0.0
+    position = min(int(fraction * len(samples)), len(samples) - 1)
+    return samples[position]
+
+
+def summarize(operation, size, seconds, calls, latencies=None):
+    """
+    Builds the result entry for one timed operation.
+
+    Parameters:
+        operation (str): The operation name.
+        size (int): The number of trips generated for the run.
+        seconds (float): Total time taken.
+        calls (int): How many operations the time covers.
+        latencies (list): Optional per-call times in seconds.
+    """
+    result = {
+        "operation": operation,
+        "size": size,
+        "seconds": round(seconds, 6),
+        "calls": calls,
+        "ops_per_second": round(calls / seconds, 1) if seconds else None,
+    }
+    if latencies:
+        latencies.sort()
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            result[f"{name}_us"] = round(
+                percentile(latencies, fraction) * 1e6, 2)
+        result["max_us"] = round(latencies[-1] * 1e6, 2)
+    return result
+
+
+def timed_calls(function, arguments):
+    """
+    Calls the function once per argument tuple.
+
+    Returns:
+        tuple: (total seconds, list of per-call seconds)
+    """
+    clock = time.perf_counter
+    latencies = []
+    for args in arguments:
+        start = clock()
+        function(*args)
+        latencies.append(clock() - start)
+    return sum(latencies), latencies
+
+
+def best_of(function, repeats=REPEATS):
+    """
+    Times a read-only function a few times.
+
+    Returns:
+        tuple: (fastest time in seconds, result of the last call)
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def consume(iterable):
+    """
+    Runs an iterable to the end and returns how many items it gave.
+    """
+    count = 0
+    for count, _ in enumerate(iterable, 1):
+        pass
+    return count
+
+
+def bench_add(size, seed):
+    """
+    Times adding `size` trips, one by one, to an empty store.
+
+    The trips are generated before the clock starts.
+
+    Returns:
+        tuple: (the filled store, the result entry)
+    """
+    trips = list(generate_records(size, seed))
+    store = TravelStore()
+    store.cache = QueryCache(0)  # Time the queries, not cache hits
+    _ = store.resolver  # Built up front, as the app does on its first prompt
+    seconds, latencies = timed_calls(store.add, trips)
+    return store, summarize("add", size, seconds, size, latencies)
+
+
+def bench_search(store, size, seed):
+    """
+    Times substring and prefix searches for typical queries.
+    """
+    queries = [(query,) for query in search_queries(SEARCH_QUERIES, seed)]
+    start = time.perf_counter()
+    _ = store.search_index  # Index build counts towards the first search
+    build = time.perf_counter() - start
+    results = [summarize("search-index-build", size, build, 1)]
+    for operation, function in (("search", store.search),
+                                ("prefix-search", store.prefix_search)):
+        seconds, latencies = timed_calls(function, queries)
+        results.append(summarize(operation, size, seconds, len(queries),
+                                 latencies))
+
+    # The same searches again, answered from a warm query cache
+    store.cache = QueryCache()
+    timed_calls(store.search, queries)
+    seconds, latencies = timed_calls(store.search, queries)
+    results.append(summarize("search-cached", size, seconds, len(queries),
+                             latencies))
+    store.cache = QueryCache(0)
+    return results
+
+
+def bench_sort(store, size):
+    """
+    Times producing every record of both categories in each sort order.
+    """
+    results = []
+    start = time.perf_counter()
+    _ = store.date_index
+    results.append(summarize("date-index-build", size,
+                             time.perf_counter() - start, 1))
+    for order in SORT_ORDERS:
+        seconds, _ = best_of(lambda: [
+            consume(store.sorted_records(category, order))
+            for category in store.data])
+        results.append(summarize(f"sort-{order}", size, seconds, 1))
+    return results
+
+
+def bench_display(store, size):
+    """
+    Times the first page of the display screen, and formatting the
+    full listing.
+    """
+    first_page, _ = best_of(lambda: show_pages(
+        ["Your Travel Records:"], store.display_lines(), size=20,
+        ask=lambda prompt: "q", stream=io.StringIO()))
+    full, lines = best_of(lambda: consume(store.display_lines()))
+    return [summarize("display-first-page", size, first_page, 1),
+            summarize("display-all", size, full, lines)]
+
+
+def bench_delete(store, size, seed):
+    """
+    Times deleting single records by country, then a bulk delete of
+    every visited trip before the median date.
+    """
+    rng = random.Random(seed)
+    calls = min(SAMPLED_CALLS, len(store) // 2)
+    victims = [(record.country,) for record in
+               rng.sample(list(store.records("visited")),
+                          min(calls, len(store.data["visited"])))]
+    seconds, latencies = timed_calls(
+        lambda country: store.delete("visited", country), victims)
+    results = [summarize("delete", size, seconds, len(victims), latencies)]
+
+    ordinals = sorted(store.data["visited"].ordinals)
+    if ordinals:
+        cutoff = date.fromordinal(ordinals[len(ordinals) // 2])
+        start = time.perf_counter()
+        removed = store.delete_before("visited",
+                                      cutoff.strftime(DATE_FORMAT))
+        results.append(summarize("delete-before", size,
+                                 time.perf_counter() - start,
+                                 len(removed)))
+    return results
+
+
+def measure_memory(size, seed):
+    """
+    Measures the memory taken by a store holding `size` trips, with its
+    search and date indexes built.
+
+    Returns:
+        dict: The result entry, with bytes in use and the peak.
+    """
+    trips = list(generate_records(size, seed))
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        store = TravelStore()
+        for trip in trips:
+            store.add(*trip)
+        records = tracemalloc.get_traced_memory()[0] - baseline
+        _ = store.search_index
+        _ = store.date_index
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "operation": "memory",
+        "size": size,
+        "records": len(store),
+        "records_bytes": records,
+        "bytes_per_record": round(records / max(len(store), 1), 2),
+        "total_bytes": current - baseline,
+        "peak_bytes": peak - baseline,
+    }
+
+
+def run_size(size, seed, memory=True, log=None):
+    """
+    Runs every benchmark for one store size.
+
+    Returns:
+        list: The result entries.
+    """
+    log = log or (lambda message: None)
+    log(f"{size:>10,} records: add")
+    store, result = bench_add(size, seed)
+    stored = len(store)  # Fewer than size, as duplicate trips are merged
+    results = [result]
+    log(f"{size:>10,} records: search")
+    results.extend(bench_search(store, size, seed))
+    log(f"{size:>10,} records: sort")
+    results.extend(bench_sort(store, size))
+    log(f"{size:>10,} records: display")
+    results.extend(bench_display(store, size))
+    log(f"{size:>10,} records: delete")
+    results.extend(bench_delete(store, size, seed))
+    del store
+    for entry in results:
+        entry["records"] = stored
+    if memory:
+        log(f"{size:>10,} records: memory")
+        results.append(measure_memory(size, seed))
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, seed=DEFAULT_SEED, memory=True, log=None):
+    """
+    Runs the suite for every size.
+
+    Returns:
+        dict: The machine-readable report, with the run environment
+        under "meta" and one entry per operation and size under
+        "results".
+    """
+    results = []
+    for size in sizes:
+        results.extend(run_size(size, seed, memory, log))
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "today": DEFAULT_TODAY.isoformat(),
+            "sizes": list(sizes),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Finds the operations that got slower, or use more memory, than in
+    a baseline report. Slowdowns of a few milliseconds are ignored as
+    timer noise.
+
+    Parameters:
+        report (dict): The new report from run().
+        baseline (dict): An earlier report.
+        threshold (float): Allowed slowdown, 0.25 meaning 25%.
+
+    Returns:
+        list: One dict per regression, with the old and new value.
+    """
+    def keyed(entries):
+        return {(entry["operation"], entry["size"]): entry
+                for entry in entries}
+
+    old_results = keyed(baseline["results"])
+    regressions = []
+    for key, new in keyed(report["results"]).items():
+        old = old_results.get(key)
+        if old is None:
+            continue
+        metric = "total_bytes" if key[0] == "memory" else "seconds"
+        floor = 0 if metric == "total_bytes" else MIN_REGRESSION_SECONDS
+        if (old.get(metric) and
+                new[metric] > old[metric] * (1 + threshold) and
+                new[metric] - old[metric] > floor):
+            regressions.append({
+                "operation": key[0], "size": key[1], "metric": metric,
+                "baseline": old[metric], "current": new[metric],
+                "change": round(new[metric] / old[metric] - 1, 3),
+            })
+    return regressions
+
+
+def format_table(report):
+    """
+    Returns the results as a plain text table.
+    """
+    lines = [f"{'operation':<20} {'size':>10} {'records':>10} "
+             f"{'seconds':>10} {'ops/s':>12} {'p50 us':>9} {'p99 us':>9}"]
+    for entry in report["results"]:
+        records = entry.get("records", entry["size"])
+        if entry["operation"] == "memory":
+            lines.append(f"{'memory':<20} {entry['size']:>10,} "
+                         f"{records:>10,} "
+                         f"{entry['bytes_per_record']:>10} bytes/record, "
+                         f"peak {entry['peak_bytes'] / 2**20:.1f} MiB")
+            continue
+        lines.append(
+            f"{entry['operation']:<20} {entry['size']:>10,} "
+            f"{records:>10,} {entry['seconds']:>10.4f} "
+            f"{entry['ops_per_second'] or 0:>12,.0f} "
+            f"{entry.get('p50_us', ''):>9} {entry.get('p99_us', ''):>9}")
+    return "\n".join(lines)
+
+
+def parse_sizes(text):
+    """
+    Parses a comma separated list of sizes such as "1e3,1e4,50000".
+    """
+    try:
+        sizes = [int(float(part)) for part in text.split(",") if part]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid sizes: {text}")
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("sizes must be positive")
+    return sizes
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks from the command line.
+
+    Returns:
+        int: 1 if a regression was found against the baseline, else 0.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Travel Tracker operations.")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES,
+                        help="comma separated store sizes "
+                             "(default: 1e3,1e4,1e5; up to 1e7)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="where the JSON results are written")
+    parser.add_argument("--baseline",
+                        help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float,
+                        default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a regression is "
+                             "flagged (default: 0.25)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the memory measurements")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.seed, not args.no_memory,
+                 log=lambda message: print(message, file=sys.stderr))
+    print(format_table(report))
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['operation']} at "
+                  f"{regression['size']:,} records: {regression['metric']} "
+                  f"{regression['baseline']} -> {regression['current']} "
+                  f"(+{regression['change']:.0%})")
+        if not regressions:
+            print(f"No regressions against {args.baseline}.")
+        status = 1 if regressions else 0
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Bulk import and export of travel records as CSV or JSON Lines.
+
+Files are streamed: rows are read lazily, grouped into chunks and
+validated in a pool of worker processes, with only a few chunks in
+flight at any time. Memory use therefore does not grow with the size
+of the file. Every row goes through the same rules as the interactive
+prompts (category, country, date format, birth year and past/future
+date), and rows that fail are written to a reject report with the
+reason instead of stopping the load.
+
+Both formats use the fields category, country and date (dd-mm-yyyy).
+"""
+
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from countries import CountryResolver
+from date_parser import DateRules
+
+FIELDS = ("category", "country", "date")
+CATEGORIES = ("visited", "wishlist")
+CHUNK_SIZE = 10000
+
+# Set in each worker process by _init_worker
+_RULES = {}
+
+
+def detect_format(path):
+    """
+    Works out the file format from the file extension.
+
+    Returns:
+        str: 'csv' or 'jsonl'.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type '{extension}'. "
+                     "Use .csv or .jsonl.")
+
+
+def read_rows(path, file_format):
+    """
+    Yields (line number, category, country, date) tuples from a file.
+    Unreadable lines are yielded with None fields so they get rejected.
+    """
+    # utf-8-sig drops the byte order mark Excel writes at the start
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield (reader.line_num, row.get("category"),
+                       row.get("country"), row.get("date"))
+        else:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield line_number, None, None, None
+                    continue
+                if not isinstance(row, dict):
+                    row = {}
+                yield (line_number, row.get("category"),
+                       row.get("country"), row.get("date"))
+
+
+def chunked(rows, size):
+    """
+    Groups an iterable into lists of at most `size` items.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _init_worker(countries, rules):
+    """
+    Builds the validation rules once per worker process.
+    """
+    _RULES["resolver"] = CountryResolver(countries)
+    _RULES["dates"] = rules
+
+
+def _check_row(category, country):
+    """
+    Applies the category and country rules to one row.
+
+    Returns:
+        tuple: (category, country) on success, or the reason the row
+        was rejected as a string.
+    """
+    category = (category or "").strip().lower()
+    if category not in CATEGORIES:
+        return "invalid category"
+
+    name = _RULES["resolver"].resolve((country or "").strip())
+    if name is None:
+        return "unknown country"
+    return category, name
+
+
+def validate_chunk(chunk):
+    """
+    Validates a chunk of rows inside a worker process.
+
+    The category and country are checked row by row, then the dates
+    of the chunk are checked as one column.
+
+    Returns:
+        tuple: (accepted, rejected) where accepted holds
+        (category, country, date) tuples and rejected holds
+        (line, category, country, date, reason) tuples.
+    """
+    checked = [_check_row(category, country)
+               for _, category, country, _ in chunk]
+    categories = [result[0] if isinstance(result, tuple) else None
+                  for result in checked]
+    dates = [row[3].strip() if isinstance(row[3], str) else ""
+             for row in chunk]
+    _, date_reasons = _RULES["dates"].check_column(categories, dates)
+
+    accepted, rejected = [], []
+    for row, result, date_text, date_reason in zip(chunk, checked, dates,
+                                                   date_reasons):
+        reason = result if isinstance(result, str) else date_reason
+        if reason:
+            rejected.append(row + (reason,))
+        else:
+            accepted.append(result + (date_text,))
+    return accepted, rejected
+
+
+def _validated_chunks(chunks, initargs, workers):
+    """
+    Yields validated chunks in file order, keeping at most a couple of
+    chunks per worker in flight.
+    """
+    if workers == 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            yield validate_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_records(path, add_record, countries, age=None, report_path=None,
+                   file_format=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Streams records from a file into the tracker.
+
+    Parameters:
+        path (str): The CSV or JSON Lines file to read.
+        add_record (callable): Called as add_record(category, record)
+            for every valid row. It returns None when the row was a
+            trip already stored, which is then counted as merged.
+        countries (list): The valid country names.
+        age (int): The user's age, for the birth year check (optional).
+        report_path (str): Where rejected rows are written. Defaults to
+            the input path with '.rejected.csv' appended.
+        file_format (str): 'csv' or 'jsonl'; guessed from the extension.
+        workers (int): Worker processes; 1 validates in this process.
+        chunk_size (int): Rows validated per task.
+
+    Returns:
+        tuple: (rows imported, rows rejected, rows merged into a trip
+        already stored).
+    """
+    file_format = file_format or detect_format(path)
+    report_path = report_path or path + ".rejected.csv"
+    workers = workers or os.cpu_count() or 1
+
+    initargs = (list(countries), DateRules(age))  # "Today" read once
+
+    imported = rejected = merged = 0
+    chunks = chunked(read_rows(path, file_format), chunk_size)
+    with open(report_path, "w", encoding="utf-8", newline="") as report:
+        writer = csv.writer(report)
+        writer.writerow(("line",) + FIELDS + ("reason",))
+        for accepted, failed in _validated_chunks(chunks, initargs, workers):
+            for category, country, date_text in accepted:
+                if add_record(category, {"country": country,
+                                         "date": date_text}) is None:
+                    merged += 1
+            writer.writerows(failed)
+            imported += len(accepted)
+            rejected += len(failed)
+    return imported - merged, rejected, merged
+
+
+def export_records(path, travel_data, file_format=None):
+    """
+    Streams every record of the travel data to a file.
+
+    Parameters:
+        path (str): The CSV or JSON Lines file to write.
+        travel_data (dict): Category name mapped to its records.
+        file_format (str): 'csv' or 'jsonl'; guessed from the extension.
+
+    Returns:
+        int: The number of records written.
+    """
+    file_format = file_format or detect_format(path)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+        for category, records in travel_data.items():
+            for record in records:
+                if file_format == "csv":
+                    writer.writerow((category, record["country"],
+                                     record["date"]))
+                else:
+                    file.write(json.dumps({
+                        "category": category, "country": record["country"],
+                        "date": record["date"]}) + "\n")
+                written += 1
+    return written
@@ -0,0 +1,356 @@
+"""
+Batch commands for the Travel Tracker.
+
+Instead of answering prompts, a script can pipe a stream of commands
+into the tracker, one per line, and read the results from stdout:
+
+    age 30
+    add visited France 14-07-2019
+    add wishlist United Kingdom 01-06-2031
+    delete visited France
+    delete-before visited 01-01-2000
+    search fra
+    sort visited date
+    display
+    stats 30
+    geography France
+    import trips.csv
+    export backup.jsonl
+    archive history.tta
+    archive-info history.tta
+    archive-search history.tta fra
+    archive-sort history.tta visited date
+
+Country names may contain spaces; the category is always the first
+word and the date the last; an archive path is a single word. Blank
+lines and lines starting with '#' are skipped. Each command runs
+straight against the TravelStore with the same rules as the menu,
+"today" is read once for the whole run, and the journal is committed
+in groups, so tens of thousands of commands per second can be run.
+
+A failing command is reported on stderr with its line number and the
+run carries on with the next one.
+"""
+
+import json
+import sys
+
+from date_parser import DateRules
+from profiling import count_records, instrument
+
+USAGE = {
+    "age": "age AGE",
+    "add": "add CATEGORY COUNTRY DATE",
+    "delete": "delete CATEGORY COUNTRY",
+    "delete-before": "delete-before CATEGORY DATE",
+    "search": "search TEXT",
+    "sort": "sort CATEGORY [az|za|date|date-desc]",
+    "display": "display",
+    "stats": "stats [DAYS]",
+    "geography": "geography [COUNTRY]",
+    "import": "import PATH",
+    "export": "export PATH",
+    "archive": "archive PATH",
+    "archive-info": "archive-info PATH",
+    "archive-search": "archive-search PATH TEXT",
+    "archive-sort": "archive-sort PATH CATEGORY [az|za|date|date-desc]",
+}
+
+
+class CommandRunner:
+    """
+    Runs batch commands against a store.
+
+    Parameters:
+        store (TravelStore): The records to work on.
+        out: Where results are written. Defaults to stdout.
+        err: Where failed commands are reported. Defaults to stderr.
+        age (int): The user's age for the birth year check, until an
+            'age' command sets it.
+    """
+
+    def __init__(self, store, out=None, err=None, age=None):
+        self.store = store
+        self.out = out or sys.stdout
+        self.err = err or sys.stderr
+        self.age = age
+        self.rules = DateRules(age)
+        self.commands = {
+            "age": self.do_age,
+            "add": self.do_add,
+            "delete": self.do_delete,
+            "delete-before": self.do_delete_before,
+            "search": self.do_search,
+            "sort": self.do_sort,
+            "display": self.do_display,
+            "stats": self.do_stats,
+            "geography": self.do_geography,
+            "import": self.do_import,
+            "export": self.do_export,
+            "archive": self.do_archive,
+            "archive-info": self.do_archive_info,
+            "archive-search": self.do_archive_search,
+            "archive-sort": self.do_archive_sort,
+        }
+
+    def run(self, lines):
+        """
+        Runs every command in an iterable of lines.
+
+        Returns:
+            tuple: (commands run, commands failed)
+        """
+        done = failed = 0
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                self.execute(line)
+            except ValueError as error:
+                failed += 1
+                self.err.write(f"line {number}: {error}\n")
+            done += 1
+        self.store.commit()
+        return done, failed
+
+    def execute(self, line):
+        """
+        Runs one command line.
+
+        Raises:
+            ValueError: If the command is unknown or fails.
+        """
+        name, _, rest = line.partition(" ")
+        command = self.commands.get(name.lower())
+        if command is None:
+            raise ValueError(f"unknown command '{name}'")
+        command(rest.split())
+
+    def _expect(self, name, words, minimum, maximum=None):
+        """
+        Checks a command got a usable number of words.
+        """
+        if len(words) < minimum or (maximum is not None and
+                                    len(words) > maximum):
+            raise ValueError(f"usage: {USAGE[name]}")
+
+    def write(self, text):
+        """
+        Writes one line of output.
+        """
+        self.out.write(text + "\n")
+
+    @instrument("batch age")
+    def do_age(self, words):
+        """
+        age AGE: sets the age used for the birth year check.
+        """
+        self._expect("age", words, 1, 1)
+        age = words[0]
+        if not age.isdigit() or not 1 <= int(age) <= 120:
+            raise ValueError("the age must be a number between 1 and 120")
+        self.age = int(age)
+        self.rules = DateRules(self.age, self.rules.today)
+        self.write(f"age {self.age}")
+
+    @instrument("batch add")
+    def do_add(self, words):
+        """
+        add CATEGORY COUNTRY DATE: adds a trip.
+        """
+        self._expect("add", words, 3)
+        category, country, date = (words[0].lower(), " ".join(words[1:-1]),
+                                   words[-1])
+        _, reason = self.rules.check(category, date)
+        if reason:
+            raise ValueError(f"{reason}: {date}")
+        record = self.store.add(category, country, date)
+        count_records(1)
+        if record is None:
+            self.write(f"duplicate\t{category}\t"
+                       f"{self.store.resolver.resolve(country)}\t{date}")
+            return
+        self.write(f"added\t{category}\t{record.country}\t{record.date}")
+
+    @instrument("batch delete")
+    def do_delete(self, words):
+        """
+        delete CATEGORY COUNTRY: deletes one trip to a country.
+        """
+        self._expect("delete", words, 2)
+        category, country = words[0].lower(), " ".join(words[1:])
+        record = self.store.delete(category, country)
+        if record is None:
+            raise ValueError(f"{country} is not in {category}")
+        count_records(1)
+        self.write(f"deleted\t{category}\t{record.country}\t{record.date}")
+
+    @instrument("batch delete-before")
+    def do_delete_before(self, words):
+        """
+        delete-before CATEGORY DATE: deletes every trip before a date.
+        """
+        self._expect("delete-before", words, 2, 2)
+        removed = self.store.delete_before(words[0].lower(), words[1])
+        count_records(len(removed))
+        self.write(f"deleted\t{len(removed)}")
+
+    @instrument("batch search")
+    def do_search(self, words):
+        """
+        search TEXT: lists the trips whose country contains the text.
+        """
+        self._expect("search", words, 1)
+        matches = self.store.search(" ".join(words))
+        count_records(len(matches))
+        for category, country, date in matches:
+            self.write(f"{category}\t{country}\t{date}")
+
+    @instrument("batch sort")
+    def do_sort(self, words):
+        """
+        sort CATEGORY [ORDER]: lists a category in a sort order.
+        """
+        self._expect("sort", words, 1, 2)
+        category = words[0].lower()
+        order = words[1].lower() if len(words) > 1 else "az"
+        self.out.writelines(
+            f"{country}\t{date}\n" for country, date in
+            self.store.sorted_records(category, order))
+        count_records(len(self.store.data[category]))
+
+    @instrument("batch display")
+    def do_display(self, words):
+        """
+        display: lists every record.
+        """
+        self._expect("display", words, 0, 0)
+        self.out.writelines(line + "\n"
+                            for line in self.store.display_lines())
+        count_records(len(self.store))
+
+    @instrument("batch stats")
+    def do_stats(self, words):
+        """
+        stats [DAYS]: writes the travel statistics as one JSON line.
+        """
+        self._expect("stats", words, 0, 1)
+        days = words[0] if words else "30"
+        if not days.isdigit():
+            raise ValueError("usage: " + USAGE["stats"])
+        self.write(json.dumps(self.store.statistics(days=int(days))))
+
+    @instrument("batch geography")
+    def do_geography(self, words):
+        """
+        geography [COUNTRY]: writes the distance travelled, the coverage
+        of each continent and the nearest wishlist countries not yet
+        visited, from COUNTRY or the latest visit, as one JSON line.
+        """
+        origin = " ".join(words) or None
+        self.write(json.dumps({
+            "distance_km": round(self.store.distance_travelled(), 1),
+            "continents": self.store.region_coverage()["continents"],
+            "nearest_wishlist": self.store.nearest_wishlist(origin),
+        }))
+
+    @instrument("batch import")
+    def do_import(self, words):
+        """
+        import PATH: imports a CSV or JSON Lines file.
+        """
+        self._expect("import", words, 1)
+        from bulk_io import import_records
+        path = " ".join(words)
+        try:
+            imported, rejected, merged = import_records(
+                path, self.store.add_record, self.store.countries,
+                age=self.age)
+        except OSError as error:
+            raise ValueError(f"cannot import {path}: {error}") from None
+        count_records(imported + rejected + merged)
+        self.write(f"imported\t{imported}\trejected\t{rejected}\t"
+                   f"merged\t{merged}")
+
+    @instrument("batch export")
+    def do_export(self, words):
+        """
+        export PATH: exports every record to a CSV or JSON Lines file.
+        """
+        self._expect("export", words, 1)
+        from bulk_io import export_records
+        path = " ".join(words)
+        try:
+            written = export_records(path, self.store.data)
+        except OSError as error:
+            raise ValueError(f"cannot export {path}: {error}") from None
+        count_records(written)
+        self.write(f"exported\t{written}")
+
+    @instrument("batch archive")
+    def do_archive(self, words):
+        """
+        archive PATH: writes every record to a read-only archive.
+        """
+        self._expect("archive", words, 1)
+        path = " ".join(words)
+        try:
+            written = self.store.write_archive(path)
+        except OSError as error:
+            raise ValueError(f"cannot archive to {path}: {error}") from None
+        count_records(written)
+        self.write(f"archived\t{written}")
+
+    @staticmethod
+    def _open_archive(path):
+        """
+        Opens an archive for reading.
+
+        Raises:
+            ValueError: If it cannot be opened or is not an archive.
+        """
+        from archive import TravelArchive
+        try:
+            return TravelArchive(path)
+        except OSError as error:
+            raise ValueError(f"cannot open {path}: {error}") from None
+
+    @instrument("batch archive-info")
+    def do_archive_info(self, words):
+        """
+        archive-info PATH: writes what an archive holds as one JSON line.
+        """
+        self._expect("archive-info", words, 1, 1)
+        with self._open_archive(words[0]) as archive:
+            self.write(json.dumps(archive.info()))
+
+    @instrument("batch archive-search")
+    def do_archive_search(self, words):
+        """
+        archive-search PATH TEXT: lists the archived trips whose country
+        contains the text.
+        """
+        self._expect("archive-search", words, 2)
+        with self._open_archive(words[0]) as archive:
+            matches = 0
+            for category, country, date in archive.search(
+                    " ".join(words[1:])):
+                self.write(f"{category}\t{country}\t{date}")
+                matches += 1
+        count_records(matches)
+
+    @instrument("batch archive-sort")
+    def do_archive_sort(self, words):
+        """
+        archive-sort PATH CATEGORY [ORDER]: lists an archived category in
+        a sort order.
+        """
+        self._expect("archive-sort", words, 2, 3)
+        category = words[1].lower()
+        order = words[2].lower() if len(words) > 2 else "az"
+        with self._open_archive(words[0]) as archive:
+            self.out.writelines(
+                f"{country}\t{date}\n" for country, date in
+                archive.sorted_records(category, order))
+            count_records(archive.count(category))
@@ -0,0 +1,328 @@
+"""
+Country name resolution for the Travel Tracker.
+
+Builds a lookup table once, up front, so that checking a country
+is a dictionary hit instead of a scan of the whole country list.
+Input is normalised before the lookup (case, accents, punctuation,
+"St." for "Saint", word order around commas), and ISO alpha-2/alpha-3
+codes plus common alternative names are accepted as well.
+
+Names that do not resolve get ranked "did you mean" suggestions from
+a trigram index over every known spelling.
+"""
+
+import unicodedata
+from collections import Counter
+
+# The countries a record can be added for, in alphabetical order
+VALID_COUNTRIES = [
+    "Afghanistan", "Albania", "Algeria", "Andorra", "Angola",
+    "Antigua and Barbuda", "Argentina", "Armenia", "Australia", "Austria",
+    "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados",
+    "Belarus", "Belgium", "Belize", "Benin", "Bhutan",
+    "Bolivia", "Bosnia and Herzegovina", "Botswana", "Brazil",
+    "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cabo Verde",
+    "Cambodia", "Cameroon", "Canada", "Central African Republic",
+    "Chad", "Chile", "China", "Colombia", "Comoros", "Congo",
+    "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic",
+    "Democratic Republic of the Congo", "Denmark", "Djibouti",
+    "Dominica", "Dominican Republic", "Ecuador", "Egypt", "El Salvador",
+    "Equatorial Guinea", "Eritrea", "Estonia", "Eswatini", "Ethiopia",
+    "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia",
+    "Germany", "Ghana", "Greece", "Grenada", "Guatemala", "Guinea",
+    "Guinea-Bissau", "Guyana", "Haiti", "Honduras", "Hungary",
+    "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland",
+    "Israel", "Italy", "Jamaica", "Japan", "Jordan", "Kazakhstan",
+    "Kenya", "Kiribati", "Korea, North", "Korea, South", "Kuwait",
+    "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Lesotho", "Liberia",
+    "Libya", "Liechtenstein", "Lithuania", "Luxembourg", "Madagascar",
+    "Malawi", "Malaysia", "Maldives", "Mali", "Malta", "Marshall Islands",
+    "Mauritania", "Mauritius", "Mexico", "Micronesia", "Moldova",
+    "Monaco", "Mongolia", "Montenegro", "Morocco", "Mozambique",
+    "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands", "New Zealand",
+    "Nicaragua", "Niger", "Nigeria", "North Macedonia", "Norway", "Oman",
+    "Pakistan", "Palau", "Panama", "Papua New Guinea", "Paraguay", "Peru",
+    "Philippines", "Poland", "Portugal", "Qatar", "Romania", "Russia",
+    "Rwanda", "Saint Kitts and Nevis", "Saint Lucia",
+    "Saint Vincent and the Grenadines", "Samoa", "San Marino",
+    "Sao Tome and Principe", "Saudi Arabia", "Senegal",
+    "Serbia", "Seychelles", "Sierra Leone", "Singapore",
+    "Slovakia", "Slovenia", "Solomon Islands", "Somalia", "South Africa",
+    "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname",
+    "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania",
+    "Thailand", "Timor-Leste", "Togo", "Tonga", "Trinidad and Tobago",
+    "Tunisia", "Turkey", "Turkmenistan", "Tuvalu", "Uganda",
+    "Ukraine", "United Arab Emirates", "United Kingdom",
+    "United States", "Uruguay", "Uzbekistan", "Vanuatu", "Vatican City",
+    "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
+]
+
+# ISO 3166-1 alpha-2 and alpha-3 codes for each country name
+ISO_CODES = {
+    "Afghanistan": ("AF", "AFG"), "Albania": ("AL", "ALB"),
+    "Algeria": ("DZ", "DZA"), "Andorra": ("AD", "AND"),
+    "Angola": ("AO", "AGO"), "Antigua and Barbuda": ("AG", "ATG"),
+    "Argentina": ("AR", "ARG"), "Armenia": ("AM", "ARM"),
+    "Australia": ("AU", "AUS"), "Austria": ("AT", "AUT"),
+    "Azerbaijan": ("AZ", "AZE"), "Bahamas": ("BS", "BHS"),
+    "Bahrain": ("BH", "BHR"), "Bangladesh": ("BD", "BGD"),
+    "Barbados": ("BB", "BRB"), "Belarus": ("BY", "BLR"),
+    "Belgium": ("BE", "BEL"), "Belize": ("BZ", "BLZ"),
+    "Benin": ("BJ", "BEN"), "Bhutan": ("BT", "BTN"),
+    "Bolivia": ("BO", "BOL"), "Bosnia and Herzegovina": ("BA", "BIH"),
+    "Botswana": ("BW", "BWA"), "Brazil": ("BR", "BRA"),
+    "Brunei": ("BN", "BRN"), "Bulgaria": ("BG", "BGR"),
+    "Burkina Faso": ("BF", "BFA"), "Burundi": ("BI", "BDI"),
+    "Cabo Verde": ("CV", "CPV"), "Cambodia": ("KH", "KHM"),
+    "Cameroon": ("CM", "CMR"), "Canada": ("CA", "CAN"),
+    "Central African Republic": ("CF", "CAF"), "Chad": ("TD", "TCD"),
+    "Chile": ("CL", "CHL"), "China": ("CN", "CHN"),
+    "Colombia": ("CO", "COL"), "Comoros": ("KM", "COM"),
+    "Congo": ("CG", "COG"), "Costa Rica": ("CR", "CRI"),
+    "Croatia": ("HR", "HRV"), "Cuba": ("CU", "CUB"),
+    "Cyprus": ("CY", "CYP"), "Czech Republic": ("CZ", "CZE"),
+    "Democratic Republic of the Congo": ("CD", "COD"),
+    "Denmark": ("DK", "DNK"), "Djibouti": ("DJ", "DJI"),
+    "Dominica": ("DM", "DMA"), "Dominican Republic": ("DO", "DOM"),
+    "Ecuador": ("EC", "ECU"), "Egypt": ("EG", "EGY"),
+    "El Salvador": ("SV", "SLV"), "Equatorial Guinea": ("GQ", "GNQ"),
+    "Eritrea": ("ER", "ERI"), "Estonia": ("EE", "EST"),
+    "Eswatini": ("SZ", "SWZ"), "Ethiopia": ("ET", "ETH"),
+    "Fiji": ("FJ", "FJI"), "Finland": ("FI", "FIN"),
+    "France": ("FR", "FRA"), "Gabon": ("GA", "GAB"),
+    "Gambia": ("GM", "GMB"), "Georgia": ("GE", "GEO"),
+    "Germany": ("DE", "DEU"), "Ghana": ("GH", "GHA"),
+    "Greece": ("GR", "GRC"), "Grenada": ("GD", "GRD"),
+    "Guatemala": ("GT", "GTM"), "Guinea": ("GN", "GIN"),
+    "Guinea-Bissau": ("GW", "GNB"), "Guyana": ("GY", "GUY"),
+    "Haiti": ("HT", "HTI"), "Honduras": ("HN", "HND"),
+    "Hungary": ("HU", "HUN"), "Iceland": ("IS", "ISL"),
+    "India": ("IN", "IND"), "Indonesia": ("ID", "IDN"),
+    "Iran": ("IR", "IRN"), "Iraq": ("IQ", "IRQ"),
+    "Ireland": ("IE", "IRL"), "Israel": ("IL", "ISR"),
+    "Italy": ("IT", "ITA"), "Jamaica": ("JM", "JAM"),
+    "Japan": ("JP", "JPN"), "Jordan": ("JO", "JOR"),
+    "Kazakhstan": ("KZ", "KAZ"), "Kenya": ("KE", "KEN"),
+    "Kiribati": ("KI", "KIR"), "Korea, North": ("KP", "PRK"),
+    "Korea, South": ("KR", "KOR"), "Kuwait": ("KW", "KWT"),
+    "Kyrgyzstan": ("KG", "KGZ"), "Laos": ("LA", "LAO"),
+    "Latvia": ("LV", "LVA"), "Lebanon": ("LB", "LBN"),
+    "Lesotho": ("LS", "LSO"), "Liberia": ("LR", "LBR"),
+    "Libya": ("LY", "LBY"), "Liechtenstein": ("LI", "LIE"),
+    "Lithuania": ("LT", "LTU"), "Luxembourg": ("LU", "LUX"),
+    "Madagascar": ("MG", "MDG"), "Malawi": ("MW", "MWI"),
+    "Malaysia": ("MY", "MYS"), "Maldives": ("MV", "MDV"),
+    "Mali": ("ML", "MLI"), "Malta": ("MT", "MLT"),
+    "Marshall Islands": ("MH", "MHL"), "Mauritania": ("MR", "MRT"),
+    "Mauritius": ("MU", "MUS"), "Mexico": ("MX", "MEX"),
+    "Micronesia": ("FM", "FSM"), "Moldova": ("MD", "MDA"),
+    "Monaco": ("MC", "MCO"), "Mongolia": ("MN", "MNG"),
+    "Montenegro": ("ME", "MNE"), "Morocco": ("MA", "MAR"),
+    "Mozambique": ("MZ", "MOZ"), "Myanmar": ("MM", "MMR"),
+    "Namibia": ("NA", "NAM"), "Nauru": ("NR", "NRU"),
+    "Nepal": ("NP", "NPL"), "Netherlands": ("NL", "NLD"),
+    "New Zealand": ("NZ", "NZL"), "Nicaragua": ("NI", "NIC"),
+    "Niger": ("NE", "NER"), "Nigeria": ("NG", "NGA"),
+    "North Macedonia": ("MK", "MKD"), "Norway": ("NO", "NOR"),
+    "Oman": ("OM", "OMN"), "Pakistan": ("PK", "PAK"),
+    "Palau": ("PW", "PLW"), "Panama": ("PA", "PAN"),
+    "Papua New Guinea": ("PG", "PNG"), "Paraguay": ("PY", "PRY"),
+    "Peru": ("PE", "PER"), "Philippines": ("PH", "PHL"),
+    "Poland": ("PL", "POL"), "Portugal": ("PT", "PRT"),
+    "Qatar": ("QA", "QAT"), "Romania": ("RO", "ROU"),
+    "Russia": ("RU", "RUS"), "Rwanda": ("RW", "RWA"),
+    "Saint Kitts and Nevis": ("KN", "KNA"), "Saint Lucia": ("LC", "LCA"),
+    "Saint Vincent and the Grenadines": ("VC", "VCT"),
+    "Samoa": ("WS", "WSM"), "San Marino": ("SM", "SMR"),
+    "Sao Tome and Principe": ("ST", "STP"), "Saudi Arabia": ("SA", "SAU"),
+    "Senegal": ("SN", "SEN"), "Serbia": ("RS", "SRB"),
+    "Seychelles": ("SC", "SYC"), "Sierra Leone": ("SL", "SLE"),
+    "Singapore": ("SG", "SGP"), "Slovakia": ("SK", "SVK"),
+    "Slovenia": ("SI", "SVN"), "Solomon Islands": ("SB", "SLB"),
+    "Somalia": ("SO", "SOM"), "South Africa": ("ZA", "ZAF"),
+    "South Sudan": ("SS", "SSD"), "Spain": ("ES", "ESP"),
+    "Sri Lanka": ("LK", "LKA"), "Sudan": ("SD", "SDN"),
+    "Suriname": ("SR", "SUR"), "Sweden": ("SE", "SWE"),
+    "Switzerland": ("CH", "CHE"), "Syria": ("SY", "SYR"),
+    "Taiwan": ("TW", "TWN"), "Tajikistan": ("TJ", "TJK"),
+    "Tanzania": ("TZ", "TZA"), "Thailand": ("TH", "THA"),
+    "Timor-Leste": ("TL", "TLS"), "Togo": ("TG", "TGO"),
+    "Tonga": ("TO", "TON"), "Trinidad and Tobago": ("TT", "TTO"),
+    "Tunisia": ("TN", "TUN"), "Turkey": ("TR", "TUR"),
+    "Turkmenistan": ("TM", "TKM"), "Tuvalu": ("TV", "TUV"),
+    "Uganda": ("UG", "UGA"), "Ukraine": ("UA", "UKR"),
+    "United Arab Emirates": ("AE", "ARE"),
+    "United Kingdom": ("GB", "GBR"), "United States": ("US", "USA"),
+    "Uruguay": ("UY", "URY"), "Uzbekistan": ("UZ", "UZB"),
+    "Vanuatu": ("VU", "VUT"), "Vatican City": ("VA", "VAT"),
+    "Venezuela": ("VE", "VEN"), "Vietnam": ("VN", "VNM"),
+    "Yemen": ("YE", "YEM"), "Zambia": ("ZM", "ZMB"),
+    "Zimbabwe": ("ZW", "ZWE"),
+}
+
+# Other names people commonly use for a country
+COUNTRY_ALIASES = {
+    "South Korea": "Korea, South", "Republic of Korea": "Korea, South",
+    "North Korea": "Korea, North", "DPRK": "Korea, North",
+    "USA": "United States", "US": "United States", "America": "United States",
+    "United States of America": "United States",
+    "UK": "United Kingdom", "Great Britain": "United Kingdom",
+    "Britain": "United Kingdom", "Czechia": "Czech Republic",
+    "Cape Verde": "Cabo Verde", "Swaziland": "Eswatini",
+    "Burma": "Myanmar", "East Timor": "Timor-Leste",
+    "Holland": "Netherlands", "The Netherlands": "Netherlands",
+    "Macedonia": "North Macedonia", "Turkiye": "Turkey",
+    "Viet Nam": "Vietnam", "Lao PDR": "Laos",
+    "Russian Federation": "Russia", "Holy See": "Vatican City",
+    "Vatican": "Vatican City", "UAE": "United Arab Emirates",
+    "Emirates": "United Arab Emirates",
+    "DRC": "Democratic Republic of the Congo",
+    "DR Congo": "Democratic Republic of the Congo",
+    "Congo-Kinshasa": "Democratic Republic of the Congo",
+    "Republic of the Congo": "Congo", "Congo-Brazzaville": "Congo",
+    "The Gambia": "Gambia", "The Bahamas": "Bahamas",
+    "Bosnia": "Bosnia and Herzegovina",
+    "Federated States of Micronesia": "Micronesia",
+    "Brunei Darussalam": "Brunei", "Persia": "Iran",
+    "Kyrgyz Republic": "Kyrgyzstan", "Slovak Republic": "Slovakia",
+    "Sao Tome": "Sao Tome and Principe", "PNG": "Papua New Guinea",
+    "NZ": "New Zealand", "Trinidad": "Trinidad and Tobago",
+    "Antigua": "Antigua and Barbuda", "St Kitts": "Saint Kitts and Nevis",
+    "Saint Vincent": "Saint Vincent and the Grenadines",
+}
+
+# Punctuation becomes a space (str.translate keeps `re` out of the import)
+_PUNCTUATION = str.maketrans(
+    {character: " " for character in "!\"#$%'()*+,-./:;<=>?@[\\]^_`{|}~"})
+_ABBREVIATIONS = {"st": "saint"}
+
+
+def normalize_country(text):
+    """
+    Reduces a country name to the key used for lookups.
+
+    Accents, case and punctuation are dropped, "St" becomes "saint"
+    and "Korea, South" style names are put in natural word order.
+
+    Parameters:
+        text (str): The name as typed.
+
+    Returns:
+        str: The normalised lookup key.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = text.encode("ascii", "ignore").decode("ascii").casefold()
+    if "," in text:
+        # "Korea, South" -> "South Korea"
+        head, _, tail = text.partition(",")
+        text = f"{tail} {head}"
+    words = text.replace("&", " and ").translate(_PUNCTUATION).split()
+    return " ".join(_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def _trigrams(key):
+    """
+    Returns the set of trigrams of a padded lookup key.
+    """
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CountryResolver:
+    """
+    Precomputed lookup from anything a user might type to a country name.
+
+    Parameters:
+        countries (list): The canonical country names.
+        codes (dict): Country name mapped to its ISO codes.
+        aliases (dict): Alternative name mapped to a canonical name.
+    """
+
+    seen_limit = 10000
+
+    def __init__(self, countries, codes=None, aliases=None):
+        codes = ISO_CODES if codes is None else codes
+        aliases = COUNTRY_ALIASES if aliases is None else aliases
+        self.countries = list(countries)
+        known = set(self.countries)
+
+        # Exact spellings skip normalisation entirely
+        self._exact = {name: name for name in self.countries}
+        self._seen = {}
+        self._by_key = {}
+        for name in self.countries:
+            self._by_key[normalize_country(name)] = name
+            # "Korea South" as well as "South Korea"
+            self._by_key.setdefault(normalize_country(name.replace(",", "")),
+                                    name)
+        # Codes and acronyms ("FR", "USA") only match in upper case, so
+        # everyday words such as "no", "in" or "us" are not countries
+        for alias, name in aliases.items():
+            if name in known:
+                self._exact[alias] = name
+                if not alias.isupper():
+                    self._by_key.setdefault(normalize_country(alias), name)
+        for name, iso_codes in codes.items():
+            if name in known:
+                for code in iso_codes:
+                    self._exact[code] = name
+
+        # Trigram index over names and aliases, not over short keys
+        self._keys = [key for key in self._by_key if len(key) > 3]
+        self._key_grams = [_trigrams(key) for key in self._keys]
+        self._gram_index = {}
+        for position, grams in enumerate(self._key_grams):
+            for gram in grams:
+                self._gram_index.setdefault(gram, []).append(position)
+
+    def resolve(self, text):
+        """
+        Looks up the canonical country name for the given text.
+
+        Parameters:
+            text (str): A country name, alias or ISO code.
+
+        Returns:
+            str or None: The canonical name, or None if nothing matched.
+        """
+        name = self._exact.get(text)
+        if name is None:
+            name = self._seen.get(text)
+        if name is None:
+            name = self._by_key.get(normalize_country(text))
+            # Bulk loads repeat the same spellings; remember them
+            if name is not None and len(self._seen) < self.seen_limit:
+                self._seen[text] = name
+        return name
+
+    def __contains__(self, text):
+        return self.resolve(text) is not None
+
+    def suggest(self, text, limit=3, cutoff=0.3):
+        """
+        Ranks the countries that look most like the given text.
+
+        Parameters:
+            text (str): The unmatched input.
+            limit (int): The maximum number of suggestions.
+            cutoff (float): The minimum similarity (0 to 1) to include.
+
+        Returns:
+            list: Canonical country names, best match first.
+        """
+        grams = _trigrams(normalize_country(text))
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._gram_index.get(gram, ()))
+
+        # Dice coefficient; keep the best score per canonical name
+        scores = {}
+        for position, count in shared.items():
+            score = 2 * count / (len(grams) + len(self._key_grams[position]))
+            name = self._by_key[self._keys[position]]
+            if score >= cutoff and score > scores.get(name, 0):
+                scores[name] = score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [name for name, _ in ranked[:limit]]
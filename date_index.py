@@ -0,0 +1,186 @@
+"""
+Chronological index of the travel records.
+
+Each category keeps its records as (date ordinal, country ID) keys in
+date order. New records are slotted in with a binary search, so a
+sorted view is read straight off the index instead of re-sorting the
+list, and date range queries cost O(log n + k) for k results.
+
+Dates are stored as ordinals (days since 1 January of year 1), which
+also fixes the old "dd-mm-yyyy" string order that sorted by day of
+the month rather than by date.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import date
+
+from date_parser import date_to_ordinal, ordinal_to_date
+
+COUNTRY_BITS = 16
+COUNTRY_MASK = (1 << COUNTRY_BITS) - 1
+
+
+def pack_key(ordinal, country_id=0):
+    """
+    Packs a day ordinal and a country ID into one integer key that
+    sorts by date first. With the default country ID of 0 the key is
+    the lowest one of that day, for range bounds.
+    """
+    return ordinal << COUNTRY_BITS | country_id
+
+
+def unpack_key(key):
+    """
+    Returns the (ordinal, country ID) packed into a key.
+    """
+    return key >> COUNTRY_BITS, key & COUNTRY_MASK
+
+
+class DateIndex:
+    """
+    Per-category records kept in chronological order.
+
+    Each record is packed into one integer with pack_key(), so the
+    index is a typed array of int64 keys that sort by date first.
+
+    Parameters:
+        countries (list): The valid country names, indexed by country ID.
+    """
+
+    def __init__(self, countries):
+        self.countries = countries
+        self._entries = {}  # category -> array of packed keys, in order
+
+    @classmethod
+    def from_records(cls, travel_data, countries):
+        """
+        Builds an index holding every record of the given travel data.
+        """
+        index = cls(countries)
+        for category, records in travel_data.items():
+            index._entries[category] = array("q", sorted(
+                pack_key(ordinal, country_id)
+                for country_id, ordinal in zip(records.country_ids,
+                                               records.ordinals)))
+        return index
+
+    def _category(self, category):
+        return self._entries.setdefault(category, array("q"))
+
+    def add(self, category, record):
+        """
+        Slots a newly added record into date order.
+        """
+        insort(self._category(category),
+               pack_key(record.ordinal, record.country_id))
+
+    def discard(self, category, record):
+        """
+        Removes a deleted record from the index.
+        """
+        entries = self._category(category)
+        key = pack_key(record.ordinal, record.country_id)
+        position = bisect_left(entries, key)
+        if position < len(entries) and entries[position] == key:
+            del entries[position]
+
+    def discard_many(self, category, records):
+        """
+        Removes a batch of deleted records in a single pass.
+        """
+        doomed = Counter(pack_key(record.ordinal, record.country_id)
+                         for record in records)
+        kept = array("q")
+        for key in self._category(category):
+            if doomed[key] > 0:
+                doomed[key] -= 1
+            else:
+                kept.append(key)
+        self._entries[category] = kept
+
+    def keys(self, category):
+        """
+        Returns the packed keys of a category in date order, as the
+        index's own typed array; it must not be changed.
+        """
+        return self._category(category)
+
+    def _records(self, keys):
+        """
+        Turns packed keys into (country, date) pairs.
+        """
+        return [self._record(key) for key in keys]
+
+    def _record(self, key):
+        """
+        Turns one packed key into a (country, date) pair.
+        """
+        ordinal, country_id = unpack_key(key)
+        return self.countries[country_id], ordinal_to_date(ordinal)
+
+    def ascending(self, category):
+        """
+        Yields the (country, date) records of a category, oldest first.
+        """
+        for key in self._category(category):
+            yield self._record(key)
+
+    def descending(self, category):
+        """
+        Yields the (country, date) records of a category, newest first.
+        """
+        for key in reversed(self._category(category)):
+            yield self._record(key)
+
+    def between(self, category, start, end):
+        """
+        Finds the records dated from start to end, both included.
+
+        Parameters:
+            category (str): 'visited' or 'wishlist'.
+            start (str): The first date, as dd-mm-yyyy.
+            end (str): The last date, as dd-mm-yyyy.
+
+        Returns:
+            list: (country, date) pairs, oldest first.
+        """
+        return self._ordinal_range(category, date_to_ordinal(start),
+                                   date_to_ordinal(end))
+
+    def _ordinal_range(self, category, first, last):
+        """
+        Returns the records whose ordinal lies in [first, last].
+        """
+        entries = self._category(category)
+        low = bisect_left(entries, pack_key(first))
+        high = bisect_left(entries, pack_key(last + 1))
+        return self._records(entries[low:high])
+
+    def count_before(self, category, text):
+        """
+        Returns how many records of a category are dated before a date.
+        """
+        return bisect_left(self._category(category),
+                           pack_key(date_to_ordinal(text)))
+
+    def first(self, category, count):
+        """
+        Returns the earliest `count` records of a category, oldest first.
+        """
+        return self._records(self._category(category)[:count])
+
+    def last(self, category, count):
+        """
+        Returns the latest `count` records of a category, newest first.
+        """
+        entries = self._category(category)
+        return self._records(reversed(entries[max(len(entries) - count, 0):]))
+
+    def in_year(self, category, year):
+        """
+        Returns the records of a category dated in the given year.
+        """
+        return self._ordinal_range(category, date(year, 1, 1).toordinal(),
+                                   date(year, 12, 31).toordinal())
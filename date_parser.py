@@ -0,0 +1,231 @@
+"""
+Fast parsing and checking of "dd-mm-yyyy" travel dates.
+
+Dates always have the same fixed width, so they are parsed by slicing
+the string and building the date directly instead of going through a
+regular expression and datetime.strptime. Results are kept in bounded
+LRU caches: a history has only a few thousand distinct dates, so most
+lookups during an import or a display are cache hits.
+
+DateRules holds the add-country rules (the birth year limit, past
+dates for visits and future dates for the wishlist) with "today"
+captured once, so a whole batch is checked against the same day.
+Whole columns of dates can be checked in one call; when NumPy is
+installed, large columns are parsed and checked as datetime64 arrays.
+"""
+
+from datetime import date
+from functools import lru_cache
+
+DATE_FORMAT = "%d-%m-%Y"
+DATE_CACHE_SIZE = 65536
+
+# Columns shorter than this are checked in plain Python, where NumPy's
+# set-up cost would outweigh its speed
+NUMPY_MIN_ROWS = 2000
+
+# Ordinal of 1970-01-01, the datetime64 epoch
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Reasons returned by DateRules when a date breaks a rule
+INVALID_DATE = "invalid date"
+BEFORE_BIRTH = "date before birth year"
+VISIT_IN_FUTURE = "visited date in the future"
+WISH_IN_PAST = "wishlist date not in the future"
+
+_DIGIT_SLICES = (slice(0, 2), slice(3, 5), slice(6, 10))
+_numpy = None
+
+
+def is_date_format(text):
+    """
+    Returns True if the text is shaped like dd-mm-yyyy (two digits, a
+    dash, two digits, a dash, four digits), whether or not it is a real
+    date.
+    """
+    return (len(text) == 10 and text[2] == "-" and text[5] == "-" and
+            text.isascii() and
+            all(text[part].isdigit() for part in _DIGIT_SLICES))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def date_to_ordinal(text):
+    """
+    Converts a "dd-mm-yyyy" date string to a day ordinal.
+
+    Raises:
+        ValueError: If the text is not a real date in that format.
+    """
+    if not is_date_format(text):
+        raise ValueError(f"'{text}' is not a dd-mm-yyyy date")
+    return date(int(text[6:10]), int(text[3:5]), int(text[0:2])).toordinal()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def ordinal_to_date(ordinal):
+    """
+    Converts a day ordinal back to a "dd-mm-yyyy" date string.
+    """
+    day = date.fromordinal(ordinal)
+    return f"{day.day:02d}-{day.month:02d}-{day.year:04d}"
+
+
+def is_valid_date(text):
+    """
+    Returns True if the text is a real date written as dd-mm-yyyy.
+    """
+    try:
+        date_to_ordinal(text)
+    except ValueError:
+        return False
+    return True
+
+
+def birth_cutoff(age, today):
+    """
+    Returns the earliest date a visit can have for a user of this age.
+    """
+    try:
+        return date(today.year - age, today.month, today.day)
+    except ValueError:  # 29 February in a non-leap year
+        return date(today.year - age, today.month, 28)
+
+
+def load_numpy():
+    """
+    Imports NumPy on first use. Returns None when it is not installed.
+    Shared by every module with an optional NumPy path.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+class DateRules:
+    """
+    The date rules for adding trips, fixed to one day.
+
+    Parameters:
+        age (int): The user's age, for the birth year limit on visits.
+            No limit when omitted.
+        today (date): The day the rules are checked against. Defaults
+            to today, read once when the rules are made.
+    """
+
+    def __init__(self, age=None, today=None):
+        today = today or date.today()
+        self.today = today
+        self.today_ordinal = today.toordinal()
+        self.min_ordinal = (birth_cutoff(age, today).toordinal()
+                            if age else None)
+
+    def check_ordinal(self, category, ordinal):
+        """
+        Returns the rule a valid date breaks, or None if it passes.
+        """
+        if category == "visited":
+            if self.min_ordinal is not None and ordinal < self.min_ordinal:
+                return BEFORE_BIRTH
+            if ordinal > self.today_ordinal:
+                return VISIT_IN_FUTURE
+        elif category == "wishlist" and ordinal <= self.today_ordinal:
+            return WISH_IN_PAST
+        return None
+
+    def check(self, category, text):
+        """
+        Parses and checks one date.
+
+        Returns:
+            tuple: (ordinal, None) when the date passes, otherwise
+            (None or the ordinal, the reason it was rejected).
+        """
+        try:
+            ordinal = date_to_ordinal(text)
+        except (TypeError, ValueError):
+            return None, INVALID_DATE
+        return ordinal, self.check_ordinal(category, ordinal)
+
+    def check_column(self, categories, dates, use_numpy=None):
+        """
+        Parses and checks a whole column of dates at once.
+
+        Parameters:
+            categories (list): The category of each row.
+            dates (list): The date string of each row.
+            use_numpy (bool): Force the NumPy path on or off. By default
+                it is used for large columns when NumPy is installed.
+
+        Returns:
+            tuple: (ordinals, reasons) as lists in row order; a row
+            passed when its reason is None.
+        """
+        numpy = load_numpy() if use_numpy is not False else None
+        if use_numpy is None and len(dates) < NUMPY_MIN_ROWS:
+            numpy = None
+        if use_numpy and numpy is None:
+            raise ImportError("NumPy is not installed")
+        if numpy is not None and len(dates):
+            return self._check_column_numpy(numpy, categories, dates)
+
+        ordinals, reasons = [], []
+        for category, text in zip(categories, dates):
+            ordinal, reason = self.check(category, text)
+            ordinals.append(ordinal)
+            reasons.append(reason)
+        return ordinals, reasons
+
+    def _check_column_numpy(self, np, categories, dates):
+        """
+        check_column() on datetime64 arrays.
+
+        The strings are viewed as a grid of code points, so the
+        separators, digits and day/month/year fields of every row are
+        read with array operations.
+        """
+        texts = np.asarray(dates, dtype="U")  # None becomes "None"
+        lengths = np.char.str_len(texts)
+        texts = texts.astype("U10")
+        codes = texts.view(np.uint32).reshape(len(texts), 10)
+        digits = codes.astype(np.int64) - ord("0")
+        digit_columns = digits[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+
+        valid = ((lengths == 10) & (codes[:, 2] == ord("-")) &
+                 (codes[:, 5] == ord("-")) &
+                 ((digit_columns >= 0) & (digit_columns <= 9)).all(axis=1))
+        day = digits[:, 0] * 10 + digits[:, 1]
+        month = digits[:, 3] * 10 + digits[:, 4]
+        year = (digits[:, 6] * 1000 + digits[:, 7] * 100 +
+                digits[:, 8] * 10 + digits[:, 9])
+        valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+
+        # Let datetime64 work out the month lengths: a day past the end
+        # of its month rolls over into the next month
+        year = np.where(valid, year, 1970)
+        month = np.where(valid, month, 1)
+        day = np.where(valid, day, 1)
+        months = ((year - 1970).astype("datetime64[Y]")
+                  .astype("datetime64[M]") + (month - 1))
+        days = months.astype("datetime64[D]") + (day - 1)
+        valid &= days.astype("datetime64[M]") == months
+
+        ordinals = days.astype(np.int64) + EPOCH_ORDINAL
+        categories = np.asarray(categories, dtype=object)
+        visited = valid & (categories == "visited")
+        wishlist = valid & (categories == "wishlist")
+
+        reasons = np.full(len(texts), None, dtype=object)
+        reasons[~valid] = INVALID_DATE
+        reasons[wishlist & (ordinals <= self.today_ordinal)] = WISH_IN_PAST
+        reasons[visited & (ordinals > self.today_ordinal)] = VISIT_IN_FUTURE
+        if self.min_ordinal is not None:
+            reasons[visited & (ordinals < self.min_ordinal)] = BEFORE_BIRTH
+
+        ordinals = ordinals.astype(object)
+        ordinals[~valid] = None
+        return ordinals.tolist(), reasons.tolist()
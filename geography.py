@@ -0,0 +1,428 @@
+"""
+Country metadata and geographic queries for the Travel Tracker.
+
+Every valid country has its UN geoscheme region, its continent and the
+latitude and longitude of its centroid (of the main island, for
+countries spread over many islands). The table is keyed by ISO alpha-3
+code and lined up with the country list, so it is indexed by the same
+country IDs as the records. It is kept as compact typed arrays: a byte
+per region and a float32 per coordinate.
+
+On top of it the queries answer:
+
+    - how far the trips add up to, flying centroid to centroid in date
+      order
+    - how many countries of each continent and region have been visited
+    - which wishlist countries not yet visited are nearest to a country
+
+The great-circle distances between every pair of countries are worked
+out once, as one vectorised matrix when NumPy is installed, so a
+million-trip history is a single gather and sum over the date index.
+Without NumPy the same queries run in plain Python.
+"""
+
+import math
+from array import array
+
+from countries import ISO_CODES
+from date_index import COUNTRY_MASK, unpack_key
+from date_parser import load_numpy
+
+EARTH_RADIUS_KM = 6371.0088
+
+# UN geoscheme regions and the continent each belongs to
+REGIONS = {
+    "Northern Africa": "Africa", "Western Africa": "Africa",
+    "Middle Africa": "Africa", "Eastern Africa": "Africa",
+    "Southern Africa": "Africa",
+    "Caribbean": "North America", "Central America": "North America",
+    "Northern America": "North America", "South America": "South America",
+    "Central Asia": "Asia", "Eastern Asia": "Asia",
+    "South-eastern Asia": "Asia", "Southern Asia": "Asia",
+    "Western Asia": "Asia",
+    "Eastern Europe": "Europe", "Northern Europe": "Europe",
+    "Southern Europe": "Europe", "Western Europe": "Europe",
+    "Australia and New Zealand": "Oceania", "Melanesia": "Oceania",
+    "Micronesia": "Oceania", "Polynesia": "Oceania",
+}
+REGION_NAMES = tuple(REGIONS)
+CONTINENTS = tuple(dict.fromkeys(REGIONS.values()))
+
+# ISO alpha-3 code mapped to (region, centroid latitude, longitude)
+COUNTRY_METADATA = {
+    "AFG": ("Southern Asia", 33.9, 67.7),
+    "ALB": ("Southern Europe", 41.2, 20.2),
+    "DZA": ("Northern Africa", 28.0, 1.7),
+    "AND": ("Southern Europe", 42.5, 1.5),
+    "AGO": ("Middle Africa", -11.2, 17.9),
+    "ATG": ("Caribbean", 17.1, -61.8),
+    "ARG": ("South America", -38.4, -63.6),
+    "ARM": ("Western Asia", 40.1, 45.0),
+    "AUS": ("Australia and New Zealand", -25.3, 133.8),
+    "AUT": ("Western Europe", 47.5, 14.6),
+    "AZE": ("Western Asia", 40.1, 47.6),
+    "BHS": ("Caribbean", 25.0, -77.4),
+    "BHR": ("Western Asia", 26.0, 50.6),
+    "BGD": ("Southern Asia", 23.7, 90.4),
+    "BRB": ("Caribbean", 13.2, -59.5),
+    "BLR": ("Eastern Europe", 53.7, 28.0),
+    "BEL": ("Western Europe", 50.5, 4.5),
+    "BLZ": ("Central America", 17.2, -88.5),
+    "BEN": ("Western Africa", 9.3, 2.3),
+    "BTN": ("Southern Asia", 27.5, 90.4),
+    "BOL": ("South America", -16.3, -63.6),
+    "BIH": ("Southern Europe", 43.9, 17.7),
+    "BWA": ("Southern Africa", -22.3, 24.7),
+    "BRA": ("South America", -14.2, -51.9),
+    "BRN": ("South-eastern Asia", 4.5, 114.7),
+    "BGR": ("Eastern Europe", 42.7, 25.5),
+    "BFA": ("Western Africa", 12.2, -1.6),
+    "BDI": ("Eastern Africa", -3.4, 29.9),
+    "CPV": ("Western Africa", 16.0, -24.0),
+    "KHM": ("South-eastern Asia", 12.6, 105.0),
+    "CMR": ("Middle Africa", 7.4, 12.4),
+    "CAN": ("Northern America", 56.1, -106.3),
+    "CAF": ("Middle Africa", 6.6, 20.9),
+    "TCD": ("Middle Africa", 15.5, 18.7),
+    "CHL": ("South America", -35.7, -71.5),
+    "CHN": ("Eastern Asia", 35.9, 104.2),
+    "COL": ("South America", 4.6, -74.3),
+    "COM": ("Eastern Africa", -11.9, 43.9),
+    "COG": ("Middle Africa", -0.2, 15.8),
+    "CRI": ("Central America", 9.7, -83.8),
+    "HRV": ("Southern Europe", 45.1, 15.2),
+    "CUB": ("Caribbean", 21.5, -77.8),
+    "CYP": ("Western Asia", 35.1, 33.4),
+    "CZE": ("Eastern Europe", 49.8, 15.5),
+    "COD": ("Middle Africa", -4.0, 21.8),
+    "DNK": ("Northern Europe", 56.3, 9.5),
+    "DJI": ("Eastern Africa", 11.8, 42.6),
+    "DMA": ("Caribbean", 15.4, -61.4),
+    "DOM": ("Caribbean", 18.7, -70.2),
+    "ECU": ("South America", -1.8, -78.2),
+    "EGY": ("Northern Africa", 26.8, 30.8),
+    "SLV": ("Central America", 13.8, -88.9),
+    "GNQ": ("Middle Africa", 1.7, 10.3),
+    "ERI": ("Eastern Africa", 15.2, 39.8),
+    "EST": ("Northern Europe", 58.6, 25.0),
+    "SWZ": ("Southern Africa", -26.5, 31.5),
+    "ETH": ("Eastern Africa", 9.1, 40.5),
+    "FJI": ("Melanesia", -17.7, 178.1),
+    "FIN": ("Northern Europe", 61.9, 25.7),
+    "FRA": ("Western Europe", 46.2, 2.2),
+    "GAB": ("Middle Africa", -0.8, 11.6),
+    "GMB": ("Western Africa", 13.4, -15.3),
+    "GEO": ("Western Asia", 42.3, 43.4),
+    "DEU": ("Western Europe", 51.2, 10.5),
+    "GHA": ("Western Africa", 7.9, -1.0),
+    "GRC": ("Southern Europe", 39.1, 21.8),
+    "GRD": ("Caribbean", 12.1, -61.7),
+    "GTM": ("Central America", 15.8, -90.2),
+    "GIN": ("Western Africa", 9.9, -9.7),
+    "GNB": ("Western Africa", 11.8, -15.2),
+    "GUY": ("South America", 4.9, -58.9),
+    "HTI": ("Caribbean", 19.0, -72.3),
+    "HND": ("Central America", 15.2, -86.2),
+    "HUN": ("Eastern Europe", 47.2, 19.5),
+    "ISL": ("Northern Europe", 64.9, -19.0),
+    "IND": ("Southern Asia", 20.6, 79.0),
+    "IDN": ("South-eastern Asia", -0.8, 113.9),
+    "IRN": ("Southern Asia", 32.4, 53.7),
+    "IRQ": ("Western Asia", 33.2, 43.7),
+    "IRL": ("Northern Europe", 53.4, -8.2),
+    "ISR": ("Western Asia", 31.0, 34.9),
+    "ITA": ("Southern Europe", 41.9, 12.6),
+    "JAM": ("Caribbean", 18.1, -77.3),
+    "JPN": ("Eastern Asia", 36.2, 138.3),
+    "JOR": ("Western Asia", 30.6, 36.2),
+    "KAZ": ("Central Asia", 48.0, 66.9),
+    "KEN": ("Eastern Africa", 0.0, 37.9),
+    "KIR": ("Micronesia", 1.4, 173.0),
+    "PRK": ("Eastern Asia", 40.3, 127.5),
+    "KOR": ("Eastern Asia", 35.9, 127.8),
+    "KWT": ("Western Asia", 29.3, 47.5),
+    "KGZ": ("Central Asia", 41.2, 74.8),
+    "LAO": ("South-eastern Asia", 19.9, 102.5),
+    "LVA": ("Northern Europe", 56.9, 24.6),
+    "LBN": ("Western Asia", 33.9, 35.9),
+    "LSO": ("Southern Africa", -29.6, 28.2),
+    "LBR": ("Western Africa", 6.4, -9.4),
+    "LBY": ("Northern Africa", 26.3, 17.2),
+    "LIE": ("Western Europe", 47.2, 9.6),
+    "LTU": ("Northern Europe", 55.2, 23.9),
+    "LUX": ("Western Europe", 49.8, 6.1),
+    "MDG": ("Eastern Africa", -18.8, 46.9),
+    "MWI": ("Eastern Africa", -13.3, 34.3),
+    "MYS": ("South-eastern Asia", 4.2, 102.0),
+    "MDV": ("Southern Asia", 3.2, 73.2),
+    "MLI": ("Western Africa", 17.6, -4.0),
+    "MLT": ("Southern Europe", 35.9, 14.4),
+    "MHL": ("Micronesia", 7.1, 171.2),
+    "MRT": ("Western Africa", 21.0, -10.9),
+    "MUS": ("Eastern Africa", -20.3, 57.6),
+    "MEX": ("Central America", 23.6, -102.6),
+    "FSM": ("Micronesia", 6.9, 158.2),
+    "MDA": ("Eastern Europe", 47.4, 28.4),
+    "MCO": ("Western Europe", 43.7, 7.4),
+    "MNG": ("Eastern Asia", 46.9, 103.8),
+    "MNE": ("Southern Europe", 42.7, 19.4),
+    "MAR": ("Northern Africa", 31.8, -7.1),
+    "MOZ": ("Eastern Africa", -18.7, 35.5),
+    "MMR": ("South-eastern Asia", 21.9, 96.0),
+    "NAM": ("Southern Africa", -22.9, 18.5),
+    "NRU": ("Micronesia", -0.5, 166.9),
+    "NPL": ("Southern Asia", 28.4, 84.1),
+    "NLD": ("Western Europe", 52.1, 5.3),
+    "NZL": ("Australia and New Zealand", -40.9, 174.9),
+    "NIC": ("Central America", 12.9, -85.2),
+    "NER": ("Western Africa", 17.6, 8.1),
+    "NGA": ("Western Africa", 9.1, 8.7),
+    "MKD": ("Southern Europe", 41.6, 21.7),
+    "NOR": ("Northern Europe", 60.5, 8.5),
+    "OMN": ("Western Asia", 21.5, 55.9),
+    "PAK": ("Southern Asia", 30.4, 69.3),
+    "PLW": ("Micronesia", 7.5, 134.6),
+    "PAN": ("Central America", 8.5, -80.8),
+    "PNG": ("Melanesia", -6.3, 143.9),
+    "PRY": ("South America", -23.4, -58.4),
+    "PER": ("South America", -9.2, -75.0),
+    "PHL": ("South-eastern Asia", 12.9, 121.8),
+    "POL": ("Eastern Europe", 51.9, 19.1),
+    "PRT": ("Southern Europe", 39.4, -8.2),
+    "QAT": ("Western Asia", 25.4, 51.2),
+    "ROU": ("Eastern Europe", 45.9, 25.0),
+    "RUS": ("Eastern Europe", 61.5, 105.3),
+    "RWA": ("Eastern Africa", -1.9, 29.9),
+    "KNA": ("Caribbean", 17.4, -62.8),
+    "LCA": ("Caribbean", 13.9, -61.0),
+    "VCT": ("Caribbean", 13.3, -61.2),
+    "WSM": ("Polynesia", -13.8, -172.1),
+    "SMR": ("Southern Europe", 43.9, 12.5),
+    "STP": ("Middle Africa", 0.2, 6.6),
+    "SAU": ("Western Asia", 23.9, 45.1),
+    "SEN": ("Western Africa", 14.5, -14.5),
+    "SRB": ("Southern Europe", 44.0, 21.0),
+    "SYC": ("Eastern Africa", -4.7, 55.5),
+    "SLE": ("Western Africa", 8.5, -11.8),
+    "SGP": ("South-eastern Asia", 1.4, 103.8),
+    "SVK": ("Eastern Europe", 48.7, 19.7),
+    "SVN": ("Southern Europe", 46.2, 15.0),
+    "SLB": ("Melanesia", -9.6, 160.2),
+    "SOM": ("Eastern Africa", 5.2, 46.2),
+    "ZAF": ("Southern Africa", -30.6, 22.9),
+    "SSD": ("Eastern Africa", 6.9, 31.3),
+    "ESP": ("Southern Europe", 40.5, -3.7),
+    "LKA": ("Southern Asia", 7.9, 80.8),
+    "SDN": ("Northern Africa", 12.9, 30.2),
+    "SUR": ("South America", 3.9, -56.0),
+    "SWE": ("Northern Europe", 60.1, 18.6),
+    "CHE": ("Western Europe", 46.8, 8.2),
+    "SYR": ("Western Asia", 34.8, 39.0),
+    "TWN": ("Eastern Asia", 23.7, 121.0),
+    "TJK": ("Central Asia", 38.9, 71.3),
+    "TZA": ("Eastern Africa", -6.4, 34.9),
+    "THA": ("South-eastern Asia", 15.9, 101.0),
+    "TLS": ("South-eastern Asia", -8.9, 125.7),
+    "TGO": ("Western Africa", 8.6, 0.8),
+    "TON": ("Polynesia", -21.2, -175.2),
+    "TTO": ("Caribbean", 10.7, -61.2),
+    "TUN": ("Northern Africa", 33.9, 9.5),
+    "TUR": ("Western Asia", 39.0, 35.2),
+    "TKM": ("Central Asia", 39.0, 59.6),
+    "TUV": ("Polynesia", -7.1, 177.6),
+    "UGA": ("Eastern Africa", 1.4, 32.3),
+    "UKR": ("Eastern Europe", 48.4, 31.2),
+    "ARE": ("Western Asia", 23.4, 53.8),
+    "GBR": ("Northern Europe", 55.4, -3.4),
+    "USA": ("Northern America", 37.1, -95.7),
+    "URY": ("South America", -32.5, -55.8),
+    "UZB": ("Central Asia", 41.4, 64.6),
+    "VUT": ("Melanesia", -15.4, 166.9),
+    "VAT": ("Southern Europe", 41.9, 12.5),
+    "VEN": ("South America", 6.4, -66.6),
+    "VNM": ("South-eastern Asia", 14.1, 108.3),
+    "YEM": ("Western Asia", 15.6, 48.5),
+    "ZMB": ("Eastern Africa", -13.1, 27.8),
+    "ZWE": ("Eastern Africa", -19.0, 29.2),
+}
+
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance in km between two points given in
+    degrees, by the haversine formula.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) *
+         math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class CountryTable:
+    """
+    The metadata of every valid country, indexed by country ID.
+
+    Parameters:
+        countries (list): The valid country names, indexed by country ID.
+        use_numpy (bool): Force the NumPy path on or off. By default it
+            is used when NumPy is installed.
+
+    Raises:
+        ValueError: If a country has no metadata.
+    """
+
+    def __init__(self, countries, use_numpy=None):
+        self.countries = countries
+        self.alpha2, self.alpha3 = [], []
+        self.regions = array("B")     # index into REGION_NAMES
+        self.latitudes = array("f")   # degrees, float32
+        self.longitudes = array("f")
+        for name in countries:
+            codes = ISO_CODES.get(name)
+            if codes is None or codes[1] not in COUNTRY_METADATA:
+                raise ValueError(f"No metadata for the country '{name}'.")
+            region, latitude, longitude = COUNTRY_METADATA[codes[1]]
+            self.alpha2.append(codes[0])
+            self.alpha3.append(codes[1])
+            self.regions.append(REGION_NAMES.index(region))
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+
+        self._numpy = load_numpy() if use_numpy is not False else None
+        if use_numpy and self._numpy is None:
+            raise ImportError("NumPy is not installed")
+        self._distances = None
+
+    def region(self, country_id):
+        """
+        Returns the UN geoscheme region of a country.
+        """
+        return REGION_NAMES[self.regions[country_id]]
+
+    def continent(self, country_id):
+        """
+        Returns the continent of a country.
+        """
+        return REGIONS[self.region(country_id)]
+
+    @property
+    def distances(self):
+        """
+        The great-circle distance in km between every pair of countries,
+        as a matrix indexed by country IDs, worked out on first use.
+        """
+        if self._distances is None:
+            self._distances = (self._numpy_distances() if self._numpy
+                               else self._python_distances())
+        return self._distances
+
+    def _numpy_distances(self):
+        """
+        distances as one vectorised haversine over every pair.
+        """
+        np = self._numpy
+        latitudes = np.radians(np.frombuffer(self.latitudes, np.float32)
+                               .astype(np.float64))
+        longitudes = np.radians(np.frombuffer(self.longitudes, np.float32)
+                                .astype(np.float64))
+        lat1, lat2 = latitudes[:, None], latitudes[None, :]
+        a = (np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) *
+             np.sin((longitudes[None, :] - longitudes[:, None]) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def _python_distances(self):
+        """
+        distances as a list of rows, without NumPy.
+        """
+        points = list(zip(self.latitudes, self.longitudes))
+        return [[great_circle_km(lat1, lon1, lat2, lon2)
+                 for lat2, lon2 in points] for lat1, lon1 in points]
+
+    def distance(self, first, second):
+        """
+        Returns the distance in km between two countries, by ID.
+        """
+        return float(self.distances[first][second])
+
+    def route_km(self, country_ids):
+        """
+        Returns the length in km of a route through countries in order.
+
+        Parameters:
+            country_ids: The country IDs visited, in order, as a list,
+                typed array or NumPy array.
+        """
+        if len(country_ids) < 2:
+            return 0.0
+        if self._numpy:
+            np = self._numpy
+            ids = np.asarray(country_ids, dtype=np.intp)
+            return float(self.distances[ids[:-1], ids[1:]].sum())
+        distances = self.distances
+        ids = iter(country_ids)
+        previous = next(ids)
+        total = 0.0
+        for country_id in ids:
+            total += distances[previous][country_id]
+            previous = country_id
+        return total
+
+    def keys_route_km(self, keys):
+        """
+        Returns route_km() for packed date index keys, taking the country
+        ID of each from its low bits.
+        """
+        if self._numpy:
+            np = self._numpy
+            return self.route_km(np.frombuffer(keys, dtype=np.int64) &
+                                 COUNTRY_MASK)
+        return self.route_km([unpack_key(key)[1] for key in keys])
+
+    def coverage(self, country_counts):
+        """
+        Sums records and countries up by continent and by region.
+
+        Parameters:
+            country_counts (list): The records of each country, indexed
+                by country ID.
+
+        Returns:
+            dict: "continents" and "regions", each mapping a name to
+            {"countries", "of", "share", "trips"}.
+        """
+        groups = {
+            kind: {name: {"countries": 0, "of": 0, "trips": 0}
+                   for name in names}
+            for kind, names in (("continents", CONTINENTS),
+                                ("regions", REGION_NAMES))}
+        for country_id, count in enumerate(country_counts):
+            region = self.region(country_id)
+            for group in (groups["continents"][REGIONS[region]],
+                          groups["regions"][region]):
+                group["of"] += 1
+                group["trips"] += count
+                if count:
+                    group["countries"] += 1
+        for kind, named in groups.items():
+            groups[kind] = {name: dict(group, share=round(
+                                group["countries"] / group["of"], 4))
+                            for name, group in named.items() if group["of"]}
+        return groups
+
+    def nearest(self, origin, candidates, count=5):
+        """
+        Returns the candidate countries nearest to a country.
+
+        Parameters:
+            origin (int): The country ID to measure from.
+            candidates: The country IDs to choose from.
+            count (int): How many to return.
+
+        Returns:
+            list: (country, km) pairs, nearest first.
+        """
+        row = self.distances[origin]
+        ranked = sorted(candidates, key=lambda country_id: (
+            row[country_id], self.countries[country_id]))
+        return [(self.countries[country_id], round(float(row[country_id]), 1))
+                for country_id in ranked[:count]]
@@ -0,0 +1,253 @@
+"""
+Durable storage for the Travel Tracker records.
+
+Every add/delete is appended to a journal file as one JSON line.
+Writes are buffered and flushed to disk in groups (group commit),
+so a burst of changes costs a single fsync instead of one per record.
+Once enough entries pile up, the full record set is written to a
+snapshot file and the journal is truncated, which keeps start-up
+time bounded by the snapshot size rather than the journal history.
+
+Recovery streams the snapshot and replays the journal entries whose
+sequence number is newer than the snapshot. A torn last line left
+behind by a crash, including one that is missing its newline, is
+ignored and cut off so the next append starts on a fresh line.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+
+JOURNAL_NAME = "journal.log"
+SNAPSHOT_NAME = "snapshot.jsonl"
+
+
+def default_data_dir():
+    """
+    Returns the directory the tracker keeps its files in.
+    Can be overridden with the TRAVEL_TRACKER_HOME environment variable.
+    """
+    return os.environ.get("TRAVEL_TRACKER_HOME") or os.path.join(
+        os.path.expanduser("~"), ".travel_tracker")
+
+
+def _fsync_directory(path):
+    """
+    Makes a rename inside the directory durable (no-op on Windows).
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TravelJournal:
+    """
+    Append-only journal with periodic snapshots.
+
+    Parameters:
+        directory (str): Folder holding the journal and snapshot files.
+        commit_batch (int): Pending entries that force a commit.
+        commit_interval (float): Seconds after which pending entries
+            are committed on the next append.
+        snapshot_every (int): Journal entries kept before compaction.
+    """
+
+    def __init__(self, directory, commit_batch=256, commit_interval=1.0,
+                 snapshot_every=5000):
+        self.directory = directory
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self._file = None
+        self._seq = 0
+        self._entries_since_snapshot = 0
+        self._snapshot_records = 0
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def load(self, categories=("visited", "wishlist"), factory=list):
+        """
+        Recovers the records from the snapshot and journal.
+
+        Records are streamed into the containers one by one, so no
+        full copy of the data is held in memory while loading.
+
+        Parameters:
+            categories (tuple): Categories that always exist in the result.
+            factory (callable): Creates an empty record container with an
+                append(record) method. Defaults to a plain list.
+
+        Returns:
+            dict: Category name mapped to its container of records.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        snapshot_seq = self._read_snapshot_seq()
+
+        # First pass: find the deletes and where the journal is intact
+        deleted = Counter()
+        good_size = 0
+        if os.path.exists(self.journal_path):
+            for entry, size in self._read_journal():
+                good_size += size
+                if entry["seq"] <= snapshot_seq:
+                    continue  # Already part of the snapshot
+                if entry["op"] == "delete":
+                    deleted[self._key(entry)] += 1
+                self._seq = entry["seq"]
+                self._entries_since_snapshot += 1
+            with open(self.journal_path, "r+b") as file:
+                file.truncate(good_size)
+
+        # Second pass: stream snapshot records, then journal adds, skipping
+        # the ones deleted later on
+        data = {category: factory() for category in categories}
+        for entry in self._replayed_records(snapshot_seq):
+            key = self._key(entry)
+            if deleted[key] > 0:
+                deleted[key] -= 1
+                continue
+            if entry["category"] not in data:
+                data[entry["category"]] = factory()
+            data[entry["category"]].append(
+                {"country": entry["country"], "date": entry["date"]})
+
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        return data
+
+    @staticmethod
+    def _key(entry):
+        return entry["category"], entry["country"], entry["date"]
+
+    def _read_snapshot_seq(self):
+        """
+        Reads the sequence number from the snapshot header line.
+        """
+        self._seq = 0
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, encoding="utf-8") as file:
+            self._seq = json.loads(file.readline())["seq"]
+        return self._seq
+
+    def _read_journal(self):
+        """
+        Yields (entry, size in bytes) for each intact journal line.
+
+        A last line without its newline is torn even if it parses, as
+        the next append would otherwise be written onto the same line.
+        """
+        with open(self.journal_path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    return  # Torn write from a crash, drop the tail
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return  # Torn write from a crash, drop the tail
+                yield entry, len(line)
+
+    def _replayed_records(self, snapshot_seq):
+        """
+        Yields every record of the snapshot followed by the journal adds.
+        """
+        self._snapshot_records = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as file:
+                file.readline()  # Header
+                for line in file:
+                    self._snapshot_records += 1
+                    yield json.loads(line)
+        if os.path.exists(self.journal_path):
+            for entry, _ in self._read_journal():
+                if entry["seq"] > snapshot_seq and entry["op"] == "add":
+                    yield entry
+
+    def append(self, op, category, record):
+        """
+        Buffers one mutation and commits the group when it is due.
+
+        Parameters:
+            op (str): Either 'add' or 'delete'.
+            category (str): The category that changed.
+            record (dict): The record that was added or deleted.
+        """
+        self._seq += 1
+        self._file.write(json.dumps({
+            "seq": self._seq, "op": op, "category": category,
+            "country": record["country"], "date": record["date"]
+        }) + "\n")
+        self._pending += 1
+        self._entries_since_snapshot += 1
+        if (self._pending >= self.commit_batch or
+                time.monotonic() - self._last_commit >= self.commit_interval):
+            self.commit()
+
+    def commit(self):
+        """
+        Flushes and fsyncs every pending entry in one go.
+        """
+        if self._pending and self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_commit = time.monotonic()
+
+    @property
+    def snapshot_due(self):
+        """
+        True once the journal is long enough to be compacted.
+
+        The journal may grow as long as the last snapshot, so a large
+        import is not rewritten into a fresh snapshot every few
+        thousand rows.
+        """
+        return self._entries_since_snapshot >= max(self.snapshot_every,
+                                                   self._snapshot_records)
+
+    def write_snapshot(self, data):
+        """
+        Writes all records to a new snapshot and empties the journal.
+
+        The snapshot is a header line followed by one JSON line per
+        record, so it can be written and read back as a stream.
+
+        Parameters:
+            data (dict): Category name mapped to its records.
+        """
+        self.commit()
+        temp_path = self.snapshot_path + ".tmp"
+        written = 0
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"seq": self._seq}) + "\n")
+            for category, records in data.items():
+                for record in records:
+                    file.write(json.dumps({
+                        "category": category, "country": record["country"],
+                        "date": record["date"]}) + "\n")
+                    written += 1
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+
+        # Entries up to self._seq now live in the snapshot
+        self._file.close()
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._entries_since_snapshot = 0
+        self._snapshot_records = written
+
+    def close(self):
+        """
+        Commits outstanding entries and closes the journal file.
+        """
+        if self._file:
+            self.commit()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,193 @@
+"""
+Load test for the Travel Tracker service.
+
+Opens many concurrent sessions against the service, each one a kept
+alive connection for its own user, and has every session pipeline a
+realistic mix of requests: setting the age, adding trips from the
+benchmark's synthetic histories, searching, sorting, displaying and
+deleting. Reports the throughput and the latency percentiles of each
+operation, and can save them as JSON.
+
+Usage:
+    python3 service.py --port 8765 &
+    python3 load_test.py --port 8765 --sessions 2000
+
+    python3 load_test.py --spawn --sessions 2000   # starts its own service
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+from benchmark import generate_records, search_queries, summarize
+from service import DEFAULT_HOST, DEFAULT_PORT, TrackerClient, TrackerService
+
+DEFAULT_SESSIONS = 1000
+DEFAULT_REQUESTS = 40
+DEFAULT_DEPTH = 8
+CONNECT_CONCURRENCY = 200  # Connections opened at the same time
+
+
+def session_requests(session, count, seed):
+    """
+    Returns the (op, args) requests one session sends, in order.
+
+    Most requests add trips; the rest read or delete them.
+    """
+    rng = random.Random(seed + session)
+    # The service checks dates against the real today
+    trips = generate_records(count, seed + session, today=date.today())
+    queries = search_queries(count, seed + session)
+    requests = [("set_age", {"age": rng.randint(18, 90)})]
+    for number, (category, country, date_text) in enumerate(trips):
+        roll = rng.random()
+        if roll < 0.6 or number < 5:
+            requests.append(("add", {"category": category,
+                                     "country": country, "date": date_text}))
+        elif roll < 0.75:
+            requests.append(("search", {"query": queries[number]}))
+        elif roll < 0.85:
+            requests.append(("sort", {
+                "category": category, "limit": 20,
+                "order": rng.choice(("az", "za", "date", "date-desc"))}))
+        elif roll < 0.93:
+            requests.append(("display", {"limit": 20}))
+        else:
+            requests.append(("delete", {"category": category,
+                                        "country": country}))
+    return requests[:count]
+
+
+async def run_session(host, port, session, count, depth, seed, latencies,
+                      connect_limit):
+    """
+    Runs one user's session, with up to `depth` requests in flight.
+
+    Returns:
+        int: How many requests failed.
+    """
+    async with connect_limit:
+        client = await TrackerClient.connect(host, port)
+    user = f"load-{session}"
+    in_flight = asyncio.Semaphore(depth)
+    failures = 0
+
+    async def send(op, args):
+        nonlocal failures
+        async with in_flight:
+            start = time.perf_counter()
+            try:
+                await client.request(user, op, **args)
+            except ValueError:
+                failures += 1  # Rejected by a rule, e.g. a past wish
+            latencies[op].append(time.perf_counter() - start)
+
+    try:
+        await asyncio.gather(*(send(op, args) for op, args in
+                               session_requests(session, count, seed)))
+    finally:
+        await client.close()
+    return failures
+
+
+async def run_load(host, port, sessions, count, depth, seed, spawn=False,
+                   shards=None):
+    """
+    Runs every session at once.
+
+    Returns:
+        dict: The report, with the totals under "meta" and the
+        latencies of each operation under "results".
+    """
+    service = None
+    if spawn:
+        service = TrackerService(shards)
+        host, port = await service.start(host, 0)
+    latencies = defaultdict(list)
+    connect_limit = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    try:
+        start = time.perf_counter()
+        failures = await asyncio.gather(*(
+            run_session(host, port, session, count, depth, seed, latencies,
+                        connect_limit)
+            for session in range(sessions)))
+        seconds = time.perf_counter() - start
+    finally:
+        if service is not None:
+            await service.stop()
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        "meta": {
+            "sessions": sessions, "requests_per_session": count,
+            "pipeline_depth": depth, "seed": seed, "seconds": round(
+                seconds, 3),
+            "requests": total, "rejected": sum(failures),
+            "requests_per_second": round(total / seconds, 1),
+        },
+        "results": [summarize(op, sessions, seconds, len(samples),
+                              samples)
+                    for op, samples in sorted(latencies.items())],
+    }
+
+
+def format_report(report):
+    """
+    Returns the report as a plain text table.
+    """
+    meta = report["meta"]
+    lines = [f"{meta['sessions']:,} sessions, {meta['requests']:,} "
+             f"requests in {meta['seconds']}s "
+             f"({meta['requests_per_second']:,.0f} requests/s, "
+             f"{meta['rejected']:,} rejected by the rules)",
+             f"{'operation':<10} {'requests':>9} {'p50 ms':>9} "
+             f"{'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for entry in report["results"]:
+        lines.append(
+            f"{entry['operation']:<10} {entry['calls']:>9,} "
+            f"{entry['p50_us'] / 1000:>9.2f} {entry['p95_us'] / 1000:>9.2f} "
+            f"{entry['p99_us'] / 1000:>9.2f} {entry['max_us'] / 1000:>9.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Runs the load test from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Load test the Travel Tracker service.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS,
+                        help="concurrent users, one connection each")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS,
+                        help="requests sent by each session")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help="requests each session pipelines at once")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true",
+                        help="start a service for the test instead of "
+                             "connecting to a running one")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="shards of the spawned service")
+    parser.add_argument("--output", help="where the JSON report is saved")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_load(args.host, args.port, args.sessions,
+                                  args.requests, args.depth, args.seed,
+                                  args.spawn, args.shards))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
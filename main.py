@@ -6,75 +6,56 @@ It includes functionality for user input, validating
 and storing country data, and providing
 options to sort or display records.
 
+The records themselves are kept by travel_store.TravelStore;
+this script is the interactive front end around it. Importing it
+has no side effects: the store is opened by travel_tracker_app().
+
 Modules:
 - os: for interacting with the operating system
 - sys: for system-specific parameters and functions
-- re: for regular expression matching and operations
-- datetime: for working with date and time objects
+- atexit: for committing the journal when the app closes
+- countries: for the list of valid countries
+- date_parser: for checking travel dates
+- travel_store: for storing, searching and sorting the records
+- renderer: for buffered, paginated terminal output
+- profiling: for the optional --profile instrumentation
 """
 
 import os
 import sys
-import re
-from datetime import datetime
-
-valid_countries = [
-    "Afghanistan", "Albania", "Algeria", "Andorra", "Angola",
-    "Antigua and Barbuda", "Argentina", "Armenia", "Australia", "Austria",
-    "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados",
-    "Belarus", "Belgium", "Belize", "Benin", "Bhutan",
-    "Bolivia", "Bosnia and Herzegovina", "Botswana", "Brazil",
-    "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cabo Verde",
-    "Cambodia", "Cameroon", "Canada", "Central African Republic",
-    "Chad", "Chile", "China", "Colombia", "Comoros", "Congo",
-    "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic",
-    "Democratic Republic of the Congo", "Denmark", "Djibouti",
-    "Dominica", "Dominican Republic", "Ecuador", "Egypt", "El Salvador",
-    "Equatorial Guinea", "Eritrea", "Estonia", "Eswatini", "Ethiopia",
-    "Fiji", "Finland", "France", "Gabon", "Gambia", "Georgia",
-    "Germany", "Ghana", "Greece", "Grenada", "Guatemala", "Guinea",
-    "Guinea-Bissau", "Guyana", "Haiti", "Honduras", "Hungary",
-    "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland",
-    "Israel", "Italy", "Jamaica", "Japan", "Jordan", "Kazakhstan",
-    "Kenya", "Kiribati", "Korea, North", "Korea, South", "Kuwait",
-    "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Lesotho", "Liberia",
-    "Libya", "Liechtenstein", "Lithuania", "Luxembourg", "Madagascar",
-    "Malawi", "Malaysia", "Maldives", "Mali", "Malta", "Marshall Islands",
-    "Mauritania", "Mauritius", "Mexico", "Micronesia", "Moldova",
-    "Monaco", "Mongolia", "Montenegro", "Morocco", "Mozambique",
-    "Myanmar", "Namibia", "Nauru", "Nepal", "Netherlands", "New Zealand",
-    "Nicaragua", "Niger", "Nigeria", "North Macedonia", "Norway", "Oman",
-    "Pakistan", "Palau", "Panama", "Papua New Guinea", "Paraguay", "Peru",
-    "Philippines", "Poland", "Portugal", "Qatar", "Romania", "Russia",
-    "Rwanda", "Saint Kitts and Nevis", "Saint Lucia",
-    "Saint Vincent and the Grenadines", "Samoa", "San Marino",
-    "Sao Tome and Principe", "Saudi Arabia", "Senegal",
-    "Serbia", "Seychelles", "Sierra Leone", "Singapore",
-    "Slovakia", "Slovenia", "Solomon Islands", "Somalia", "South Africa",
-    "South Sudan", "Spain", "Sri Lanka", "Sudan", "Suriname",
-    "Sweden", "Switzerland", "Syria", "Taiwan", "Tajikistan", "Tanzania",
-    "Thailand", "Timor-Leste", "Togo", "Tonga", "Trinidad and Tobago",
-    "Tunisia", "Turkey", "Turkmenistan", "Tuvalu", "Uganda",
-    "Ukraine", "United Arab Emirates", "United Kingdom",
-    "United States", "Uruguay", "Uzbekistan", "Vanuatu", "Vatican City",
-    "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
-]
-
-# Initialise travel data structure
-travel_data = {
-    "visited": [],
-    "wishlist": []
-}
+import atexit
+from itertools import chain
+
+from countries import VALID_COUNTRIES
+from date_parser import (BEFORE_BIRTH, VISIT_IN_FUTURE, WISH_IN_PAST,
+                         DateRules, is_date_format, is_valid_date)
+from travel_store import CATEGORIES, TravelStore
+from renderer import Screen, clear_screen, show_pages
+import profiling
+from profiling import count_records, instrument
+
+# Kept under its original name for scripts that import it
+valid_countries = VALID_COUNTRIES
+
+# The open TravelStore, set by travel_tracker_app()
+store = None
 
 STORED_AGE = None
 
+# What the user is told when a date breaks one of the date rules
+DATE_MESSAGES = {
+    BEFORE_BIRTH: "\nYou cannot enter a date before your birthyear.",
+    WISH_IN_PAST: "\nYou can only add countries with a future date!",
+    VISIT_IN_FUTURE: "\nYou cannot enter a future date for a visited "
+                     "country.",
+}
+
 
 def clear_terminal():
     """
-    Allows the user to add a country to their visited or wishlist category.
-    Prompts for the country, category, age, and travel date with validations.
+    Clears the terminal screen with an ANSI escape sequence.
     """
-    os.system('cls' if os.name == 'nt' else 'clear')
+    clear_screen()
 
 
 def display_menu():
@@ -90,18 +71,20 @@ def display_menu():
         ("\033[1;35m3. Search for a country\033[0m"),
         ("\033[1;36m4. Sort your countries\033[0m"),
         ("\033[1;37m5. Display all countries\033[0m"),
-        ("\033[1;31m6. Exit\033[0m"),
+        ("\033[1;34m6. Import or export records\033[0m"),
+        ("\033[1;32m7. Travel statistics\033[0m"),
+        ("\033[1;31m8. Exit\033[0m"),
     ]
 
-    print("\033[1;34m" + menu_border + "\033[0m")
-    print("\033[1;37m" + f"  {title}".ljust(48) + "\033[0m")
-    print("\033[1;34m" + menu_border + "\033[0m\n")
+    with Screen() as screen:
+        screen.add("\033[1;34m" + menu_border + "\033[0m")
+        screen.add("\033[1;37m" + f"  {title}".ljust(48) + "\033[0m")
+        screen.add("\033[1;34m" + menu_border + "\033[0m\n")
 
-    print("Choose an option:")
-    for option in options:
-        print(f"  {option}")
+        screen.add("Choose an option:")
+        screen.add(*(f"  {option}" for option in options))
 
-    print("\n\033[1;34m" + menu_border + "\033[0m")
+        screen.add("\n\033[1;34m" + menu_border + "\033[0m")
 
 
 def prompt_confirmation(action):
@@ -119,6 +102,7 @@ def prompt_confirmation(action):
     return confirmation == 'yes'
 
 
+@instrument()
 def validate_category():
     """
     Ensures the user enters a valid category ('visited' or 'wishlist').
@@ -126,12 +110,13 @@ def validate_category():
     while True:
         category = input("\nType either 'visited' or 'wishlist' to continue: "
                          ).strip().lower()
-        if category not in travel_data:
+        if category not in CATEGORIES:
             print("\nInvalid category. Please use 'visited' or 'wishlist'.")
         else:
             return category
 
 
+@instrument()
 def validate_age():
     """
     Validates the user's age input if needed.
@@ -144,23 +129,37 @@ def validate_age():
             return int(age_input)
 
 
+@instrument()
 def validate_country():
     """
     Validates the country input against valid countries.
+    Accepts aliases and ISO codes, and suggests close matches on a typo.
     """
     while True:
-        country = input("\nCountry name: ").strip().title()
-        if country not in valid_countries:
+        entry = input("\nCountry name: ").strip()
+        country = store.resolver.resolve(entry)
+        if country is None:
             print("\nOops! You have either entered an invalid country!")
+            suggestions = store.resolver.suggest(entry)
+            if suggestions:
+                print(f"\nDid you mean: {', '.join(suggestions)}?")
             print("\nTry entering it again.")
         else:
             print(f"\nSuccessfully added {country}.")
             return country
 
 
-def validate_date(min_date, category):
+@instrument()
+def validate_date(rules, category):
     """
     Validates the travel date entered by the user.
+
+    Parameters:
+        rules (DateRules): The date rules for this trip.
+        category (str): 'visited' or 'wishlist'.
+
+    Returns:
+        str: The date as dd-mm-yyyy.
     """
     while True:
         date = input("\nEnter the travel date (dd-mm-yyyy): ").strip()
@@ -170,37 +169,31 @@ def validate_date(min_date, category):
             print("\nPlease enter the date as dd-mm-yyyy")
             continue
 
-        if not re.match(r'^\d{2}-\d{2}-\d{4}$', date):
-            print("\nUh Oh! Please enter the date in dd-mm-yyyy format.")
-            continue
-
-        try:
-            date_obj = datetime.strptime(date, "%d-%m-%Y")
-        except ValueError:
-            print("\nUh Oh! The date you entered is wrong!")
-            continue
-
-        if min_date and date_obj < min_date:
-            print("\nYou cannot enter a date before your birthyear.")
-            continue
-
-        if category == "wishlist" and date_obj <= datetime.now():
-            print("\nYou can only add countries with a future date!")
+        ordinal, reason = rules.check(category, date)
+        if ordinal is None:
+            if is_date_format(date):
+                print("\nUh Oh! The date you entered is wrong!")
+            else:
+                print("\nUh Oh! Please enter the date in dd-mm-yyyy format.")
             continue
 
-        if category == "visited" and date_obj > datetime.now():
-            print("\nYou cannot enter a future date for a visited country.")
+        if reason:
+            print(DATE_MESSAGES[reason])
             continue
 
-        return date_obj
+        return date
 
 
+@instrument()
 def add_country():
     """
     Allows the user to add a country to
     their visited or wishlist category.
     Prompts for the country, category,
     age, and travel date with validations.
+
+    Returns:
+        str: The next screen, 'add' to add another country or 'menu'.
     """
     global STORED_AGE  # Remember the user's age across multiple calls
     clear_terminal()
@@ -212,39 +205,44 @@ def add_country():
         STORED_AGE = validate_age()
 
     age = STORED_AGE if category == "visited" else None
-    today = datetime.now()
-    min_year = today.year - (age or 0)
-    min_date = datetime(min_year, today.month, today.day) if age else None
+    rules = DateRules(age)
 
     country = validate_country()
 
-    date_obj = validate_date(min_date, category)
-
-    travel_data[category].append({"country": country,
-                                 "date": date_obj.strftime("%d-%m-%Y")})
+    date = validate_date(rules, category)
 
-    print(f"\nSuccess! You have added {country} to: ")
-    print(f"\n{category.capitalize()} for {date_obj.strftime('%d-%m-%Y')}")
+    count_records(1)
+    if store.add_record(category, {"country": country, "date": date}):
+        print(f"\nSuccess! You have added {country} to: ")
+        print(f"\n{category.capitalize()} for {date}")
+    else:
+        print(f"\n{country} for {date} is already in your "
+              f"{category.capitalize()} list.")
 
     while True:
         add_another = input("\nNeed to add another country? (yes/no): "
                             ).strip().lower()
         if add_another == 'yes':
-            add_country()
-            return
+            return "add"
         if add_another == 'no':
             print("\nReturning to the main menu...")
             clear_terminal()
-            return
+            return "menu"
         print("\nInvalid input. Please answer 'yes' or 'no'.")
 
 
+@instrument()
 def delete_country():
     """
     Allows the user to delete a country
     from their visited or wishlist category.
     Prompts for the category and country
     with confirmation before deletion.
+    Several countries, or everything before a date, can also be
+    deleted in one go.
+
+    Returns:
+        str: The next screen, 'menu'.
     """
     clear_terminal()
     print("\nWARNING: You are about to delete a country!")
@@ -253,26 +251,43 @@ def delete_country():
     while True:
         category = input("\nEnter the category (visited/wishlist): "
                          ).strip().lower()
-        if category not in travel_data:
+        if category not in CATEGORIES:
             print("\nEnter either 'visited' or 'wishlist'.")
         else:
             break
 
+    with Screen() as screen:
+        screen.add("\n\033[1;34mWhat would you like to delete?\033[0m",
+                   "\033[1;32m1. A single country\033[0m",
+                   "\033[1;33m2. Several countries at once\033[0m",
+                   "\033[1;35m3. Every trip dated before a given date\033[0m")
+    while True:
+        mode = input("\nEnter the number corresponding to your choice: "
+                     ).strip()
+        if mode == "1":
+            delete_single_country(category)
+            return "menu"
+        if mode == "2":
+            delete_country_list(category)
+            return "menu"
+        if mode == "3":
+            delete_before_date(category)
+            return "menu"
+        print("\nPlease enter 1, 2 or 3.")
+
+
+def delete_single_country(category):
+    """
+    Deletes countries from a category one at a time.
+    """
     # Loop for country deletion
     while True:
         country = input("\nEnter the country you wish to delete: ").strip()
-        # Check if the country exists in the category
-        found = False
-        for record in travel_data[category]:
-            if record["country"].lower() == country.lower():
-                found = True
-                if prompt_confirmation(f"delete {country} from {category}"):
-                    travel_data[category].remove(record)
-                    print(f"\nSuccessfully deleted {country} from: ")
-                    print(f"\n{category.capitalize()} list.")
-                break
+        # Look the country up in the position index
+        name = store.resolver.resolve(country) or country
+        position = store.find(category, name)
 
-        if not found:
+        if position is None:
             print(f"\n{country} is not in your {category.capitalize()} list.")
             retry = input("\nWould you like to try again? (yes/no): "
                           ).strip().lower()
@@ -281,6 +296,12 @@ def delete_country():
             else:
                 return
 
+        if prompt_confirmation(f"delete {name} from {category}"):
+            store.delete_at(category, position)
+            count_records(1)
+            print(f"\nSuccessfully deleted {name} from: ")
+            print(f"\n{category.capitalize()} list.")
+
         while True:
             delete_another = input("\nNeed to delete another? (yes/no): "
                                    ).strip().lower()
@@ -292,6 +313,50 @@ def delete_country():
                 print("\nPlease enter 'yes' or 'no'.")
 
 
+def delete_country_list(category):
+    """
+    Deletes every record of several countries from a category at once.
+    """
+    print("\nEnter one country per line. Leave the line empty when done.")
+    names = set()
+    while True:
+        country = input("Country: ").strip()
+        if not country:
+            break
+        if not store.count_country(category, country):
+            print(f"{country} is not in your {category.capitalize()} list.")
+        else:
+            names.add(store.resolver.resolve(country))
+
+    if not names:
+        print("\nNothing to delete.")
+        return
+    if prompt_confirmation(f"delete {', '.join(sorted(names))} "
+                           f"from {category}"):
+        removed = store.delete_countries(category, names)
+        count_records(len(removed))
+        print(f"\nSuccessfully deleted {len(removed)} records from: ")
+        print(f"\n{category.capitalize()} list.")
+
+
+def delete_before_date(category):
+    """
+    Deletes every record of a category dated before a chosen date.
+    """
+    date = prompt_query_date("\nDelete every trip before (dd-mm-yyyy): ")
+    matching = store.count_before(category, date)
+    if not matching:
+        print(f"\nThere are no trips before {date}.")
+        return
+    if prompt_confirmation(f"delete {matching} trips before {date} "
+                           f"from {category}"):
+        removed = store.delete_before(category, date)
+        count_records(len(removed))
+        print(f"\nSuccessfully deleted {len(removed)} records from: ")
+        print(f"\n{category.capitalize()} list.")
+
+
+@instrument()
 def search_country():
     """
     Allows the user to search for a country
@@ -299,87 +364,153 @@ def search_country():
     If the country is not found,
     provides an option to add it
     or return to the menu.
+
+    Returns:
+        str: The next screen: 'add', 'menu', or None to quit.
     """
     clear_terminal()
     country = input("\nSearch for your country here: ").strip()
-    found = False
-    for category, records in travel_data.items():
-        for record in records:
-            if country.lower() in record["country"].lower():
-                print(
-                    f"\nWe found it in your {category.capitalize()} places: "
-                )
-                print(
-                    f"\n{record['country']} (Date: {record['date']}"
-                    )
-                found = True
-    if not found:
+    matches = store.search(country)
+    count_records(len(matches))
+    for category, name, date in matches:
+        print(
+            f"\nWe found it in your {category.capitalize()} places: "
+        )
+        print(
+            f"\n{name} (Date: {date})"
+            )
+    if not matches:
         print(f"\nIt appears that {country} is not in any of your lists.")
         response = input(
             f"\nWant to add {country} to one of your lists? (yes/no): "
                          ).strip().lower()
         if response == 'yes':
-            add_country()
-        else:
-            response = input("\nReturn to the main menu? (yes/no): "
-                             ).strip().lower()
-            if response == 'yes':
-                display_menu()
-            else:
-                print("\nThank you for using our application!")
-                sys.exit()
+            return "add"
+        response = input("\nReturn to the main menu? (yes/no): "
+                         ).strip().lower()
+        if response != 'yes':
+            print("\nThank you for using our application!")
+            return None
+    return "menu"
 
 
+def prompt_query_date(message):
+    """
+    Asks for a dd-mm-yyyy date until a real date is entered.
+    """
+    while True:
+        date = input(message).strip()
+        if is_valid_date(date):
+            return date
+        print("\nUh Oh! Please enter the date in dd-mm-yyyy format.")
+
+
+def prompt_number(message):
+    """
+    Asks for a positive whole number until one is entered.
+    """
+    while True:
+        number = input(message).strip()
+        if number.isdigit() and int(number) > 0:
+            return int(number)
+        print("\nPlease enter a whole number above 0.")
+
+
+def trips_between_dates(category):
+    """
+    Returns the records of a category dated between two chosen dates.
+    """
+    start = prompt_query_date("\nFrom date (dd-mm-yyyy): ")
+    end = prompt_query_date("\nTo date (dd-mm-yyyy): ")
+    return store.between(category, start, end)
+
+
+def first_or_last_trips(category):
+    """
+    Returns the earliest or latest N records of a category.
+    """
+    count = prompt_number("\nHow many trips? ")
+    while True:
+        which = input("\nFirst or last trips? (first/last): ").strip().lower()
+        if which == "first":
+            return store.first(category, count)
+        if which == "last":
+            return store.last(category, count)
+        print("\nPlease enter 'first' or 'last'.")
+
+
+def trips_in_year(category):
+    """
+    Returns the records of a category dated in a chosen year.
+    """
+    while True:
+        year = prompt_number("\nWhich year? ")
+        if 1 <= year <= 9999:
+            return store.in_year(category, year)
+        print("\nPlease enter a year between 1 and 9999.")
+
+
+@instrument()
 def sort_records():
     """
     Sorts the records of a specified category
     (visited/wishlist) by different criteria.
+    Date views are read from the date index rather than re-sorted.
+
+    Returns:
+        str: The next screen: 'menu', or None to quit.
     """
     clear_terminal()
     print("\nYou chose to sort records.")
 
     category = input("\nEnter the category to sort (visited/wishlist): "
                      ).strip().lower()
-    while category not in travel_data:
+    while category not in CATEGORIES:
         print("\nInvalid category. Use 'visited' or 'wishlist'.")
         category = input("\nEnter the category to sort (visited/wishlist): "
                          ).strip().lower()
 
-    print("\n\033[1;34mChoose a sorting option:\033[0m")
-    print("\033[1;32m1. Ascending order by country (A-Z)\033[0m")
-    print("\033[1;33m2. Descending order by country name (Z-A)\033[0m")
-    print("\033[1;36m3. Ascending order by date\033[0m")
-    print("\033[1;35m4. Descending order by date\033[0m")
+    with Screen() as screen:
+        screen.add("\n\033[1;34mChoose a sorting option:\033[0m",
+                   "\033[1;32m1. Ascending order by country (A-Z)\033[0m",
+                   "\033[1;33m2. Descending order by country name (Z-A)"
+                   "\033[0m",
+                   "\033[1;36m3. Ascending order by date\033[0m",
+                   "\033[1;35m4. Descending order by date\033[0m",
+                   "\033[1;37m5. Trips between two dates\033[0m",
+                   "\033[1;37m6. First or last trips\033[0m",
+                   "\033[1;37m7. Trips in a given year\033[0m")
 
     sorting_choice = input("\nEnter the number corresponding to your choice: "
                            ).strip()
     clear_terminal()
 
-    # Dictionary to map sorting choices to sorting functions
+    # Dictionary to map choices to sorted views of the records
     sort_functions = {
-        '1': (lambda x: x["country"].lower(), False, "A-Z"),
-        '2': (lambda x: x["country"].lower(), True, "Z-A"),
-        '3': (lambda x: x["date"], False, "ascending by date"),
-        '4': (lambda x: x["date"], True, "descending by date")
+        '1': (lambda: store.sorted_records(category, "az"), "A-Z"),
+        '2': (lambda: store.sorted_records(category, "za"), "Z-A"),
+        '3': (lambda: store.sorted_records(category, "date"),
+              "ascending by date"),
+        '4': (lambda: store.sorted_records(category, "date-desc"),
+              "descending by date"),
+        '5': (lambda: trips_between_dates(category), "between two dates"),
+        '6': (lambda: first_or_last_trips(category), "first or last trips"),
+        '7': (lambda: trips_in_year(category), "trips in a year")
     }
 
-    # Perform sorting based on user's choice
+    # Build the view based on user's choice
     if sorting_choice in sort_functions:
-        key_func, reverse, order = sort_functions[sorting_choice]
-        travel_data[category].sort(key=key_func, reverse=reverse)
-        print(f"\nSorted ({order}).")
+        view, order = sort_functions[sorting_choice]
     else:
         print("\nInvalid choice. Returning to the main menu.")
-        display_menu()
-        return
+        return "menu"
 
-    # Display the sorted records
-    print(f"\nSorted {category.capitalize()} List:")
-    if travel_data[category]:
-        for record in travel_data[category]:
-            print(f"{record['country']} (Date: {record['date']})")
-    else:
-        print("No records found.")
+    # Display the sorted records a page at a time
+    shown = show_pages([f"\nSorted ({order}).",
+                        f"\nSorted {category.capitalize()} List:"],
+                       (f"{country} (Date: {date})"
+                        for country, date in view()))
+    count_records(shown)
 
     # Simplified exit/menu logic
     response = input("\nReturn to the main menu? (yes/no): ").strip().lower()
@@ -388,74 +519,293 @@ def sort_records():
     elif input("\nDo you want to exit the app? (yes/no): "
                ).strip().lower() == 'yes':
         print("\nThank you for using our application! Come back soon!")
-        sys.exit()
-    else:
-        display_menu()
+        return None
+    return "menu"
 
 
+@instrument()
 def display_records():
     """
     Displays the travel records for visited and wishlist countries.
     Prompts the user to add more countries if desired.
-    """
-    clear_terminal()
-    print("\nHere are your travel records:")
-
-    if travel_data["visited"]:
-        print("\n\033[1;32mVisited Countries:\033[0m")
-        for record in travel_data["visited"]:
-            print(f"- {record['country']} (Visited on: {record['date']})")
-    else:
-        print("\n\033[1;32mVisited Countries:\033[0m No records yet!")
 
-    if travel_data["wishlist"]:
-        print("\n\033[1;33mWishlist Countries:\033[0m")
-        for record in travel_data["wishlist"]:
-            print(f"- {record['country']} (Planned for: {record['date']})")
-    else:
-        print("\n\033[1;33mWishlist Countries:\033[0m No records yet!")
+    Returns:
+        str: The next screen, 'add' or 'menu'.
+    """
+    headings = {
+        "visited": "\n\033[1;32mVisited Countries:\033[0m",
+        "wishlist": "\n\033[1;33mWishlist Countries:\033[0m",
+    }
+    show_pages(["\nHere are your travel records:"],
+               store.display_lines(headings))
+    count_records(len(store))
 
     while True:
         choice = input("\nDo you want to add more countries? (yes/no): "
                        ).strip().lower()
         if choice == "yes":
-            add_country()
-            return  # Return immediately after calling add_country()
+            return "add"
         if choice == "no":
             print("\nReturning to the main menu...\n")
             clear_terminal()
-            break  # Exit the loop to return to the main menu
+            return "menu"
         print("\nInvalid input. Please answer 'yes' or 'no'.")
 
 
+def statistics_lines(stats):
+    """
+    Yields the lines of the statistics screen.
+
+    Parameters:
+        stats (dict): The summary from TravelStore.statistics().
+    """
+    yield (f"Countries visited: {stats['visited_countries']} of "
+           f"{stats['valid_countries']} ({stats['coverage']:.1%} of the "
+           "world)")
+    yield f"Trips taken: {stats['visited_trips']}"
+    yield (f"Wishlist: {stats['wishlist_trips']} trips to "
+           f"{stats['wishlist_countries']} countries")
+
+    yield "\n\033[1;32mMost visited countries:\033[0m"
+    if not stats["most_visited"]:
+        yield "No country visited more than once yet."
+    for country, visits in stats["most_visited"]:
+        yield f"- {country}: {visits} visits"
+
+    yield (f"\n\033[1;33mComing up in the next {stats['upcoming_days']} "
+           "days:\033[0m")
+    if not stats["upcoming"]:
+        yield "Nothing planned yet."
+    for country, date in stats["upcoming"]:
+        yield f"- {country} on {date}"
+
+    yield "\n\033[1;36mVisits per year:\033[0m"
+    if not stats["visits_per_year"]:
+        yield "No visits yet."
+    most = max((visits for _, visits in stats["visits_per_year"]), default=1)
+    for year, visits in stats["visits_per_year"]:
+        bar = "#" * max(1, round(visits / most * 30))
+        yield f"{year}  {bar} {visits}"
+
+
+def geography_lines():
+    """
+    Yields the lines of the statistics screen about where the trips went.
+    """
+    yield (f"\n\033[1;35mDistance travelled:\033[0m "
+           f"{store.distance_travelled():,.0f} km between country centres")
+
+    yield "\n\033[1;35mContinents visited:\033[0m"
+    for continent, group in store.region_coverage()["continents"].items():
+        yield (f"{continent:<14} {group['countries']:>3} of {group['of']:<3}"
+               f" ({group['share']:.0%})")
+
+    nearest = store.nearest_wishlist(count=3)
+    if nearest:
+        yield "\n\033[1;35mNearest wishlist countries not yet visited:\033[0m"
+        for country, km in nearest:
+            yield f"- {country}: {km:,.0f} km"
+
+
+@instrument()
+def show_statistics():
+    """
+    Shows the travel statistics, kept up to date as records change so
+    they appear instantly however many records there are.
+
+    Returns:
+        str: The next screen, 'menu'.
+    """
+    clear_terminal()
+    while True:
+        days = input("\nShow wishlist trips for how many days ahead? "
+                     "(press Enter for 30): ").strip()
+        if not days:
+            days = "30"
+        if days.isdigit() and int(days) > 0:
+            break
+        print("\nPlease enter a whole number greater than 0.")
+
+    show_pages(["\nYour travel statistics:\n"],
+               chain(statistics_lines(store.statistics(days=int(days))),
+                     geography_lines()))
+    input("\nPress Enter to return to the main menu...")
+    clear_terminal()
+    return "menu"
+
+
+@instrument()
+def import_export_records():
+    """
+    Imports records from, or exports them to, a CSV or JSON Lines file.
+    Rejected rows are written to a report instead of stopping the import.
+
+    Returns:
+        str: The next screen, 'menu'.
+    """
+    global STORED_AGE  # The import checks visits against the birth year
+    from bulk_io import import_records, export_records, detect_format
+    clear_terminal()
+    while True:
+        action = input("\nDo you want to import or export? (import/export): "
+                       ).strip().lower()
+        if action in ("import", "export"):
+            break
+        print("\nPlease enter 'import' or 'export'.")
+
+    while True:
+        path = input("\nFile path (.csv or .jsonl): ").strip()
+        try:
+            detect_format(path)
+        except ValueError as error:
+            print(f"\n{error}")
+            continue
+        if action == "export" or os.path.isfile(path):
+            break
+        print(f"\nCould not find {path}.")
+
+    if action == "export":
+        written = export_records(path, store.data)
+        count_records(written)
+        print(f"\nExported {written} records to {path}.")
+        return "menu"
+
+    if STORED_AGE is None:
+        STORED_AGE = validate_age()
+    report_path = path + ".rejected.csv"
+    print("\nImporting, please wait...")
+    imported, rejected, merged = import_records(
+        path, store.add_record, store.countries, age=STORED_AGE,
+        report_path=report_path)
+    store.commit()
+    count_records(imported + rejected + merged)
+    print(f"\nImported {imported} records.")
+    if merged:
+        print(f"\n{merged} rows were trips you already had.")
+    if rejected:
+        print(f"\n{rejected} rows were rejected. See {report_path}.")
+    return "menu"
+
+
+def main_menu():
+    """
+    Shows the menu and returns the screen the user picked.
+    """
+    display_menu()
+    choice = input("\nChoose an option from the list (1-8): ").strip()
+    if choice in MENU_CHOICES:
+        return MENU_CHOICES[choice]
+    print("Invalid choice, please try again.")
+    return "menu"
+
+
+def say_goodbye():
+    """
+    Shows the goodbye message. Returns None, which ends the app.
+    """
+    print("\nThank you for using the Travel Tracker! 🌍\n")
+    print("We hope your next adventure is unforgettable! 👋\n")
+
+
+# Menu numbers mapped to the screen they open
+MENU_CHOICES = {
+    "1": "add",
+    "2": "delete",
+    "3": "search",
+    "4": "sort",
+    "5": "display",
+    "6": "import-export",
+    "7": "statistics",
+    "8": "exit",
+}
+
+# Every screen of the app. Each one returns the name of the next
+# screen, or None to quit.
+SCREENS = {
+    "menu": main_menu,
+    "add": add_country,
+    "delete": delete_country,
+    "search": search_country,
+    "sort": sort_records,
+    "display": display_records,
+    "import-export": import_export_records,
+    "statistics": show_statistics,
+    "exit": say_goodbye,
+}
+
+
 def travel_tracker_app():
     """
     Main function to run the Travel Tracker application.
     Provides the user with a menu to navigate through available options.
+
+    The app is a state machine: each screen returns the name of the
+    next one and this loop opens it, so screens never call each other
+    and the call stack stays flat however long the session runs.
     """
-    while True:
-        display_menu()
-        choice = input("\nChoose an option from the list (1-6): ").strip()
-        if choice == "1":
-            add_country()
-        elif choice == "2":
-            delete_country()
-        elif choice == "3":
-            search_country()
-        elif choice == "4":
-            sort_records()
-        elif choice == "5":
-            display_records()
-        elif choice == "6":
-            print("\nThank you for using the Travel Tracker! 🌍\n")
-            print("We hope your next adventure is unforgettable! 👋\n")
-            sys.exit()
+    global store  # Shared by every menu action
+    store = TravelStore.open()
+    atexit.register(store.close)
+
+    screen = "menu"
+    while screen is not None:
+        store.commit()  # One fsync per menu action, not per keystroke
+        screen = SCREENS[screen]()
+
+
+def run_commands(path, age=None):
+    """
+    Runs batch commands from a file, or from stdin when the path is
+    '-', without any prompts. See commands.py for the commands.
+
+    Returns:
+        int: The exit status, 1 if any command failed.
+    """
+    from commands import CommandRunner
+    batch_store = TravelStore.open()
+    try:
+        runner = CommandRunner(batch_store, age=age)
+        if path == "-":
+            done, failed = runner.run(sys.stdin)
         else:
-            print("Invalid choice, please try again.")
+            with open(path, encoding="utf-8") as file:
+                done, failed = runner.run(file)
+    finally:
+        batch_store.close()
+    if failed:
+        print(f"{failed} of {done} commands failed.", file=sys.stderr)
+    return 1 if failed else 0
 
 
-# Start the application
-travel_tracker_app()
+def main(argv=None):
+    """
+    Starts the interactive app, or runs batch commands with --batch.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Track the countries you have visited and want to "
+                    "visit.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) "
+                             "instead of showing the menu")
+    parser.add_argument("--age", type=int,
+                        help="your age, for the birth year check in "
+                             "batch mode")
+    parser.add_argument("--profile", action="store_true",
+                        default=profiling.requested(),
+                        help="time every operation and show a summary "
+                             "on exit")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        default=os.environ.get(profiling.PROFILE_OUTPUT_ENV),
+                        help="also run cProfile and save its stats to FILE")
+    args = parser.parse_args(argv)
+    if args.profile or args.profile_output:
+        profiling.enable(args.profile_output)
+    if args.batch:
+        return run_commands(args.batch, args.age)
+    travel_tracker_app()
+    return 0
+
 
 if __name__ == "__main__":
-    display_menu()
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Membership index of the (country, date) pairs in each category.
+
+Each category keeps a bitset per country, cut into chunks of 512 days:
+one bit per day, set when the country has a trip on that day. The
+chunks live in a dict keyed by date_index.pack_key(chunk, country ID),
+so checking whether a trip is already stored is a dict lookup and a
+bit test, O(1) instead of a scan. TravelStore uses it to merge
+duplicate adds and imports instead of storing them twice.
+
+A chunk costs about 200 bytes however many of its 512 days are used,
+so the index stays at a few MB however many trips are stored, instead
+of a hash table entry and an int object per trip.
+
+Records saved before duplicates were merged may still hold the same
+trip more than once. Only those extra copies are counted, in a small
+side Counter, so deleting one copy leaves the others known.
+"""
+
+from collections import Counter
+
+from date_index import pack_key
+
+CHUNK_BITS = 9  # 512 days per chunk
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+CHUNK_BYTES = (1 << CHUNK_BITS) // 8
+
+
+class MembershipIndex:
+    """
+    The (country, date) pairs stored in every category.
+    """
+
+    def __init__(self):
+        self._chunks = {}  # category -> {chunk key: bytearray of days}
+        self._extra = {}  # category -> Counter of extra copies of a trip
+
+    @classmethod
+    def from_records(cls, travel_data):
+        """
+        Builds an index holding every record of the given travel data.
+        """
+        index = cls()
+        for category, records in travel_data.items():
+            for country_id, ordinal in zip(records.country_ids,
+                                           records.ordinals):
+                index._add(category, country_id, ordinal)
+        return index
+
+    def _category(self, category):
+        chunks = self._chunks.get(category)
+        if chunks is None:
+            chunks = self._chunks[category] = {}
+            self._extra[category] = Counter()
+        return chunks
+
+    def contains(self, category, record):
+        """
+        Returns True if the category already holds the same trip.
+        """
+        ordinal = record.ordinal
+        bits = self._category(category).get(
+            pack_key(ordinal >> CHUNK_BITS, record.country_id))
+        day = ordinal & CHUNK_MASK
+        return bits is not None and bool(bits[day >> 3] >> (day & 7) & 1)
+
+    def _add(self, category, country_id, ordinal):
+        chunks = self._category(category)
+        key = pack_key(ordinal >> CHUNK_BITS, country_id)
+        bits = chunks.get(key)
+        if bits is None:
+            bits = chunks[key] = bytearray(CHUNK_BYTES)
+        day = ordinal & CHUNK_MASK
+        bit = 1 << (day & 7)
+        if bits[day >> 3] & bit:
+            self._extra[category][pack_key(ordinal, country_id)] += 1
+        else:
+            bits[day >> 3] |= bit
+
+    def add(self, category, record):
+        """
+        Notes a newly added record.
+        """
+        self._add(category, record.country_id, record.ordinal)
+
+    def discard(self, category, record):
+        """
+        Forgets one copy of a deleted record.
+        """
+        chunks = self._category(category)
+        extra = self._extra[category]
+        ordinal = record.ordinal
+        trip = pack_key(ordinal, record.country_id)
+        if extra[trip] > 1:
+            extra[trip] -= 1
+            return
+        if trip in extra:
+            del extra[trip]
+            return
+        key = pack_key(ordinal >> CHUNK_BITS, record.country_id)
+        bits = chunks.get(key)
+        if bits is None:
+            return
+        day = ordinal & CHUNK_MASK
+        bits[day >> 3] &= ~(1 << (day & 7)) & 0xFF
+        if not any(bits):
+            del chunks[key]
+
+    def discard_many(self, category, records):
+        """
+        Forgets a batch of deleted records.
+        """
+        for record in records:
+            self.discard(category, record)
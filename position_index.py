@@ -0,0 +1,139 @@
+"""
+Position index for deleting travel records without scanning.
+
+Maps each country ID to the positions of its records in the category
+arrays, so a record can be found with a dictionary lookup. Deleting
+moves the last record of the list into the freed slot instead of
+shifting everything after it, which makes a delete O(1).
+
+The positions are kept in typed arrays like the records themselves:
+an array('I') of positions per country, plus a column holding, for
+each record, its slot in that country's array so it can be swapped
+out in O(1). That is about 8 bytes per trip.
+
+Deleting many records at once (a list of countries, everything before
+a date, ...) is done in a single pass over the records.
+"""
+
+from array import array
+
+
+class PositionIndex:
+    """
+    Country -> record positions for every category of the travel data.
+
+    Parameters:
+        travel_data (dict): Category name mapped to its RecordArray.
+    """
+
+    def __init__(self, travel_data):
+        self.travel_data = travel_data
+        self._positions = {}  # category -> {country ID: array of positions}
+        self._slots = {}  # category -> slot of each record in its array
+        for category in travel_data:
+            self.rebuild(category)
+
+    def rebuild(self, category):
+        """
+        Re-indexes every record of a category from scratch.
+        """
+        positions = self._positions[category] = {}
+        slots = self._slots[category] = array("I")
+        for position, country_id in enumerate(
+                self.travel_data[category].country_ids):
+            bucket = positions.get(country_id)
+            if bucket is None:
+                bucket = positions[country_id] = array("I")
+            slots.append(len(bucket))
+            bucket.append(position)
+
+    def add(self, category, record):
+        """
+        Indexes a record that was just appended to its category.
+        """
+        positions = self._positions.get(category)
+        if positions is None:
+            positions = self._positions[category] = {}
+            self._slots[category] = array("I")
+        bucket = positions.get(record.country_id)
+        if bucket is None:
+            bucket = positions[record.country_id] = array("I")
+        self._slots[category].append(len(bucket))
+        bucket.append(len(self.travel_data[category]) - 1)
+
+    def find(self, category, country_id):
+        """
+        Returns the position of a record for the country ID, or None.
+
+        When the country has several records the most recently indexed
+        one is returned, so it can be removed without a scan.
+        """
+        bucket = self._positions.get(category, {}).get(country_id)
+        return bucket[-1] if bucket else None
+
+    def positions(self, category, country_id):
+        """
+        Returns the positions of the country ID's records, as the
+        index's own typed array; it must not be changed.
+        """
+        return self._positions.get(category, {}).get(country_id, ())
+
+    def count(self, category, country_id):
+        """
+        Returns how many records the country ID has in the category.
+        """
+        return len(self._positions.get(category, {}).get(country_id, ()))
+
+    def _unlink(self, category, country_id, position):
+        """
+        Drops one position from a country's array, moving the country's
+        last position into its slot.
+        """
+        positions = self._positions[category]
+        slots = self._slots[category]
+        bucket = positions[country_id]
+        slot = slots[position]
+        moved = bucket.pop()
+        if slot < len(bucket):
+            bucket[slot] = moved
+            slots[moved] = slot
+        if not bucket:
+            del positions[country_id]
+
+    def pop(self, category, position):
+        """
+        Removes the record at a position by moving the last one into it.
+
+        Returns:
+            TravelRecord: The removed record.
+        """
+        records = self.travel_data[category]
+        slots = self._slots[category]
+        record = records[position]
+        self._unlink(category, record.country_id, position)
+
+        last = records.pop()
+        end = len(records)
+        if position < end:
+            records[position] = last
+            slot = slots[end]
+            self._positions[category][last.country_id][slot] = position
+            slots[position] = slot
+        slots.pop()
+        return record
+
+    def remove_where(self, category, predicate):
+        """
+        Removes every record matching a predicate in one pass.
+
+        Parameters:
+            category (str): The category to delete from.
+            predicate (callable): Called with each record; True deletes it.
+
+        Returns:
+            list: The removed records.
+        """
+        removed = self.travel_data[category].remove_where(predicate)
+        if removed:
+            self.rebuild(category)
+        return removed
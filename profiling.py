@@ -0,0 +1,241 @@
+"""
+Optional instrumentation for the Travel Tracker.
+
+Functions decorated with @instrument() record, for every call, how long
+it took and how many records it handled. Each operation keeps a call
+count, a record count and a latency histogram with one bucket per power
+of two of microseconds. On exit a summary table is written to stderr.
+
+Profiling is off unless it is switched on with `python3 main.py
+--profile` or the TRAVEL_TRACKER_PROFILE=1 environment variable. While
+it is off a decorated function only pays one extra call and one check,
+and count_records() returns straight away.
+
+While profiling, time spent waiting for the user at an input() prompt
+is counted apart from the time spent working, so the latencies show
+what the app itself costs. A full cProfile run can also be saved with
+--profile-output FILE (or TRAVEL_TRACKER_PROFILE_OUTPUT) and read back
+with pstats.
+"""
+
+import atexit
+import builtins
+import functools
+import os
+import sys
+import time
+
+PROFILE_ENV = "TRAVEL_TRACKER_PROFILE"
+PROFILE_OUTPUT_ENV = "TRAVEL_TRACKER_PROFILE_OUTPUT"
+BUCKETS = 32  # Up to 2 ** 31 microseconds, about 36 minutes
+TOP_FUNCTIONS = 15  # Lines of the cProfile listing shown on exit
+
+# The active Recorder; None while profiling is off
+_recorder = None
+
+
+class OperationStats:
+    """
+    The counts and latency histogram of one operation.
+    """
+
+    __slots__ = ("calls", "records", "busy", "waiting", "slowest",
+                 "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.records = 0
+        self.busy = 0.0      # seconds spent working
+        self.waiting = 0.0   # seconds spent waiting for the user
+        self.slowest = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, busy, waiting, records):
+        """
+        Counts one call.
+        """
+        self.calls += 1
+        self.records += records
+        self.busy += busy
+        self.waiting += waiting
+        self.slowest = max(self.slowest, busy)
+        bucket = min(int(busy * 1e6).bit_length(), BUCKETS - 1)
+        self.buckets[bucket] += 1
+
+    def percentile(self, share):
+        """
+        Returns the upper bound in seconds of the bucket holding the
+        given share (0-1) of the calls.
+        """
+        wanted = share * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) / 1e6, self.slowest)
+        return self.slowest
+
+
+class Recorder:
+    """
+    Collects the stats of every instrumented operation.
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self.waited = 0.0  # All time spent in input() so far
+        self._frames = []  # [operation, start, waited at start, records]
+
+    def start(self, name):
+        """
+        Starts timing a call of an operation.
+        """
+        self._frames.append([name, time.perf_counter(), self.waited, 0])
+
+    def stop(self):
+        """
+        Stops timing the innermost call and counts it.
+        """
+        name, start, waited, records = self._frames.pop()
+        elapsed = time.perf_counter() - start
+        waiting = self.waited - waited
+        stats = self.operations.get(name)
+        if stats is None:
+            stats = self.operations[name] = OperationStats()
+        stats.add(elapsed - waiting, waiting, records)
+
+    def count_records(self, count):
+        """
+        Adds records to the innermost call being timed.
+        """
+        if self._frames:
+            self._frames[-1][3] += count
+
+    def timed_input(self, original):
+        """
+        Wraps input() so the time spent waiting on it is not counted
+        as work.
+        """
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.waited += time.perf_counter() - start
+        return timed
+
+    def summary_lines(self):
+        """
+        Yields the summary table and the latency histograms.
+        """
+        yield (f"{'operation':<24} {'calls':>7} {'records':>9} "
+               f"{'busy s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} "
+               f"{'max ms':>9} {'waiting s':>10}")
+        ranked = sorted(self.operations.items(),
+                        key=lambda item: -item[1].busy)
+        for name, stats in ranked:
+            yield (f"{name:<24} {stats.calls:>7,} {stats.records:>9,} "
+                   f"{stats.busy:>9.3f} "
+                   f"{stats.busy / stats.calls * 1e3:>9.3f} "
+                   f"{stats.percentile(0.5) * 1e3:>9.3f} "
+                   f"{stats.percentile(0.95) * 1e3:>9.3f} "
+                   f"{stats.slowest * 1e3:>9.3f} {stats.waiting:>10.1f}")
+        yield ""
+        yield "Latency histograms (calls per busy time, up to the limit):"
+        for name, stats in ranked:
+            cells = [f"<={_duration(1 << bucket)}:{count}"
+                     for bucket, count in enumerate(stats.buckets) if count]
+            yield f"{name:<24} {' '.join(cells)}"
+
+
+def _duration(microseconds):
+    if microseconds < 1000:
+        return f"{microseconds}us"
+    if microseconds < 1000000:
+        return f"{microseconds / 1000:g}ms"
+    return f"{microseconds / 1000000:g}s"
+
+
+def instrument(name=None):
+    """
+    Decorates a function so its calls are recorded while profiling.
+
+    Parameters:
+        name (str): The operation name. Defaults to the function's name.
+    """
+    def decorate(func):
+        operation = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            recorder.start(operation)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.stop()
+        return wrapper
+    return decorate
+
+
+def count_records(count):
+    """
+    Notes how many records the operation being timed has handled.
+    """
+    if _recorder is not None:
+        _recorder.count_records(count)
+
+
+def requested():
+    """
+    Returns True if profiling was asked for in the environment.
+    """
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def enable(output=None, stream=None):
+    """
+    Switches profiling on until the program exits.
+
+    Parameters:
+        output (str): Where the cProfile stats are saved. cProfile only
+            runs when this is given, as it slows every call down.
+        stream: Where the summary is written on exit. Defaults to stderr.
+    """
+    global _recorder
+    if _recorder is not None:
+        return _recorder
+    _recorder = Recorder()
+    builtins.input = _recorder.timed_input(builtins.input)
+
+    profiler = None
+    if output:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    atexit.register(report, profiler, output, stream)
+    return _recorder
+
+
+def report(profiler=None, output=None, stream=None):
+    """
+    Writes the summary table, and saves and lists the cProfile stats.
+    """
+    stream = stream or sys.stderr
+    if _recorder is None:
+        return
+    print("\nProfile of this session:", file=stream)
+    for line in _recorder.summary_lines():
+        print(line, file=stream)
+    if profiler is None:
+        return
+    profiler.disable()
+    profiler.dump_stats(output)
+    import pstats
+    print(f"\ncProfile stats saved to {output}. Slowest functions:",
+          file=stream)
+    pstats.Stats(output, stream=stream).sort_stats(
+        "cumulative").print_stats(TOP_FUNCTIONS)
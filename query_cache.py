@@ -0,0 +1,95 @@
+"""
+Cache of query results for the Travel Tracker.
+
+People tend to run the same search or sort again and again between
+changes. Results are kept under (operation, arguments) together with
+the version of each category they were read from; every change to a
+category bumps its version, so a stale result is never returned and
+nothing has to be cleared by hand.
+
+The cache is bounded by the total number of rows it holds, not by the
+number of results, so a few large sorts cannot pile up megabytes of
+tuples: the least recently used results are dropped until the rows
+fit. Every result also counts one row for itself, so empty results
+cannot pile up either.
+
+Results are stored as tuples, so they cannot be changed through the
+cache, and results longer than max_rows are not kept at all. Typed
+arrays, such as the record positions of a sort, are kept as they are:
+a row of one is a few bytes rather than a tuple of strings.
+"""
+
+from array import array
+from collections import OrderedDict
+
+CACHE_MAX_ROWS = 20000  # Rows kept in all the results of one cache
+
+MISS = object()  # Returned by get() when there is no usable result
+
+
+class QueryCache:
+    """
+    A bounded LRU cache of query results checked against versions.
+
+    Parameters:
+        max_rows (int): How many rows all the cached results may hold
+            together; 0 turns the cache off. Longer results are not
+            cached.
+    """
+
+    def __init__(self, max_rows=CACHE_MAX_ROWS):
+        self.max_rows = max_rows
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (versions, result)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, versions):
+        """
+        Returns the cached result of a query, or MISS.
+
+        Parameters:
+            key (tuple): (operation, arguments...).
+            versions (tuple): The current versions of the categories
+                the query reads.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != versions:
+            self.misses += 1
+            return MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, versions, result):
+        """
+        Caches a query result, dropping the least recently used ones
+        until the rows fit.
+
+        Returns:
+            tuple: The result as stored, or the array if it was one.
+        """
+        if not isinstance(result, array):
+            result = tuple(result)
+        rows = len(result) + 1
+        if rows > self.max_rows:
+            return result
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.rows -= len(old[1]) + 1
+        self._entries[key] = (versions, result)
+        self.rows += rows
+        while self.rows > self.max_rows:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.rows -= len(dropped) + 1
+        return result
+
+    def clear(self):
+        """
+        Drops every cached result.
+        """
+        self._entries.clear()
+        self.rows = 0
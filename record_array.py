@@ -0,0 +1,186 @@
+"""
+Compact storage for the travel records of one category.
+
+Instead of one dict with two strings per trip, a category keeps two
+parallel typed arrays: the country as a small integer ID (its position
+in the valid country list) and the date as an int32 day ordinal. That
+is 6 bytes per trip instead of several hundred, and sorting, searching
+and comparing work on integers rather than strings.
+
+Records are handed out as light TravelRecord objects that can still be
+read like the old dicts (record["country"], record["date"]).
+"""
+
+from array import array
+
+from date_parser import date_to_ordinal, ordinal_to_date
+
+
+class TravelRecord:
+    """
+    One trip, read from or written to a RecordArray.
+    """
+
+    __slots__ = ("country_id", "ordinal", "_countries")
+
+    def __init__(self, country_id, ordinal, countries):
+        self.country_id = country_id
+        self.ordinal = ordinal
+        self._countries = countries
+
+    @property
+    def country(self):
+        """
+        The country name.
+        """
+        return self._countries[self.country_id]
+
+    @property
+    def date(self):
+        """
+        The date as a dd-mm-yyyy string.
+        """
+        return ordinal_to_date(self.ordinal)
+
+    def __getitem__(self, key):
+        if key == "country":
+            return self.country
+        if key == "date":
+            return self.date
+        raise KeyError(key)
+
+    def __eq__(self, other):
+        if isinstance(other, TravelRecord):
+            return (self.country_id == other.country_id and
+                    self.ordinal == other.ordinal)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.country_id, self.ordinal))
+
+    def __repr__(self):
+        return f"TravelRecord({self.country!r}, {self.date!r})"
+
+
+class RecordArray:
+    """
+    The records of one category, stored as parallel integer arrays.
+
+    Parameters:
+        countries (list): The valid country names; a record's country
+            ID is its position in this list.
+    """
+
+    def __init__(self, countries):
+        self.countries = countries
+        self._ids = {name: position
+                     for position, name in enumerate(countries)}
+        self.country_ids = array("H")  # uint16 country IDs
+        self.ordinals = array("i")     # int32 day ordinals
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def _record(self, position):
+        return TravelRecord(self.country_ids[position],
+                            self.ordinals[position], self.countries)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("record index out of range")
+        return self._record(position)
+
+    def __setitem__(self, position, record):
+        self.country_ids[position] = record.country_id
+        self.ordinals[position] = record.ordinal
+
+    def __iter__(self):
+        countries = self.countries
+        for country_id, ordinal in zip(self.country_ids, self.ordinals):
+            yield TravelRecord(country_id, ordinal, countries)
+
+    def country_id(self, name):
+        """
+        Returns the ID of a country name, or None if it is not valid.
+        """
+        return self._ids.get(name)
+
+    def make_record(self, record):
+        """
+        Converts a {"country", "date"} mapping into a TravelRecord.
+        """
+        if isinstance(record, TravelRecord):
+            return record
+        return TravelRecord(
+            self._ids[record["country"]],
+            date_to_ordinal(record["date"]),
+            self.countries)
+
+    def append(self, record):
+        """
+        Stores a record given as a TravelRecord or a dict.
+
+        Returns:
+            TravelRecord: The record as stored.
+        """
+        record = self.make_record(record)
+        self.country_ids.append(record.country_id)
+        self.ordinals.append(record.ordinal)
+        return record
+
+    def pop(self):
+        """
+        Removes and returns the last record.
+        """
+        record = self[-1]
+        self.country_ids.pop()
+        self.ordinals.pop()
+        return record
+
+    def remove_where(self, predicate):
+        """
+        Removes every record matching a predicate in one pass.
+
+        Returns:
+            list: The removed records.
+        """
+        kept_ids, kept_ordinals = array("H"), array("i")
+        removed = []
+        for record in self:
+            if predicate(record):
+                removed.append(record)
+            else:
+                kept_ids.append(record.country_id)
+                kept_ordinals.append(record.ordinal)
+        self.country_ids, self.ordinals = kept_ids, kept_ordinals
+        return removed
+
+    def country_order(self, reverse=False):
+        """
+        Returns the record positions in country name order.
+
+        Country IDs are few, so this is a bucket sort: O(n) rather
+        than a comparison sort of the names.
+
+        Returns:
+            array: uint32 positions, 4 bytes per record.
+        """
+        buckets = [array("I") for _ in self.countries]
+        for position, country_id in enumerate(self.country_ids):
+            buckets[country_id].append(position)
+        names = [name.lower() for name in self.countries]
+        order = sorted(range(len(names)), key=names.__getitem__,
+                       reverse=reverse)
+        positions = array("I")
+        for country_id in order:
+            positions.extend(buckets[country_id])
+        return positions
+
+    def by_country(self, reverse=False):
+        """
+        Yields the records in country name order.
+        """
+        for position in self.country_order(reverse):
+            yield self._record(position)
@@ -0,0 +1,126 @@
+"""
+Terminal output for the Travel Tracker.
+
+Screens are built up in memory and sent to the terminal with a single
+write, and the screen is cleared with an ANSI escape sequence instead
+of starting a 'clear' process. Long record lists are shown one page
+at a time from a generator, so only the page on screen is ever
+formatted.
+"""
+
+import os
+import shutil
+import sys
+from itertools import chain, islice
+
+CLEAR_SCREEN = "\033[2J\033[3J\033[H"
+
+# Set once the Windows console has been switched to ANSI mode
+_ansi_ready = os.name != "nt"
+
+
+def _enable_ansi():
+    """
+    Switches the Windows console to ANSI mode before the first draw,
+    so importing this module has no side effects.
+    """
+    global _ansi_ready
+    if not _ansi_ready:
+        _ansi_ready = True
+        os.system("")
+
+
+def clear_screen(stream=None):
+    """
+    Clears the terminal without spawning a process.
+    """
+    _enable_ansi()
+    stream = stream or sys.stdout
+    stream.write(CLEAR_SCREEN)
+    stream.flush()
+
+
+def page_size():
+    """
+    Returns how many record lines fit on the terminal, leaving room
+    for the title and the prompt.
+    """
+    return max(shutil.get_terminal_size().lines - 8, 5)
+
+
+class Screen:
+    """
+    Collects the lines of one screen and writes them in one go.
+
+    Parameters:
+        stream: Where the screen is written. Defaults to stdout.
+        clear (bool): Clear the terminal before the screen is drawn.
+    """
+
+    def __init__(self, stream=None, clear=False):
+        _enable_ansi()
+        self.stream = stream or sys.stdout
+        self._parts = [CLEAR_SCREEN] if clear else []
+
+    def add(self, *lines):
+        """
+        Adds lines to the screen.
+        """
+        for line in lines:
+            self._parts.append(line)
+            self._parts.append("\n")
+
+    def flush(self):
+        """
+        Writes everything collected so far with a single write.
+        """
+        self.stream.write("".join(self._parts))
+        self.stream.flush()
+        self._parts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+
+def show_pages(title_lines, lines, empty="No records found.", size=None,
+               ask=None, stream=None):
+    """
+    Shows lines a page at a time, pulling each page from the iterable
+    only when it is about to be displayed.
+
+    Parameters:
+        title_lines (list): Lines shown at the top of every page.
+        lines (iterable): The lines to page through; may be a generator.
+        empty (str): Shown when there are no lines at all.
+        size (int): Lines per page. Defaults to the terminal height.
+        ask (callable): Reads the user's answer between pages. Defaults
+            to input().
+        stream: Where the pages are written. Defaults to stdout.
+
+    Returns:
+        int: How many lines were shown.
+    """
+    size = size or page_size()
+    ask = ask or input
+    lines = iter(lines)
+    page = list(islice(lines, size))
+    shown = 0
+    number = 1
+    while True:
+        following = list(islice(lines, 1))  # Peek: is there another page?
+        with Screen(stream, clear=True) as screen:
+            screen.add(*title_lines)
+            screen.add(*(page or [empty]))
+        shown += len(page)
+        if not following:
+            return shown
+        answer = ask(f"\nPage {number}. Press Enter for more, "
+                     "or type 'q' to stop: ").strip().lower()
+        if answer == "q":
+            return shown
+        page = list(islice(chain(following, lines), size))
+        number += 1
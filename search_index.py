@@ -0,0 +1,186 @@
+"""
+Inverted index used to search the travel records by country name.
+
+Each distinct country name in the records is broken into its 1, 2 and
+3 character n-grams. A substring query only has to intersect the
+postings of its own n-grams and confirm the few candidate names,
+instead of scanning every record. A sorted list of the names answers
+prefix queries with a binary search.
+
+The index is kept up to date record by record as countries are added
+and deleted. It only counts the records of each country per category;
+the dates of the matches are read from the records through the
+position index, so the index holds nothing per trip.
+"""
+
+from bisect import bisect_left, insort
+from itertools import islice
+
+from date_parser import ordinal_to_date
+
+GRAM_SIZE = 3
+
+
+def _grams(text, size):
+    """
+    Returns every n-gram of the given size found in the text.
+    """
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _all_grams(text):
+    """
+    Returns the 1, 2 and 3 character n-grams of the text.
+    """
+    grams = set()
+    for size in range(1, GRAM_SIZE + 1):
+        grams |= _grams(text, size)
+    return grams
+
+
+class SearchIndex:
+    """
+    Substring and prefix index over the country names of the records.
+
+    Parameters:
+        travel_data (dict): Category name mapped to its RecordArray.
+        positions (PositionIndex): The positions of every country's
+            records in travel_data.
+        countries (list): The valid country names, indexed by country ID.
+    """
+
+    def __init__(self, travel_data, positions, countries):
+        self.travel_data = travel_data
+        self.positions = positions
+        self.countries = countries
+        self._keys = [name.lower() for name in countries]
+        self._postings = {}      # n-gram -> set of country IDs
+        self._entries = {}       # country ID -> {category: record count}
+        self._sorted_keys = []   # (name key, country ID), for prefix queries
+
+    @classmethod
+    def from_records(cls, travel_data, positions, countries):
+        """
+        Builds an index holding every record of the given travel data.
+        """
+        index = cls(travel_data, positions, countries)
+        for category, records in travel_data.items():
+            for country_id in records.country_ids:
+                index._add(category, country_id)
+        return index
+
+    def add(self, category, record):
+        """
+        Indexes a newly added record.
+        """
+        self._add(category, record.country_id)
+
+    def _add(self, category, country_id):
+        entries = self._entries.get(country_id)
+        if entries is None:
+            entries = self._entries[country_id] = {}
+            key = self._keys[country_id]
+            insort(self._sorted_keys, (key, country_id))
+            for gram in _all_grams(key):
+                self._postings.setdefault(gram, set()).add(country_id)
+        entries[category] = entries.get(category, 0) + 1
+
+    def discard(self, category, record):
+        """
+        Removes a deleted record from the index.
+        """
+        entries = self._entries.get(record.country_id)
+        if not entries or category not in entries:
+            return
+        entries[category] -= 1
+        if not entries[category]:
+            del entries[category]
+        if not entries:
+            self._drop_country(record.country_id)
+
+    def discard_many(self, category, records):
+        """
+        Removes a batch of deleted records from the index.
+        """
+        for record in records:
+            self.discard(category, record)
+
+    def _drop_country(self, country_id):
+        """
+        Forgets a country that has no records left.
+        """
+        del self._entries[country_id]
+        key = self._keys[country_id]
+        del self._sorted_keys[bisect_left(self._sorted_keys,
+                                          (key, country_id))]
+        for gram in _all_grams(key):
+            postings = self._postings[gram]
+            postings.discard(country_id)
+            if not postings:
+                del self._postings[gram]
+
+    def _matches(self, country_ids):
+        """
+        Expands country IDs into (category, country, date) results.
+        """
+        results = []
+        for country_id in country_ids:
+            country = self.countries[country_id]
+            for category in self._entries[country_id]:
+                ordinals = self.travel_data[category].ordinals
+                for ordinal in sorted(
+                        ordinals[position] for position in
+                        self.positions.positions(category, country_id)):
+                    results.append((category, country,
+                                    ordinal_to_date(ordinal)))
+        return results
+
+    def search(self, query):
+        """
+        Finds the records whose country name contains the query.
+
+        Parameters:
+            query (str): The text to look for, in any case.
+
+        Returns:
+            list: (category, country, date) tuples for every match.
+        """
+        query = query.lower()
+        if not query:
+            return self._matches(
+                country_id for _, country_id in self._sorted_keys)
+        size = min(len(query), GRAM_SIZE)
+        candidates = None
+        # Intersect the rarest postings first
+        for gram in sorted(_grams(query, size),
+                           key=lambda g: len(self._postings.get(g, ()))):
+            postings = self._postings.get(gram)
+            if not postings:
+                return []
+            candidates = (set(postings) if candidates is None
+                          else candidates & postings)
+            if not candidates:
+                return []
+        return self._matches(sorted(
+            (country_id for country_id in candidates
+             if query in self._keys[country_id]),
+            key=self._keys.__getitem__))
+
+    def prefix_search(self, prefix):
+        """
+        Finds the records whose country name starts with the prefix.
+
+        Parameters:
+            prefix (str): The start of a country name, in any case.
+
+        Returns:
+            list: (category, country, date) tuples for every match.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self._sorted_keys, (prefix,))
+        country_ids = []
+        for key, country_id in islice(self._sorted_keys, start, None):
+            if not key.startswith(prefix):
+                break
+            country_ids.append(country_id)
+        return self._matches(country_ids)
@@ -0,0 +1,695 @@
+"""
+Network service for the Travel Tracker, for many users at once.
+
+Clients talk to the service over TCP with a line protocol: each
+request is one JSON object on its own line, and each answer is one
+JSON line sent back in the same order.
+
+    {"id": 1, "user": "ana", "op": "add",
+     "args": {"category": "visited", "country": "France",
+              "date": "14-07-2019"}}
+    {"id": 1, "ok": true, "result": {"country": "France", ...}}
+
+Connections are kept open for as many requests as the client likes,
+and a client may send several requests without waiting for the
+answers (pipelining).
+
+Every user has their own TravelStore and age. The users are split
+over a number of shards by a hash of their name, and each shard is a
+worker process that owns its users' stores, so requests for
+different shards run in parallel. Requests that arrive while a shard
+is busy are sent to it together as one batch, and the stores touched
+by a batch are committed with one fsync each.
+
+Operations (the arguments go in "args"):
+    ping                                      -> "pong"
+    set_age    age                            -> the age
+    add        category, country, date        -> the stored record, with
+                                                 "duplicate": true if it
+                                                 was already stored
+    delete     category, and one of country, countries (a list) or
+               before (a date)                -> {"deleted": n}
+    search     query, prefix (optional bool)  -> [[category, country,
+                                                  date], ...]
+    sort       category, order, offset, limit -> {"total": n,
+                                                  "records": [...]}
+    display    offset, limit                  -> {"lines": [...]}
+    stats      days, top (both optional)      -> totals, coverage,
+                                                 visits per year, most
+                                                 visited, upcoming
+
+offset and limit are whole numbers; limit is 100 by default and at
+most MAX_LIMIT.
+
+Usage:
+    python3 service.py --port 8765 --shards 4 --data-dir ./users
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+
+from countries import VALID_COUNTRIES, CountryResolver
+from date_parser import DateRules
+from query_cache import QueryCache
+from travel_store import CATEGORIES, TravelStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_SIZE = 256           # Requests sent to a shard in one go
+PIPELINE_DEPTH = 128       # Unanswered requests allowed per connection
+IDLE_TIMEOUT = 300         # Seconds before an idle connection is closed
+LINE_LIMIT = 64 * 1024     # Longest request line accepted
+MAX_OPEN_STORES = 256      # Saved stores kept open per shard
+CACHE_ROWS = 1000          # Query result rows cached per user's store
+DEFAULT_LIMIT = 100        # Records returned by sort/display by default
+MAX_LIMIT = 1000           # Most records returned by one sort/display
+MAX_OFFSET = 10 ** 9       # Furthest a sort/display page may start
+MAX_USER_LENGTH = 64
+
+# Set in each shard process by _init_shard
+_SHARD = {}
+
+
+class UserState:
+    """
+    One user's store and age inside a shard.
+    """
+
+    __slots__ = ("store", "age")
+
+    def __init__(self, store):
+        self.store = store
+        self.age = None
+
+
+def shard_for(user, shards):
+    """
+    Returns the shard a user belongs to; the same on every run.
+    """
+    return zlib.crc32(user.encode("utf-8")) % shards
+
+
+def user_directory(data_dir, user):
+    """
+    Returns the folder of a user's saved store.
+
+    The name is made safe for the file system and a hash of the real
+    name is added, so different users never share a folder.
+    """
+    safe = "".join(char if char.isalnum() or char in "-_" else "_"
+                   for char in user)[:40]
+    return os.path.join(data_dir,
+                        f"{safe}-{zlib.crc32(user.encode('utf-8')):08x}")
+
+
+def _init_shard(data_dir, countries):
+    """
+    Sets up the user table of a shard process, with one country
+    resolver shared by all its users.
+    """
+    _SHARD["data_dir"] = data_dir
+    _SHARD["countries"] = countries
+    _SHARD["resolver"] = CountryResolver(countries)
+    _SHARD["users"] = OrderedDict()
+    if multiprocessing.parent_process() is not None:
+        # Ctrl+C reaches the whole process group; the server shuts the
+        # shards down itself
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _user_state(user):
+    """
+    Returns a user's state, opening or creating their store.
+
+    Saved stores are closed again, least recently used first, once
+    more than MAX_OPEN_STORES are open.
+    """
+    users = _SHARD["users"]
+    state = users.get(user)
+    if state is not None:
+        users.move_to_end(user)
+        return state
+
+    data_dir = _SHARD["data_dir"]
+    directory = user_directory(data_dir, user) if data_dir else None
+    store = TravelStore(directory, _SHARD["countries"], _SHARD["resolver"])
+    # Many stores share a shard, so each gets a small cache
+    store.cache = QueryCache(CACHE_ROWS)
+    state = users[user] = UserState(store)
+    if data_dir and len(users) > MAX_OPEN_STORES:
+        _, oldest = users.popitem(last=False)
+        oldest.store.close()
+    return state
+
+
+def _page(iterable, args):
+    """
+    Applies the offset and limit arguments to an iterable.
+
+    Raises:
+        ValueError: If either is not a whole number within its limit.
+    """
+    offset = args.get("offset", 0)
+    limit = args.get("limit", DEFAULT_LIMIT)
+    for name, value, highest in (("offset", offset, MAX_OFFSET),
+                                 ("limit", limit, MAX_LIMIT)):
+        if (not isinstance(value, int) or isinstance(value, bool) or
+                not 0 <= value <= highest):
+            raise ValueError(f"'{name}' must be a whole number from 0 "
+                             f"to {highest}")
+    return list(islice(iterable, offset, offset + limit))
+
+
+def _text(args, name):
+    """
+    Returns a string argument.
+
+    Raises:
+        ValueError: If it is missing or not a string.
+    """
+    value = args.get(name)
+    if not isinstance(value, str):
+        raise ValueError(f"'{name}' must be a string")
+    return value
+
+
+def _category(args):
+    """
+    Returns the category argument, checked.
+    """
+    category = args.get("category")
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown category '{category}'. "
+                         "Use 'visited' or 'wishlist'.")
+    return category
+
+
+def _op_ping(state, args, today):
+    """
+    Checks that the service is up.
+    """
+    return "pong"
+
+
+def _op_set_age(state, args, today):
+    """
+    Sets the user's age, used for the birth year check on visits.
+    """
+    age = args.get("age")
+    if not isinstance(age, int) or not 1 <= age <= 120:
+        raise ValueError("Please enter a valid age between 1 and 120.")
+    state.age = age
+    return age
+
+
+def _op_add(state, args, today):
+    """
+    Adds a trip after the same checks as the app's add menu.
+    """
+    category = _category(args)
+    country = _text(args, "country")
+    date_text = _text(args, "date")
+    age = state.age if category == "visited" else None
+    _, reason = DateRules(age, today).check(category, date_text)
+    if reason:
+        raise ValueError(reason)
+    record = state.store.add(category, country, date_text)
+    if record is None:  # Already stored; merged rather than added twice
+        return {"category": category,
+                "country": state.store.resolver.resolve(country),
+                "date": date_text, "duplicate": True}
+    return {"category": category, "country": record.country,
+            "date": record.date}
+
+
+def _op_delete(state, args, today):
+    """
+    Deletes one country, a list of countries or every trip before a
+    date.
+    """
+    category = _category(args)
+    store = state.store
+    if "countries" in args:
+        countries = args["countries"]
+        if not (isinstance(countries, list) and
+                all(isinstance(country, str) for country in countries)):
+            raise ValueError("'countries' must be a list of strings")
+        deleted = len(store.delete_countries(category, countries))
+    elif "before" in args:
+        deleted = len(store.delete_before(category, _text(args, "before")))
+    elif "country" in args:
+        deleted = int(store.delete(category, _text(args, "country"))
+                      is not None)
+    else:
+        raise ValueError("delete needs 'country', 'countries' or 'before'")
+    return {"deleted": deleted}
+
+
+def _op_search(state, args, today):
+    """
+    Finds the user's trips by part or the start of a country name.
+    """
+    query = _text(args, "query").strip()
+    if not query:
+        raise ValueError("search needs a 'query'")
+    if args.get("prefix"):
+        return state.store.prefix_search(query)
+    return state.store.search(query)
+
+
+def _op_sort(state, args, today):
+    """
+    Returns a page of a category in one of the sort orders.
+    """
+    category = _category(args)
+    records = state.store.sorted_records(category, args.get("order", "az"))
+    return {"total": len(state.store.data[category]),
+            "records": _page(records, args)}
+
+
+def _op_display(state, args, today):
+    """
+    Returns a page of the lines listing every record.
+    """
+    return {"lines": _page(state.store.display_lines(), args)}
+
+
+def _op_stats(state, args, today):
+    """
+    Returns the user's travel statistics.
+    """
+    days = args.get("days", 30)
+    top = args.get("top", 5)
+    if not (isinstance(days, int) and isinstance(top, int) and
+            days >= 0 and top >= 0):
+        raise ValueError("'days' and 'top' must be whole numbers")
+    return state.store.stats.summary(days, top, today)
+
+
+OPERATIONS = {
+    "ping": _op_ping,
+    "set_age": _op_set_age,
+    "add": _op_add,
+    "delete": _op_delete,
+    "search": _op_search,
+    "sort": _op_sort,
+    "display": _op_display,
+    "stats": _op_stats,
+}
+
+
+def run_batch(requests):
+    """
+    Runs a batch of requests inside a shard.
+
+    "Today" is read once for the whole batch, and every store the
+    batch touched is committed once at the end. A request that fails,
+    for whatever reason, only fails itself, never the rest of the
+    batch.
+
+    Parameters:
+        requests (list): (user, op, args) tuples.
+
+    Returns:
+        list: (ok, result or error message) for each request.
+    """
+    today = date.today()
+    results = []
+    touched = {}
+    for user, op, args in requests:
+        try:
+            state = _user_state(user)
+            touched[user] = state.store  # Commit even a partial change
+            results.append((True, OPERATIONS[op](state, args, today)))
+        except (ValueError, TypeError) as error:
+            results.append((False, str(error)))
+        except Exception as error:  # pylint: disable=broad-except
+            results.append((False, f"internal error: {error!r}"))
+    for store in touched.values():
+        store.commit()
+    return results
+
+
+def close_shard():
+    """
+    Commits and closes every store of the shard.
+    """
+    for state in _SHARD.get("users", {}).values():
+        state.store.close()
+    _SHARD.get("users", {}).clear()
+
+
+class Shard:
+    """
+    Feeds the requests of one shard to its worker process in batches.
+
+    Parameters:
+        executor: A single-process ProcessPoolExecutor, or None to run
+            the shard inside the event loop's process.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def submit(self, user, op, args):
+        """
+        Queues a request.
+
+        Returns:
+            asyncio.Future: Resolves to (ok, result or error).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(((user, op, args), future))
+        return future
+
+    async def run(self):
+        """
+        Sends everything queued while the last batch ran as one batch.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            requests = [request for request, _ in batch]
+            try:
+                if self.executor is None:
+                    results = run_batch(requests)
+                else:
+                    results = await loop.run_in_executor(
+                        self.executor, run_batch, requests)
+            except Exception as error:  # pylint: disable=broad-except
+                results = [(False, f"shard failed: {error}")] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def parse_request(request):
+    """
+    Checks a decoded request.
+
+    Returns:
+        tuple: (user, op, args)
+
+    Raises:
+        ValueError: If it is not a valid request.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    user = request.get("user")
+    op = request.get("op")
+    args = request.get("args") or {}
+    if not isinstance(user, str) or not 0 < len(user) <= MAX_USER_LENGTH:
+        raise ValueError(f"'user' must be 1-{MAX_USER_LENGTH} characters")
+    if op not in OPERATIONS:
+        raise ValueError(f"unknown op '{op}'. Use one of: "
+                         f"{', '.join(OPERATIONS)}")
+    if not isinstance(args, dict):
+        raise ValueError("'args' must be a JSON object")
+    return user, op, args
+
+
+def _failed(message):
+    """
+    Returns an already answered future holding an error.
+    """
+    future = asyncio.get_running_loop().create_future()
+    future.set_result((False, message))
+    return future
+
+
+class TrackerService:
+    """
+    The asyncio server, routing each user's requests to their shard.
+
+    Parameters:
+        shards (int): Number of shard processes; 0 keeps every store
+            inside the server process.
+        data_dir (str): Folder for the users' saved stores. When
+            omitted the stores only live in memory.
+    """
+
+    def __init__(self, shards=None, data_dir=None):
+        if shards is None:
+            shards = os.cpu_count() or 1
+        self.data_dir = data_dir
+        self.server = None
+        self._connections = set()
+        if shards == 0:
+            _init_shard(data_dir, VALID_COUNTRIES)
+            self.shards = [Shard()]
+        else:
+            self.shards = [
+                Shard(ProcessPoolExecutor(
+                    max_workers=1, initializer=_init_shard,
+                    initargs=(data_dir, VALID_COUNTRIES)))
+                for _ in range(shards)]
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening and returns the (host, port) bound to.
+        """
+        for shard in self.shards:
+            shard.task = asyncio.ensure_future(shard.run())
+        self.server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=LINE_LIMIT,
+            backlog=4096)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        """
+        Serves until cancelled.
+        """
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        """
+        Stops accepting connections and shuts the shards down.
+        """
+        if self.server is not None:
+            self.server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for shard in self.shards:
+            if shard.task is not None:
+                shard.task.cancel()
+            if shard.executor is not None:
+                shard.executor.shutdown(wait=True)
+        if self.shards and self.shards[0].executor is None:
+            close_shard()
+
+    def dispatch(self, line):
+        """
+        Routes one request line to its shard.
+
+        Returns:
+            tuple: (request id, future answer)
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return None, _failed("request is not valid JSON")
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            user, op, args = parse_request(request)
+        except ValueError as error:
+            return request_id, _failed(str(error))
+        shard = self.shards[shard_for(user, len(self.shards))]
+        return request_id, shard.submit(user, op, args)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves one kept-alive connection.
+
+        Requests are read and sent to the shards as they arrive, while
+        a second task writes the answers back in request order.
+        """
+        task = asyncio.current_task()
+        self._connections.add(task)
+        pending = asyncio.Queue(maxsize=PIPELINE_DEPTH)
+        responder = asyncio.ensure_future(self._respond(pending, writer))
+        try:
+            while not responder.done():
+                try:
+                    line = await asyncio.wait_for(reader.readline(),
+                                                  IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:  # Longer than LINE_LIMIT
+                    await pending.put((None, _failed("request too long")))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await pending.put(self.dispatch(line))
+            if not responder.done():
+                await pending.put(None)
+                await responder
+        except (ConnectionError, asyncio.CancelledError):
+            responder.cancel()  # Client gone or service stopping
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _respond(pending, writer):
+        """
+        Writes the answers in order, draining once the queue is empty
+        so pipelined answers go out together.
+        """
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                request_id, future = item
+                ok, value = await future
+                answer = {"id": request_id, "ok": ok,
+                          "result" if ok else "error": value}
+                writer.write(json.dumps(answer).encode("utf-8") + b"\n")
+                if pending.empty():
+                    await writer.drain()
+        except ConnectionError:
+            return
+
+
+class TrackerClient:
+    """
+    A client for the service that pipelines its requests.
+
+    Use TrackerClient.connect() to open one. Every request() call
+    sends its line straight away, so concurrent calls share the
+    connection without waiting for each other.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._waiting = deque()
+        self._reader_task = asyncio.ensure_future(self._read_answers())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Opens a connection to the service.
+        """
+        reader, writer = await asyncio.open_connection(host, port,
+                                                       limit=LINE_LIMIT)
+        return cls(reader, writer)
+
+    async def _read_answers(self):
+        """
+        Matches each answer line to the oldest waiting request.
+        """
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                answer = json.loads(line)
+                future = self._waiting.popleft()
+                if not future.done():
+                    future.set_result(answer)
+        finally:
+            while self._waiting:
+                future = self._waiting.popleft()
+                if not future.done():
+                    future.set_exception(
+                        ConnectionError("connection closed"))
+
+    async def request(self, user, op, **args):
+        """
+        Sends one request and waits for its answer.
+
+        Returns:
+            The operation's result.
+
+        Raises:
+            ValueError: If the service rejected the request.
+        """
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        self.writer.write(json.dumps({
+            "id": self._next_id, "user": user, "op": op, "args": args
+        }).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        answer = await future
+        if not answer["ok"]:
+            raise ValueError(answer["error"])
+        return answer["result"]
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._reader_task.cancel()
+
+
+async def serve(host, port, shards, data_dir):
+    """
+    Runs the service until it is interrupted.
+    """
+    service = TrackerService(shards, data_dir)
+    host, port = await service.start(host, port)
+    try:  # Stop cleanly on SIGTERM as well as Ctrl+C
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # Windows
+    print(f"Travel Tracker service listening on {host}:{port} "
+          f"with {len(service.shards)} shard(s)")
+    try:
+        await service.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await service.stop()
+        print("\nService stopped.")
+
+
+def main(argv=None):
+    """
+    Starts the service from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve the Travel Tracker to many users over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--shards", type=int, default=None,
+                        help="worker processes (default: one per CPU; "
+                             "0 runs everything in this process)")
+    parser.add_argument("--data-dir",
+                        help="folder for the users' saved records "
+                             "(default: kept in memory only)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.shards, args.data_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Tests for the read-only archive: queries, closing and batch commands.
+"""
+
+import io
+import json
+
+import pytest
+
+from archive import TravelArchive
+from benchmark import generate_records
+from commands import CommandRunner
+from travel_store import SORT_ORDERS, TravelStore
+
+
+@pytest.fixture(scope="module")
+def store():
+    store = TravelStore()
+    for trip in generate_records(3000, seed=5):
+        store.add(*trip)
+    return store
+
+
+@pytest.fixture
+def archive_path(store, tmp_path):
+    path = str(tmp_path / "history.tta")
+    assert store.write_archive(path) == len(store)
+    return path
+
+
+def test_queries_match_the_store(store, archive_path):
+    with TravelArchive(archive_path) as archive:
+        assert len(archive) == len(store)
+        for query in ("fra", "an", "zz"):
+            assert list(archive.search(query)) == store.search(query)
+        for category in ("visited", "wishlist"):
+            for order in SORT_ORDERS:
+                archived = list(archive.sorted_records(category, order))
+                stored = list(store.sorted_records(category, order))
+                if order in ("az", "za"):
+                    # The archive also orders each country's trips by date
+                    assert ([country for country, _ in archived] ==
+                            [country for country, _ in stored])
+                    assert sorted(archived) == sorted(stored)
+                else:
+                    assert archived == stored
+            assert (archive.between(category, "01-01-2000", "31-12-2010") ==
+                    store.between(category, "01-01-2000", "31-12-2010"))
+            assert archive.in_year(category, 2020) == store.in_year(
+                category, 2020)
+            assert archive.first(category, 7) == store.first(category, 7)
+            assert archive.last(category, 7) == store.last(category, 7)
+            assert (archive.count_before(category, "01-01-2015") ==
+                    store.count_before(category, "01-01-2015"))
+        # The store lists trips as stored, the archive by country
+        assert (sorted(archive.display_lines()) ==
+                sorted(store.display_lines()))
+
+
+@pytest.mark.parametrize("query", [
+    lambda archive: archive.search("a"),
+    lambda archive: archive.sorted_records("visited", "az"),
+    lambda archive: archive.sorted_records("visited", "date"),
+    lambda archive: archive.sorted_records("wishlist", "date-desc"),
+    lambda archive: archive.display_lines(),
+    iter,
+])
+def test_unfinished_iterators_fail_the_same_way_after_close(archive_path,
+                                                            query):
+    archive = TravelArchive(archive_path)
+    rows = query(archive)
+    next(rows)
+    archive.close()
+    with pytest.raises(ValueError, match="is closed"):
+        next(rows)
+
+
+def test_queries_after_close_fail_and_results_stay_usable(archive_path):
+    archive = TravelArchive(archive_path)
+    first = archive.first("visited", 5)
+    archive.close()
+    archive.close()
+    assert len(first) == 5
+    for query in (lambda: archive.first("visited", 5), archive.info,
+                  lambda: archive.search("a"), lambda: len(archive)):
+        with pytest.raises(ValueError, match="is closed"):
+            query()
+
+
+def test_damaged_files_are_refused(tmp_path):
+    path = tmp_path / "bad.tta"
+    path.write_bytes(b"not an archive at all" * 10)
+    with pytest.raises(ValueError):
+        TravelArchive(str(path))
+
+
+def test_batch_commands_query_an_archive(store, archive_path):
+    out, err = io.StringIO(), io.StringIO()
+    runner = CommandRunner(TravelStore(), out=out, err=err)
+    assert runner.run([f"archive-info {archive_path}",
+                       f"archive-search {archive_path} fra",
+                       f"archive-sort {archive_path} wishlist date",
+                       "archive-info missing.tta"]) == (4, 1)
+    lines = out.getvalue().splitlines()
+    assert json.loads(lines[0])["records"] == len(store)
+    search = [tuple(line.split("\t")) for line in lines[1:]
+              if line.count("\t") == 2]
+    assert search == store.search("fra")
+    sort = [tuple(line.split("\t")) for line in lines[1 + len(search):]]
+    assert sort == list(store.sorted_records("wishlist", "date"))
+    assert "missing.tta" in err.getvalue()
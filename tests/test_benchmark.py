@@ -0,0 +1,22 @@
+"""
+Tests for the benchmark data and report.
+"""
+
+import benchmark
+
+
+def test_generated_trips_do_not_depend_on_the_run_date():
+    trips = list(benchmark.generate_records(200, seed=7))
+    assert trips == list(benchmark.generate_records(
+        200, seed=7, today=benchmark.DEFAULT_TODAY))
+    assert max(day[-4:] for category, _, day in trips
+               if category == "visited") <= "2025"
+
+
+def test_report_records_the_data_it_was_run_on():
+    report = benchmark.run(sizes=[200], seed=7, memory=False)
+    assert report["meta"]["today"] == benchmark.DEFAULT_TODAY.isoformat()
+    assert report["meta"]["seed"] == 7
+    add = report["results"][0]
+    assert add["operation"] == "add" and add["size"] == 200
+    assert 0 < add["records"] <= 200
@@ -0,0 +1,55 @@
+"""
+Tests for importing and exporting records in bulk.
+"""
+
+import csv
+
+import pytest
+
+from bulk_io import export_records, import_records
+from travel_store import TravelStore
+
+
+def _import(store, path, **options):
+    return import_records(str(path), store.add_record, store.countries,
+                          workers=1, **options)
+
+
+def test_csv_with_byte_order_mark_is_imported(tmp_path):
+    path = tmp_path / "trips.csv"
+    path.write_text("category,country,date\nvisited,France,14-07-2019\n",
+                    encoding="utf-8-sig")
+    store = TravelStore()
+    assert _import(store, path) == (1, 0, 0)
+    assert store.contains("visited", "France", "14-07-2019")
+
+
+def test_bad_rows_are_rejected_and_duplicates_merged(tmp_path):
+    path = tmp_path / "trips.jsonl"
+    path.write_text(
+        '{"category": "visited", "country": "Spain", "date": "03-03-2018"}\n'
+        '{"category": "visited", "country": "spain", "date": "03-03-2018"}\n'
+        '{"category": "visited", "country": "Atlantis", "date": '
+        '"03-03-2018"}\n'
+        'not json\n', encoding="utf-8")
+    report = tmp_path / "rejected.csv"
+    store = TravelStore()
+    assert _import(store, path, report_path=str(report)) == (1, 2, 1)
+    with open(report, encoding="utf-8", newline="") as file:
+        assert len(list(csv.reader(file))) == 3  # Header and two rows
+
+
+@pytest.mark.parametrize("name", ["trips.csv", "trips.jsonl"])
+def test_export_then_import_round_trips(tmp_path, name):
+    store = TravelStore()
+    store.add("visited", "France", "14-07-2019")
+    store.add("wishlist", "Japan", "01-04-2030")
+    path = tmp_path / name
+    assert export_records(str(path), store.data) == 2
+
+    copy = TravelStore()
+    assert _import(copy, path)[:2] == (2, 0)
+    for category in ("visited", "wishlist"):
+        assert ([(r["country"], r["date"]) for r in copy.records(category)]
+                == [(r["country"], r["date"])
+                    for r in store.records(category)])
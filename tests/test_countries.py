@@ -0,0 +1,24 @@
+"""
+Tests for looking up the country a user typed.
+"""
+
+from countries import VALID_COUNTRIES, CountryResolver
+
+resolver = CountryResolver(VALID_COUNTRIES)
+
+
+def test_codes_match_in_upper_case():
+    assert resolver.resolve("NO") == "Norway"
+    assert resolver.resolve("GBR") == "United Kingdom"
+    assert resolver.resolve("USA") == "United States"
+
+
+def test_everyday_words_are_not_countries():
+    for word in ("no", "in", "is", "it", "to", "so", "do", "my", "and",
+                 "can", "us", "uk"):
+        assert resolver.resolve(word) is None, word
+
+
+def test_names_match_regardless_of_case():
+    assert resolver.resolve("south korea") == "Korea, South"
+    assert resolver.resolve("FRANCE") == "France"
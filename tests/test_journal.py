@@ -0,0 +1,70 @@
+"""
+Recovery tests for the journal: torn and unterminated tails.
+"""
+
+import json
+import os
+
+from journal import JOURNAL_NAME, TravelJournal
+from travel_store import TravelStore
+
+
+def _entry(seq, country, date, op="add", category="visited"):
+    return json.dumps({"seq": seq, "op": op, "category": category,
+                       "country": country, "date": date})
+
+
+def _write_journal(directory, text):
+    with open(os.path.join(directory, JOURNAL_NAME), "w",
+              encoding="utf-8") as file:
+        file.write(text)
+
+
+def _countries(store, category="visited"):
+    return sorted(record["country"] for record in store.records(category))
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    _write_journal(tmp_path, _entry(1, "France", "14-07-2019") + "\n"
+                   + '{"seq": 2, "op": "add", "cat')
+    store = TravelStore(str(tmp_path))
+    assert _countries(store) == ["France"]
+    store.close()
+    with open(os.path.join(tmp_path, JOURNAL_NAME), "rb") as file:
+        assert file.read().endswith(b"\n")
+
+
+def test_unterminated_tail_is_dropped(tmp_path):
+    _write_journal(tmp_path, _entry(1, "France", "14-07-2019") + "\n"
+                   + _entry(2, "Spain", "01-08-2020"))
+    journal = TravelJournal(str(tmp_path))
+    data = journal.load()
+    journal.close()
+    assert [record["country"] for record in data["visited"]] == ["France"]
+    with open(os.path.join(tmp_path, JOURNAL_NAME), "rb") as file:
+        assert file.read() == (_entry(1, "France", "14-07-2019")
+                               + "\n").encode()
+
+
+def test_add_after_unterminated_tail_survives_reload(tmp_path):
+    _write_journal(tmp_path, _entry(1, "France", "14-07-2019") + "\n"
+                   + _entry(2, "Spain", "01-08-2020"))
+    store = TravelStore(str(tmp_path))
+    store.add("visited", "Italy", "05-05-2021")
+    store.close()
+
+    store = TravelStore(str(tmp_path))
+    assert _countries(store) == ["France", "Italy"]
+    store.close()
+
+
+def test_intact_journal_is_kept(tmp_path):
+    store = TravelStore(str(tmp_path))
+    store.add("visited", "France", "14-07-2019")
+    store.add("wishlist", "Japan", "01-04-2030")
+    store.close()
+
+    store = TravelStore(str(tmp_path))
+    assert _countries(store) == ["France"]
+    assert _countries(store, "wishlist") == ["Japan"]
+    store.close()
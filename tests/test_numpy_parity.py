@@ -0,0 +1,93 @@
+"""
+Tests that the NumPy paths give the same answers as the plain Python ones.
+"""
+
+import random
+from array import array
+from datetime import date
+
+import pytest
+
+from countries import VALID_COUNTRIES
+from date_index import pack_key
+from date_parser import BEFORE_BIRTH, INVALID_DATE, DateRules
+from geography import CountryTable
+
+pytest.importorskip("numpy")
+
+TODAY = date(2024, 3, 15)
+
+EDGE_DATES = [
+    "29-02-2024", "29-02-2023", "29-02-2000", "29-02-1900", "31-04-2020",
+    "31-12-2023", "01-01-0001", "00-01-2020", "01-00-2020", "01-13-2020",
+    "32-01-2020", "15-03-2024", "16-03-2024", "14-03-2024", "15-03-1994",
+    "14-03-1994", "1-2-2020", "01/02/2020", "01-02-20200", "ab-cd-efgh",
+    "01-02-２０２０", " 1-02-2020", "", None,
+]
+
+
+def _column(count=3000, seed=7):
+    rng = random.Random(seed)
+    categories, dates = [], []
+    for _ in range(count):
+        categories.append(rng.choice(["visited", "wishlist", "other"]))
+        if rng.random() < 0.2:
+            dates.append(rng.choice(EDGE_DATES))
+        else:
+            dates.append(f"{rng.randint(0, 32):02d}-{rng.randint(0, 13):02d}"
+                         f"-{rng.randint(1980, 2030)}")
+    return categories, dates
+
+
+@pytest.mark.parametrize("age", [None, 30])
+def test_date_column_matches_python(age):
+    rules = DateRules(age, TODAY)
+    categories, dates = _column()
+    categories += ["visited"] * len(EDGE_DATES)
+    dates += EDGE_DATES
+
+    fast = rules.check_column(categories, dates, use_numpy=True)
+    slow = rules.check_column(categories, dates, use_numpy=False)
+    assert fast == slow
+    assert INVALID_DATE in slow[1]
+    assert (BEFORE_BIRTH in slow[1]) == (age is not None)
+
+
+def test_date_column_matches_single_checks():
+    rules = DateRules(30, TODAY)
+    categories = ["visited", "wishlist"] * len(EDGE_DATES)
+    dates = [text for text in EDGE_DATES for _ in range(2)]
+    ordinals, reasons = rules.check_column(categories, dates,
+                                           use_numpy=True)
+    assert list(zip(ordinals, reasons)) == [
+        rules.check(category, text)
+        for category, text in zip(categories, dates)]
+
+
+def test_country_distances_match_python():
+    fast = CountryTable(VALID_COUNTRIES, use_numpy=True)
+    slow = CountryTable(VALID_COUNTRIES, use_numpy=False)
+    rng = random.Random(3)
+    for _ in range(200):
+        first = rng.randrange(len(VALID_COUNTRIES))
+        second = rng.randrange(len(VALID_COUNTRIES))
+        assert fast.distance(first, second) == pytest.approx(
+            slow.distance(first, second), abs=1e-6)
+    assert fast.distance(5, 5) == slow.distance(5, 5) == 0
+
+
+def test_routes_match_python():
+    fast = CountryTable(VALID_COUNTRIES, use_numpy=True)
+    slow = CountryTable(VALID_COUNTRIES, use_numpy=False)
+    rng = random.Random(5)
+    country_ids = [rng.randrange(len(VALID_COUNTRIES)) for _ in range(500)]
+    keys = array("q", (pack_key(730000 + day, country_id)
+                       for day, country_id in enumerate(country_ids)))
+
+    expected = slow.route_km(country_ids)
+    assert expected > 0
+    assert fast.route_km(country_ids) == pytest.approx(expected)
+    assert fast.route_km(array("H", country_ids)) == pytest.approx(expected)
+    assert fast.keys_route_km(keys) == pytest.approx(expected)
+    assert slow.keys_route_km(keys) == pytest.approx(expected)
+    assert fast.route_km(country_ids[:1]) == slow.route_km([]) == 0.0
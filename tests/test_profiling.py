@@ -0,0 +1,63 @@
+"""
+Tests for the optional per-operation profiling.
+"""
+
+import time
+
+import pytest
+
+import profiling
+
+
+@profiling.instrument("work")
+def _work(records):
+    profiling.count_records(records)
+    return records * 2
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = profiling.Recorder()
+    monkeypatch.setattr(profiling, "_recorder", recorder)
+    return recorder
+
+
+def test_nothing_is_recorded_while_profiling_is_off(monkeypatch):
+    monkeypatch.setattr(profiling, "_recorder", None)
+    assert _work(3) == 6
+
+
+def test_calls_and_records_are_counted(recorder):
+    for records in (1, 2, 3):
+        assert _work(records) == records * 2
+    stats = recorder.operations["work"]
+    assert stats.calls == 3 and stats.records == 6
+    assert sum(stats.buckets) == 3
+    assert 0 < stats.percentile(0.5) <= stats.slowest
+
+
+def test_time_waiting_for_input_is_not_counted_as_work(recorder):
+    ask = recorder.timed_input(lambda prompt: time.sleep(0.05) or "yes")
+
+    @profiling.instrument("prompt")
+    def prompt():
+        return ask("? ")
+
+    assert prompt() == "yes"
+    stats = recorder.operations["prompt"]
+    assert stats.waiting >= 0.05
+    assert stats.busy < 0.05
+
+
+def test_summary_lists_every_operation(recorder):
+    _work(1)
+    lines = list(recorder.summary_lines())
+    assert lines[0].split()[:3] == ["operation", "calls", "records"]
+    assert any(line.startswith("work ") for line in lines[1:])
+
+
+def test_profiling_is_requested_from_the_environment(monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, "1")
+    assert profiling.requested()
+    monkeypatch.setenv(profiling.PROFILE_ENV, "0")
+    assert not profiling.requested()
@@ -0,0 +1,30 @@
+"""
+Tests for the query result cache.
+"""
+
+from query_cache import MISS, QueryCache
+
+
+def test_cache_is_bounded_by_rows():
+    cache = QueryCache(max_rows=25)
+    cache.put("a", (0,), range(10))
+    cache.put("b", (0,), range(10))
+    cache.put("c", (0,), range(10))
+    assert cache.rows <= 25
+    assert cache.get("a", (0,)) is MISS
+    assert cache.get("c", (0,)) == tuple(range(10))
+
+
+def test_results_longer_than_the_budget_are_not_kept():
+    cache = QueryCache(max_rows=5)
+    assert cache.put("a", (0,), range(10)) == tuple(range(10))
+    assert len(cache) == 0 and cache.rows == 0
+
+
+def test_replacing_a_result_frees_its_rows():
+    cache = QueryCache(max_rows=100)
+    cache.put("a", (0,), range(40))
+    cache.put("a", (1,), range(20))
+    assert cache.rows == 21
+    assert cache.get("a", (0,)) is MISS
+    assert cache.get("a", (1,)) == tuple(range(20))
@@ -0,0 +1,50 @@
+"""
+Tests for the screen and paging output.
+"""
+
+import io
+
+import renderer
+from renderer import Screen, show_pages
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_screen_is_written_in_one_go():
+    stream = CountingStream()
+    with Screen(stream) as screen:
+        screen.add("one", "two")
+        screen.add("three")
+    assert stream.writes == 1
+    assert stream.getvalue() == "one\ntwo\nthree\n"
+
+
+def test_windows_console_is_set_up_on_first_draw(monkeypatch):
+    calls = []
+    monkeypatch.setattr(renderer, "_ansi_ready", False)
+    monkeypatch.setattr(renderer.os, "system", calls.append)
+    Screen(io.StringIO())
+    Screen(io.StringIO())
+    assert calls == [""]
+
+
+def test_pages_are_pulled_only_when_shown():
+    pulled = []
+
+    def lines():
+        for number in range(100):
+            pulled.append(number)
+            yield f"line {number}"
+
+    shown = show_pages(["Title"], lines(), size=10, ask=lambda prompt: "q",
+                       stream=io.StringIO())
+    assert shown == 10
+    assert len(pulled) == 11  # The first page and a peek at the next
@@ -0,0 +1,36 @@
+"""
+Tests for the country name search index.
+"""
+
+from travel_store import TravelStore
+
+
+def _store():
+    store = TravelStore()
+    for country, date in (("France", "14-07-2019"), ("France", "01-05-2015"),
+                          ("Finland", "10-01-2020"), ("Spain", "03-03-2018")):
+        store.add("visited", country, date)
+    store.add("wishlist", "France", "01-06-2030")
+    return store
+
+
+def test_search_lists_every_record_of_the_matches_in_date_order():
+    assert _store().search("fr") == [
+        ("visited", "France", "01-05-2015"),
+        ("visited", "France", "14-07-2019"),
+        ("wishlist", "France", "01-06-2030"),
+    ]
+
+
+def test_search_follows_deletes():
+    store = _store()
+    assert len(store.search("f")) == 4  # Builds the index
+    store.delete_countries("visited", ["France"])
+    store.delete("visited", "Finland")
+    assert store.search("f") == [("wishlist", "France", "01-06-2030")]
+    assert store.prefix_search("fin") == []
+
+
+def test_prefix_search():
+    assert [country for _, country, _ in _store().prefix_search("f")] == [
+        "Finland", "France", "France", "France"]
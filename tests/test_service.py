@@ -0,0 +1,79 @@
+"""
+Tests for the service's request handling inside a shard.
+"""
+
+import json
+
+import pytest
+
+import service
+from countries import VALID_COUNTRIES
+from travel_store import TravelStore
+
+
+@pytest.fixture
+def shard(tmp_path):
+    service._init_shard(str(tmp_path), VALID_COUNTRIES)
+    yield tmp_path
+    service.close_shard()
+
+
+def _add(user, country, date="14-07-2019"):
+    return (user, "add", {"category": "visited", "country": country,
+                          "date": date})
+
+
+@pytest.mark.parametrize("args", [
+    json.loads('{"offset": 1e400}'),
+    json.loads('{"limit": Infinity}'),
+    {"limit": 10 ** 30},
+    {"offset": -1},
+    {"limit": "5"},
+    {"limit": True},
+])
+def test_bad_paging_fails_only_its_own_request(shard, args):
+    results = service.run_batch([
+        _add("ana", "France"),
+        ("ana", "display", args),
+        _add("bo", "Spain"),
+    ])
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert "must be a whole number" in results[1][1]
+
+
+def test_unexpected_errors_do_not_fail_the_batch(shard, monkeypatch):
+    def broken(state, args, today):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(service.OPERATIONS, "ping", broken)
+    results = service.run_batch([_add("ana", "France"), ("ana", "ping", {}),
+                                 _add("ana", "Spain")])
+    assert [ok for ok, _ in results] == [True, False, True]
+    assert "boom" in results[1][1]
+
+
+def test_batch_changes_are_committed(shard):
+    service.run_batch([_add("ana", "France"), ("ana", "display", {
+        "offset": float("inf")}), _add("ana", "Spain")])
+    directory = service.user_directory(str(shard), "ana")
+    saved = TravelStore(directory)
+    assert sorted(r["country"] for r in saved.records("visited")) == [
+        "France", "Spain"]
+    saved.close()
+
+
+def test_sort_pages(shard):
+    service.run_batch([_add("ana", country) for country in
+                       ("Spain", "France", "Chad")])
+    [(ok, result)] = service.run_batch([("ana", "sort", {
+        "category": "visited", "offset": 1, "limit": 1})])
+    assert ok and result == {"total": 3,
+                             "records": [("France", "14-07-2019")]}
+
+
+def test_invalid_requests_are_refused():
+    for request in ([], {"user": "", "op": "ping"},
+                    {"user": "ana", "op": "fly"},
+                    {"user": "ana", "op": "ping", "args": [1]}):
+        with pytest.raises(ValueError):
+            service.parse_request(request)
@@ -0,0 +1,66 @@
+"""
+Tests for the running travel statistics and the upcoming-trip heap.
+"""
+
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+from travel_stats import TravelStats
+from travel_store import TravelStore
+
+TODAY = date(2025, 1, 1)
+COUNTRIES = ["France", "Spain", "Italy", "Japan", "Chad", "Peru"]
+
+
+def _day(offset):
+    return (TODAY + timedelta(days=offset)).strftime("%d-%m-%Y")
+
+
+def _expected_upcoming(store, days, today):
+    trips = []
+    for record in store.records("wishlist"):
+        if today.toordinal() <= record.ordinal <= today.toordinal() + days:
+            trips.append((record.ordinal, record.country_id,
+                          record.country, record.date))
+    return [(country, day) for _, _, country, day in sorted(trips)]
+
+
+def test_running_totals_match_a_rebuild_after_random_changes():
+    rng = random.Random(3)
+    store = TravelStore()
+    _ = store.stats  # Built up front, then kept up to date
+    for _ in range(3000):
+        category = rng.choice(("visited", "wishlist"))
+        country = rng.choice(COUNTRIES)
+        if rng.random() < 0.65:
+            store.add(category, country, _day(rng.randint(-3000, 400)))
+        elif rng.random() < 0.95:
+            store.delete(category, country)
+        else:
+            store.delete_countries(category, [country])
+    rebuilt = TravelStats.from_records(store.data, store.countries)
+    for days in (0, 30, 365):
+        assert (store.stats.summary(days, 3, TODAY) ==
+                rebuilt.summary(days, 3, TODAY))
+        assert (store.stats.upcoming(days, TODAY) ==
+                _expected_upcoming(store, days, TODAY))
+    visited = Counter(record.country for record in store.records("visited"))
+    assert store.stats.total("visited") == sum(visited.values())
+    assert store.stats.country_count("visited") == len(visited)
+
+
+def test_upcoming_skips_deleted_and_past_trips():
+    store = TravelStore()
+    for country, offset in (("Japan", 5), ("Peru", 10), ("Chad", 10),
+                            ("Japan", 40)):
+        store.add("wishlist", country, _day(offset))
+    _ = store.stats
+    store.delete("wishlist", "Peru")
+    assert store.stats.upcoming(30, TODAY) == [
+        ("Japan", _day(5)), ("Chad", _day(10))]
+    later = TODAY + timedelta(days=8)
+    assert store.stats.upcoming(35, later) == [("Chad", _day(10)),
+                                               ("Japan", _day(40))]
+    # Trips that have passed never come back, even for an earlier day
+    assert store.stats.upcoming(30, TODAY) == [("Chad", _day(10))]
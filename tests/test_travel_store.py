@@ -0,0 +1,89 @@
+"""
+Tests for the TravelStore queries.
+"""
+
+import json
+from itertools import islice
+
+import pytest
+
+from travel_store import TravelStore
+
+
+@pytest.mark.parametrize("query, arguments", [
+    ("between", ("01-01-2000", "31-12-2020")),
+    ("in_year", (2019,)),
+    ("first", (3,)),
+    ("last", (3,)),
+    ("count_before", ("01-01-2020",)),
+])
+def test_unknown_category_is_rejected(query, arguments):
+    store = TravelStore()
+    store.add("visited", "France", "14-07-2019")
+    with pytest.raises(ValueError):
+        getattr(store, query)("visits", *arguments)
+
+
+def test_duplicate_add_is_merged():
+    store = TravelStore()
+    assert store.add("visited", "France", "14-07-2019") is not None
+    assert store.add("visited", "france", "14-07-2019") is None
+    assert len(store) == 1
+    assert store.duplicates_merged == 1
+
+
+def test_legacy_duplicates_stay_known_until_all_are_deleted(tmp_path):
+    with open(tmp_path / "journal.log", "w", encoding="utf-8") as file:
+        for seq in (1, 2):
+            file.write(json.dumps({
+                "seq": seq, "op": "add", "category": "visited",
+                "country": "France", "date": "14-07-2019"}) + "\n")
+    store = TravelStore(str(tmp_path))
+    assert store.count_country("visited", "France") == 2
+    assert store.contains("visited", "France", "14-07-2019")
+    store.delete("visited", "France")
+    assert store.contains("visited", "France", "14-07-2019")
+    store.delete("visited", "France")
+    assert not store.contains("visited", "France", "14-07-2019")
+    store.close()
+
+
+def _many_trips(count):
+    store = TravelStore()
+    countries = ["Peru", "Chile", "Japan", "Austria", "Kenya"]
+    for day in range(count):
+        store.add("visited", countries[day % 5],
+                  f"{day % 28 + 1:02d}-{day // 28 % 12 + 1:02d}-"
+                  f"{2000 + day // 336}")
+    return store
+
+
+@pytest.mark.parametrize("order", ["az", "za"])
+def test_country_sort_caches_positions_and_pages_lazily(monkeypatch, order):
+    import travel_store
+    store = _many_trips(3000)
+    expected = sorted(((record.country, record.date)
+                       for record in store.records("visited")),
+                      key=lambda row: row[0].lower(), reverse=order == "za")
+    assert [country for country, _ in store.sorted_records(
+        "visited", order)] == [country for country, _ in expected]
+
+    calls = []
+    real = travel_store.ordinal_to_date
+    monkeypatch.setattr(travel_store, "ordinal_to_date",
+                        lambda ordinal: calls.append(ordinal) or real(ordinal))
+    page = list(islice(store.sorted_records("visited", order), 10))
+    assert len(page) == 10 and len(calls) == 10
+    assert store.cache.hits == 1
+    assert store.cache.rows == len(store.data["visited"]) + 1
+
+
+def test_sorted_records_follow_changes():
+    store = _many_trips(50)
+    before = list(store.sorted_records("visited", "az"))
+    store.delete_countries("visited", ["Austria"])
+    store.add("visited", "Belgium", "01-01-2010")
+    after = list(store.sorted_records("visited", "az"))
+    assert after[0] == ("Belgium", "01-01-2010")
+    assert sorted(after[1:]) == sorted(
+        row for row in before if row[0] != "Austria")
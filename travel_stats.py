@@ -0,0 +1,245 @@
+"""
+Travel statistics kept up to date as records change.
+
+Instead of rescanning every record whenever a total is wanted, the
+statistics are stored as running aggregates that each add or delete
+updates in O(1): per-category totals, per-country counts, the number
+of different countries, per-year histograms, and a heap of wishlist
+dates for the trips coming up next. Answering a question then costs
+the same at ten records as at ten million.
+
+Deleted wishlist trips are not searched for in the heap; they are
+noted and skipped when they reach the top, and the heap is rebuilt
+once such leftovers make up half of it.
+"""
+
+import heapq
+from collections import Counter
+from datetime import date
+
+from date_index import pack_key, unpack_key
+from date_parser import ordinal_to_date
+
+
+def _year(ordinal):
+    return date.fromordinal(ordinal).year
+
+
+class TravelStats:
+    """
+    Running totals for every category of the travel data.
+
+    Parameters:
+        countries (list): The valid country names, indexed by country ID.
+    """
+
+    def __init__(self, countries):
+        self.countries = countries
+        self._totals = Counter()       # category -> records
+        self._distinct = Counter()     # category -> countries with records
+        self._country_counts = {}      # category -> records per country ID
+        self._years = {}               # category -> Counter of year -> records
+        self._upcoming = []            # heap of packed wishlist keys
+        self._cancelled = Counter()    # deleted keys still in the heap
+        self._cancelled_total = 0
+        self._expired_before = 0       # keys before this were dropped
+
+    @classmethod
+    def from_records(cls, travel_data, countries):
+        """
+        Builds the statistics of the given travel data in one pass.
+        """
+        stats = cls(countries)
+        for category, records in travel_data.items():
+            counts = stats._counts(category)
+            for country_id, count in Counter(records.country_ids).items():
+                counts[country_id] = count
+            stats._distinct[category] = sum(1 for count in counts if count)
+            stats._totals[category] = len(records)
+            years = stats._year_counts(category)
+            for ordinal, count in Counter(records.ordinals).items():
+                years[_year(ordinal)] += count
+            if category == "wishlist":
+                stats._upcoming = [
+                    pack_key(ordinal, country_id)
+                    for country_id, ordinal in zip(records.country_ids,
+                                                   records.ordinals)]
+                heapq.heapify(stats._upcoming)
+        return stats
+
+    def _counts(self, category):
+        counts = self._country_counts.get(category)
+        if counts is None:
+            counts = self._country_counts[category] = [0] * len(
+                self.countries)
+        return counts
+
+    def _year_counts(self, category):
+        return self._years.setdefault(category, Counter())
+
+    def add(self, category, record):
+        """
+        Counts a newly added record.
+        """
+        counts = self._counts(category)
+        if not counts[record.country_id]:
+            self._distinct[category] += 1
+        counts[record.country_id] += 1
+        self._totals[category] += 1
+        self._year_counts(category)[_year(record.ordinal)] += 1
+        if category == "wishlist" and record.ordinal >= self._expired_before:
+            heapq.heappush(self._upcoming,
+                           pack_key(record.ordinal, record.country_id))
+
+    def discard(self, category, record):
+        """
+        Uncounts a deleted record.
+        """
+        counts = self._counts(category)
+        counts[record.country_id] -= 1
+        if not counts[record.country_id]:
+            self._distinct[category] -= 1
+        self._totals[category] -= 1
+        years = self._year_counts(category)
+        year = _year(record.ordinal)
+        years[year] -= 1
+        if not years[year]:
+            del years[year]
+        if category == "wishlist" and record.ordinal >= self._expired_before:
+            self._cancelled[pack_key(record.ordinal,
+                                     record.country_id)] += 1
+            self._cancelled_total += 1
+            if self._cancelled_total > len(self._upcoming) // 2:
+                self._compact()
+
+    def discard_many(self, category, records):
+        """
+        Uncounts a batch of deleted records.
+        """
+        for record in records:
+            self.discard(category, record)
+
+    def _compact(self):
+        """
+        Rebuilds the heap without the deleted wishlist trips.
+        """
+        kept = []
+        for key in self._upcoming:
+            if self._cancelled[key] > 0:
+                self._cancelled[key] -= 1
+            else:
+                kept.append(key)
+        heapq.heapify(kept)
+        self._upcoming = kept
+        self._cancelled.clear()
+        self._cancelled_total = 0
+
+    def _pop_cancelled(self, key):
+        """
+        Returns True, and forgets the deletion, if the key was deleted.
+        """
+        if self._cancelled[key] > 0:
+            self._cancelled[key] -= 1
+            self._cancelled_total -= 1
+            return True
+        return False
+
+    def total(self, category):
+        """
+        Returns how many records the category holds.
+        """
+        return self._totals[category]
+
+    def country_count(self, category):
+        """
+        Returns how many different countries the category holds.
+        """
+        return self._distinct[category]
+
+    def country_counts(self, category):
+        """
+        Returns the records of each country, indexed by country ID. The
+        list is kept up to date and must not be changed.
+        """
+        return self._counts(category)
+
+    def coverage(self, category="visited"):
+        """
+        Returns the share of the valid countries in the category, 0-1.
+        """
+        return self._distinct[category] / len(self.countries)
+
+    def per_year(self, category="visited"):
+        """
+        Returns [(year, records), ...] in year order.
+        """
+        return sorted(self._year_counts(category).items())
+
+    def most_visited(self, category="visited", count=5, minimum=2):
+        """
+        Returns the countries with the most records, as
+        [(country, records), ...], most first.
+
+        Only countries with at least `minimum` records are included, so
+        by default these are the countries visited more than once.
+        """
+        counts = self._counts(category)
+        ranked = sorted((country_id for country_id, number in
+                         enumerate(counts) if number >= minimum),
+                        key=lambda country_id: (-counts[country_id],
+                                                self.countries[country_id]))
+        return [(self.countries[country_id], counts[country_id])
+                for country_id in ranked[:count]]
+
+    def upcoming(self, days, today=None):
+        """
+        Returns the wishlist trips from today up to `days` days ahead,
+        as [(country, date), ...] in date order.
+
+        Costs O(k log n) for k trips, whatever the size of the wishlist.
+        """
+        today = (today or date.today()).toordinal()
+        last = pack_key(today + days + 1)
+        heap = self._upcoming
+
+        # Trips before today can never come up again
+        while heap and unpack_key(heap[0])[0] < today:
+            self._pop_cancelled(heapq.heappop(heap))
+        if today > self._expired_before:
+            self._expired_before = today
+
+        found = []
+        while heap and heap[0] < last:
+            key = heapq.heappop(heap)
+            if not self._pop_cancelled(key):
+                found.append(key)
+        for key in found:
+            heapq.heappush(heap, key)
+        upcoming = []
+        for key in found:
+            ordinal, country_id = unpack_key(key)
+            upcoming.append((self.countries[country_id],
+                             ordinal_to_date(ordinal)))
+        return upcoming
+
+    def summary(self, days=30, top=5, today=None):
+        """
+        Returns every statistic in one dict, ready to show or send.
+
+        Parameters:
+            days (int): How far ahead to look for wishlist trips.
+            top (int): How many of the most visited countries to list.
+            today (date): The day to count from. Defaults to today.
+        """
+        return {
+            "visited_trips": self.total("visited"),
+            "visited_countries": self.country_count("visited"),
+            "wishlist_trips": self.total("wishlist"),
+            "wishlist_countries": self.country_count("wishlist"),
+            "valid_countries": len(self.countries),
+            "coverage": round(self.coverage("visited"), 4),
+            "visits_per_year": self.per_year("visited"),
+            "most_visited": self.most_visited("visited", top),
+            "upcoming_days": days,
+            "upcoming": self.upcoming(days, today),
+        }
@@ -0,0 +1,560 @@
+"""
+The Travel Tracker data model as an importable library.
+
+TravelStore holds the visited and wishlist records and exposes the
+add, delete, search, sort and display operations without any prompts
+or printing, so it can be used from scripts, notebooks, batch jobs or
+services as well as from the interactive app in main.py.
+
+Importing this module does no work. The country resolver, the
+search, date and membership indexes and the statistics are only built
+the first time they are needed, and are then kept up to date on every
+change.
+
+Adding a trip that is already stored, with the same country and date,
+is merged into the stored one instead of keeping both. Search results
+and the record order of A-Z and Z-A sorts are cached until the
+categories they read from change.
+
+Example:
+    store = TravelStore()                     # in memory
+    store = TravelStore.open()                # saved in the data folder
+    store.add("visited", "France", "14-07-2019")
+    store.search("fra")
+    store.statistics()
+"""
+
+from countries import VALID_COUNTRIES, CountryResolver
+from date_index import DateIndex
+from date_parser import date_to_ordinal, is_valid_date, ordinal_to_date
+from position_index import PositionIndex
+from query_cache import MISS, QueryCache
+from record_array import RecordArray
+
+CATEGORIES = ("visited", "wishlist")
+SORT_ORDERS = ("az", "za", "date", "date-desc")
+
+# Plain headings and labels for display_lines()
+DISPLAY_SECTIONS = (
+    ("visited", "Visited Countries:", "Visited on"),
+    ("wishlist", "Wishlist Countries:", "Planned for"),
+)
+
+
+class TravelStore:
+    """
+    Visited and wishlist records with their indexes.
+
+    Parameters:
+        directory (str): Folder for the journal and snapshot. When
+            omitted the store only lives in memory.
+        countries (list): The valid country names. Defaults to
+            VALID_COUNTRIES.
+        resolver (CountryResolver): A resolver to share with other
+            stores of the same countries. Built on first use if omitted.
+    """
+
+    def __init__(self, directory=None, countries=None, resolver=None):
+        self.countries = countries or VALID_COUNTRIES
+        self.journal = None
+        if directory:
+            from journal import TravelJournal
+            self.journal = TravelJournal(directory)
+            self.data = self.journal.load(CATEGORIES, self._new_records)
+        else:
+            self.data = {category: self._new_records()
+                         for category in CATEGORIES}
+        self.positions = PositionIndex(self.data)
+        self._resolver = resolver
+        self._search_index = None
+        self._date_index = None
+        self._stats = None
+        self._geography = None
+        self._membership = None
+        self.cache = QueryCache()
+        self._versions = dict.fromkeys(self.data, 0)  # Bumped on changes
+        self.duplicates_merged = 0
+
+    @classmethod
+    def open(cls, directory=None):
+        """
+        Opens the saved store, by default in the tracker's data folder.
+        """
+        from journal import default_data_dir
+        return cls(directory or default_data_dir())
+
+    def _new_records(self):
+        return RecordArray(self.countries)
+
+    @property
+    def resolver(self):
+        """
+        The country name resolver, built on first use.
+        """
+        if self._resolver is None:
+            self._resolver = CountryResolver(self.countries)
+        return self._resolver
+
+    @property
+    def search_index(self):
+        """
+        The country name search index, built on first use.
+        """
+        if self._search_index is None:
+            from search_index import SearchIndex
+            self._search_index = SearchIndex.from_records(
+                self.data, self.positions, self.countries)
+        return self._search_index
+
+    @property
+    def date_index(self):
+        """
+        The chronological index, built on first use.
+        """
+        if self._date_index is None:
+            self._date_index = DateIndex.from_records(self.data,
+                                                      self.countries)
+        return self._date_index
+
+    @property
+    def stats(self):
+        """
+        The running travel statistics, built on first use.
+        """
+        if self._stats is None:
+            from travel_stats import TravelStats
+            self._stats = TravelStats.from_records(self.data, self.countries)
+        return self._stats
+
+    @property
+    def geography(self):
+        """
+        The country metadata table, built on first use.
+        """
+        if self._geography is None:
+            from geography import CountryTable
+            self._geography = CountryTable(self.countries)
+        return self._geography
+
+    @property
+    def membership(self):
+        """
+        The (country, date) membership index, built on first use.
+        """
+        if self._membership is None:
+            from membership_index import MembershipIndex
+            self._membership = MembershipIndex.from_records(self.data)
+        return self._membership
+
+    def _built_indexes(self):
+        """
+        Returns the lazily built indexes that exist so far.
+        """
+        return [index for index in (self._search_index, self._date_index,
+                                    self._stats, self._membership)
+                if index is not None]
+
+    def _changed(self, category):
+        """
+        Bumps a category's version, so cached results of it go stale.
+        """
+        self._versions[category] += 1
+
+    def _cached(self, key, categories, query):
+        """
+        Returns the cached result of a query, running it on a miss.
+
+        Parameters:
+            key (tuple): (operation, arguments...).
+            categories (tuple): The categories the query reads.
+            query (callable): Works the result out.
+
+        Returns:
+            tuple: The result.
+        """
+        versions = tuple(self._versions[category] for category in categories)
+        result = self.cache.get(key, versions)
+        if result is MISS:
+            result = self.cache.put(key, versions, query())
+        return result
+
+    def __len__(self):
+        return sum(len(records) for records in self.data.values())
+
+    def _check_category(self, category):
+        if category not in self.data:
+            raise ValueError(f"Unknown category '{category}'. "
+                             "Use 'visited' or 'wishlist'.")
+
+    def records(self, category):
+        """
+        Iterates over the TravelRecords of a category in stored order.
+        """
+        self._check_category(category)
+        return iter(self.data[category])
+
+    # Adding
+
+    def add(self, category, country, date):
+        """
+        Adds a trip.
+
+        Parameters:
+            category (str): 'visited' or 'wishlist'.
+            country (str): A country name, alias or ISO code.
+            date (str): The date as dd-mm-yyyy.
+
+        Returns:
+            TravelRecord or None: The record as stored, or None if the
+            same trip was already stored and the two were merged.
+
+        Raises:
+            ValueError: If the category, country or date is invalid.
+        """
+        self._check_category(category)
+        name = self.resolver.resolve(country)
+        if name is None:
+            raise ValueError(f"Unknown country '{country}'.")
+        return self.add_record(category, {"country": name, "date": date})
+
+    def add_record(self, category, record):
+        """
+        Adds an already validated {"country", "date"} record.
+
+        Returns:
+            TravelRecord or None: The record as stored, or None if the
+            same trip was already stored and the two were merged.
+        """
+        records = self.data[category]
+        record = records.make_record(record)
+        if self.membership.contains(category, record):
+            self.duplicates_merged += 1
+            return None
+        records.append(record)
+        self.positions.add(category, record)
+        for index in self._built_indexes():
+            index.add(category, record)
+        self._changed(category)
+        self._log("add", category, record)
+        return record
+
+    def contains(self, category, country, date):
+        """
+        Returns True if the trip is already stored, in O(1).
+        """
+        self._check_category(category)
+        name = self.resolver.resolve(country)
+        records = self.data[category]
+        if name is None or not is_valid_date(date):
+            return False
+        return self.membership.contains(
+            category, records.make_record({"country": name, "date": date}))
+
+    # Deleting
+
+    def find(self, category, country):
+        """
+        Returns the position of a record for the country, or None.
+        """
+        self._check_category(category)
+        name = self.resolver.resolve(country) or country
+        return self.positions.find(category,
+                                   self.data[category].country_id(name))
+
+    def count_country(self, category, country):
+        """
+        Returns how many records the country has in the category.
+        """
+        self._check_category(category)
+        name = self.resolver.resolve(country) or country
+        return self.positions.count(category,
+                                    self.data[category].country_id(name))
+
+    def delete(self, category, country):
+        """
+        Deletes one record of a country.
+
+        Returns:
+            TravelRecord or None: The deleted record, if there was one.
+        """
+        position = self.find(category, country)
+        if position is None:
+            return None
+        return self.delete_at(category, position)
+
+    def delete_at(self, category, position):
+        """
+        Deletes the record at a position of a category in O(1).
+
+        Returns:
+            TravelRecord: The deleted record.
+        """
+        record = self.positions.pop(category, position)
+        for index in self._built_indexes():
+            index.discard(category, record)
+        self._changed(category)
+        self._log("delete", category, record)
+        return record
+
+    def delete_where(self, category, predicate):
+        """
+        Deletes every record of a category matching a predicate in one
+        pass.
+
+        Parameters:
+            category (str): 'visited' or 'wishlist'.
+            predicate (callable): Called with each TravelRecord.
+
+        Returns:
+            list: The deleted records.
+        """
+        self._check_category(category)
+        removed = self.positions.remove_where(category, predicate)
+        if removed:
+            for index in self._built_indexes():
+                index.discard_many(category, removed)
+            self._changed(category)
+        for record in removed:
+            self._log("delete", category, record)
+        return removed
+
+    def delete_countries(self, category, countries):
+        """
+        Deletes every record of the given countries from a category.
+
+        Returns:
+            list: The deleted records.
+        """
+        self._check_category(category)
+        records = self.data[category]
+        country_ids = {records.country_id(self.resolver.resolve(country))
+                       for country in countries}
+        return self.delete_where(
+            category, lambda record: record.country_id in country_ids)
+
+    def delete_before(self, category, date):
+        """
+        Deletes every record of a category dated before a date.
+
+        Returns:
+            list: The deleted records.
+        """
+        cutoff = date_to_ordinal(date)
+        return self.delete_where(category,
+                                 lambda record: record.ordinal < cutoff)
+
+    # Searching and sorting
+
+    def search(self, query):
+        """
+        Finds the records whose country name contains the query.
+
+        Returns:
+            list: (category, country, date) tuples.
+        """
+        return list(self._cached(("search", query.lower()), CATEGORIES,
+                                 lambda: self.search_index.search(query)))
+
+    def prefix_search(self, prefix):
+        """
+        Finds the records whose country name starts with the prefix.
+
+        Returns:
+            list: (category, country, date) tuples.
+        """
+        return list(self._cached(
+            ("prefix_search", prefix.lower()), CATEGORIES,
+            lambda: self.search_index.prefix_search(prefix)))
+
+    def sorted_records(self, category, order="az"):
+        """
+        Yields the (country, date) records of a category in order.
+
+        Parameters:
+            category (str): 'visited' or 'wishlist'.
+            order (str): 'az', 'za', 'date' (oldest first) or
+                'date-desc' (newest first).
+        """
+        self._check_category(category)
+        if order not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order '{order}'. "
+                             f"Use one of: {', '.join(SORT_ORDERS)}.")
+        # The date index already yields in date order one record at a
+        # time; A-Z and Z-A keep only their record positions in the cache
+        if order == "date":
+            return self.date_index.ascending(category)
+        if order == "date-desc":
+            return self.date_index.descending(category)
+        positions = self._cached(
+            ("country_order", category, order), (category,),
+            lambda: self.data[category].country_order(order == "za"))
+        return self._at_positions(category, positions)
+
+    def _at_positions(self, category, positions):
+        """
+        Yields the (country, date) records at the given positions, one at
+        a time, so a page only builds its own rows.
+        """
+        records = self.data[category]
+        countries, country_ids = records.countries, records.country_ids
+        ordinals = records.ordinals
+        return ((countries[country_ids[position]],
+                 ordinal_to_date(ordinals[position]))
+                for position in positions)
+
+    def between(self, category, start, end):
+        """
+        Returns the (country, date) records dated from start to end.
+        """
+        self._check_category(category)
+        return list(self._cached(
+            ("between", category, start, end), (category,),
+            lambda: self.date_index.between(category, start, end)))
+
+    def first(self, category, count):
+        """
+        Returns the earliest `count` (country, date) records.
+        """
+        self._check_category(category)
+        return self.date_index.first(category, count)
+
+    def last(self, category, count):
+        """
+        Returns the latest `count` (country, date) records, newest first.
+        """
+        self._check_category(category)
+        return self.date_index.last(category, count)
+
+    def in_year(self, category, year):
+        """
+        Returns the (country, date) records dated in a year.
+        """
+        self._check_category(category)
+        return list(self._cached(
+            ("in_year", category, year), (category,),
+            lambda: self.date_index.in_year(category, year)))
+
+    def count_before(self, category, date):
+        """
+        Returns how many records of a category are dated before a date.
+        """
+        self._check_category(category)
+        return self.date_index.count_before(category, date)
+
+    # Statistics
+
+    def statistics(self, days=30, top=5):
+        """
+        Returns the travel statistics: trip and country totals, the
+        share of valid countries visited, visits per year, the most
+        visited countries and the wishlist trips in the next `days`
+        days. See TravelStats.summary().
+        """
+        return self.stats.summary(days, top)
+
+    # Geography
+
+    def distance_travelled(self, category="visited"):
+        """
+        Returns the km travelled going from country to country in date
+        order, measured between the countries' centroids.
+        """
+        self._check_category(category)
+        return self.geography.keys_route_km(self.date_index.keys(category))
+
+    def region_coverage(self, category="visited"):
+        """
+        Returns the countries and trips of a category per continent and
+        per region. See CountryTable.coverage().
+        """
+        self._check_category(category)
+        return self.geography.coverage(self.stats.country_counts(category))
+
+    def nearest_wishlist(self, origin=None, count=5):
+        """
+        Returns the wishlist countries not visited yet that are nearest
+        to a country.
+
+        Parameters:
+            origin (str): The country to measure from. Defaults to the
+                country of the latest visit.
+            count (int): How many countries to return.
+
+        Returns:
+            list: (country, km) pairs, nearest first. Empty when there
+            is nothing to measure from.
+
+        Raises:
+            ValueError: If the origin is not a valid country.
+        """
+        if origin is None:
+            latest = self.date_index.last("visited", 1)
+            if not latest:
+                return []
+            origin = latest[0][0]
+        name = self.resolver.resolve(origin)
+        if name is None:
+            raise ValueError(f"Unknown country '{origin}'.")
+        visited = self.stats.country_counts("visited")
+        wished = self.stats.country_counts("wishlist")
+        candidates = [country_id for country_id, trips in enumerate(wished)
+                      if trips and not visited[country_id]]
+        return self.geography.nearest(self.countries.index(name),
+                                      candidates, count)
+
+    # Display
+
+    def display_lines(self, headings=None):
+        """
+        Yields the lines listing every record, formatted lazily.
+
+        Parameters:
+            headings (dict): Optional category -> heading text, to
+                replace the plain headings (e.g. with colours).
+        """
+        headings = headings or {}
+        for category, heading, label in DISPLAY_SECTIONS:
+            heading = headings.get(category, heading)
+            if not self.data[category]:
+                yield heading + " No records yet!"
+                continue
+            yield heading
+            for record in self.data[category]:
+                yield f"- {record.country} ({label}: {record.date})"
+
+    # Persistence
+
+    def _log(self, op, category, record):
+        """
+        Journals a change, compacting the journal when it is due.
+        """
+        if self.journal is None:
+            return
+        self.journal.append(op, category, record)
+        if self.journal.snapshot_due:
+            self.journal.write_snapshot(self.data)
+
+    def write_archive(self, path):
+        """
+        Writes every record to a read-only archive that can be queried
+        without loading it. See archive.py.
+
+        Returns:
+            int: How many records were written.
+        """
+        from archive import write_archive
+        return write_archive(path, self.data, self.countries)
+
+    def commit(self):
+        """
+        Makes every change so far durable with a single fsync.
+        """
+        if self.journal is not None:
+            self.journal.commit()
+
+    def close(self):
+        """
+        Commits outstanding changes and closes the journal.
+        """
+        if self.journal is not None:
+            self.journal.close()